@@ -1,16 +1,35 @@
-from flask import Flask, render_template, request, send_file, jsonify
+from flask import Flask, render_template, request, send_file, jsonify, Response, stream_with_context
 import joblib
 import numpy as np
 import re
 from functools import wraps
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
 from io import BytesIO
-import datetime
+import os
+import io
+import csv
+from compact_forest import CompactForest, COMPACT_PATH
+from pdf_reports import ReportCache, stream_reports_zip, BULK_MAX_REPORTS
 
 app = Flask(__name__)
-model = joblib.load('model/rf_model.pkl')
-label_encoder = joblib.load('model/label_encoder.pkl')  # Load encoder
+# Model paths are relative to this file so the app also runs inside gateway.py
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+model = joblib.load(os.path.join(BASE_DIR, 'model/rf_model.pkl'))
+# Single-row predictions use the flattened forest from compact_forest.py when
+# exported; batches stay on sklearn, whose compiled traversal is faster there
+if os.path.exists(os.path.join(BASE_DIR, COMPACT_PATH)):
+    single_row_model = CompactForest.load(os.path.join(BASE_DIR, COMPACT_PATH))
+else:
+    single_row_model = model
+label_encoder = joblib.load(os.path.join(BASE_DIR, 'model/label_encoder.pkl'))  # Load encoder
+# Crop name for each predict_proba column
+class_labels = label_encoder.inverse_transform(model.classes_)
+
+# Batch scoring: Crop_recommendation.csv column order and the /predict bounds
+BATCH_FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+BATCH_BOUNDS = np.array([(0, 200), (0, 200), (0, 200), (-50, 100), (0, 100), (0, 14), (0, 1000)], dtype=float)
+BATCH_CHUNK_ROWS = int(os.environ.get('BATCH_CHUNK_ROWS', 2000))
+BATCH_OUTPUT_FIELDS = (['row'] + BATCH_FEATURES + ['prediction'] +
+                       [f'top{i}_{part}' for i in (1, 2, 3) for part in ('label', 'probability')] + ['error'])
 
 # Input validation helper functions
 def validate_required_fields(required_fields):
@@ -75,7 +94,7 @@ def predict():
             'rainfall': str(data[6])
         }
         
-        prediction_num = model.predict([data])[0]
+        prediction_num = single_row_model.predict([data])[0]
         prediction_label = label_encoder.inverse_transform([prediction_num])[0]  # Convert to name
         
         return render_template('result.html', crop=prediction_label, params=input_params)
@@ -86,6 +105,120 @@ def predict():
         app.logger.error(f"Prediction error: {str(e)}")
         return jsonify({'error': 'Prediction failed'}), 500
 
+def parse_batch_value(raw):
+    """float() of a CSV cell, falling back to sanitize_numeric_input's character cleanup"""
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        try:
+            return float(re.sub(r'[^0-9.-]', '', str(raw)))
+        except ValueError:
+            return np.nan
+
+
+def read_batch_chunks(rows, chunk_rows=BATCH_CHUNK_ROWS):
+    """Yield (first_row_number, float array of shape (n, 7)) chunks from csv.DictReader rows"""
+    chunk, first = [], 1
+    for number, row in enumerate(rows, start=1):
+        chunk.append([parse_batch_value(row.get(name)) for name in BATCH_FEATURES])
+        if len(chunk) == chunk_rows:
+            yield first, np.array(chunk, dtype=float)
+            chunk, first = [], number + 1
+    if chunk:
+        yield first, np.array(chunk, dtype=float)
+
+
+def validate_batch(X):
+    """Vectorized range check; returns one error string (or '') per row"""
+    invalid = np.isnan(X)
+    out_of_range = ~invalid & ((X < BATCH_BOUNDS[:, 0]) | (X > BATCH_BOUNDS[:, 1]))
+    errors = np.full(len(X), '', dtype=object)
+    for i, j in zip(*np.nonzero(invalid | out_of_range)):
+        if errors[i]:
+            continue
+        low, high = BATCH_BOUNDS[j]
+        name = BATCH_FEATURES[j]
+        errors[i] = f"Invalid {name}" if invalid[i, j] else f"{name} must be between {low:g} and {high:g}"
+    return errors
+
+
+def score_batch_chunk(first, X, writer):
+    """Score one chunk and write its CSV rows; returns (scored, failed)"""
+    errors = validate_batch(X)
+    valid = errors == ''
+    top_labels = top_probabilities = None
+    if valid.any():
+        proba = model.predict_proba(X[valid])
+        top = np.argsort(-proba, axis=1, kind='stable')[:, :3]
+        top_labels = class_labels[top]
+        top_probabilities = np.take_along_axis(proba, top, axis=1)
+
+    scored_index = 0
+    for offset in range(len(X)):
+        out = {'row': first + offset, 'error': errors[offset]}
+        out.update({name: ('' if np.isnan(value) else value) for name, value in zip(BATCH_FEATURES, X[offset])})
+        if valid[offset]:
+            out['prediction'] = top_labels[scored_index, 0]
+            for rank in range(top_labels.shape[1]):
+                out[f'top{rank + 1}_label'] = top_labels[scored_index, rank]
+                out[f'top{rank + 1}_probability'] = round(float(top_probabilities[scored_index, rank]), 4)
+            scored_index += 1
+        writer.writerow(out)
+    return int(valid.sum()), int((~valid).sum())
+
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Score an uploaded CSV ('file') in the Crop_recommendation.csv layout chunk by
+    chunk, streaming back a CSV with the predicted crop and top-3 probabilities
+    """
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': "Upload a CSV file as 'file'"}), 400
+    text = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    header = [name.strip() for name in (reader.fieldnames or [])]
+    missing = [name for name in BATCH_FEATURES if name not in header]
+    if missing:
+        return jsonify({'error': f"CSV is missing columns: {', '.join(missing)}"}), 400
+    reader.fieldnames = header
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=BATCH_OUTPUT_FIELDS)
+        writer.writeheader()
+        scored = failed = 0
+        # The upload is spooled to disk by Werkzeug and read one chunk at a time
+        for first, X in read_batch_chunks(reader):
+            chunk_scored, chunk_failed = score_batch_chunk(first, X, writer)
+            scored += chunk_scored
+            failed += chunk_failed
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+        app.logger.info(f"Batch scoring finished: {scored} scored, {failed} rejected")
+
+    return Response(stream_with_context(generate()), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=crop_recommendations.csv'})
+
+# Rendered reports keyed by a hash of their inputs
+report_cache = ReportCache()
+
+
+def read_report_params(source):
+    """Validated report parameters from a form or JSON object (raises ValueError)"""
+    return {
+        'N': str(sanitize_numeric_input(source['N'], 0, 200, "Nitrogen")),
+        'P': str(sanitize_numeric_input(source['P'], 0, 200, "Phosphorus")),
+        'K': str(sanitize_numeric_input(source['K'], 0, 200, "Potassium")),
+        'temperature': str(sanitize_numeric_input(source['temperature'], -50, 100, "Temperature")),
+        'humidity': str(sanitize_numeric_input(source['humidity'], 0, 100, "Humidity")),
+        'ph': str(sanitize_numeric_input(source['ph'], 0, 14, "pH")),
+        'rainfall': str(sanitize_numeric_input(source['rainfall'], 0, 1000, "Rainfall"))
+    }
+
 # PDF download route
 @app.route('/download_report', methods=['POST'])
 @validate_required_fields(['crop', 'N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall'])
@@ -93,47 +226,13 @@ def download_report():
     try:
         # Sanitize inputs
         crop = sanitize_input(request.form['crop'], 100)
-        params = {
-            'N': str(sanitize_numeric_input(request.form['N'], 0, 200, "Nitrogen")),
-            'P': str(sanitize_numeric_input(request.form['P'], 0, 200, "Phosphorus")),
-            'K': str(sanitize_numeric_input(request.form['K'], 0, 200, "Potassium")),
-            'temperature': str(sanitize_numeric_input(request.form['temperature'], -50, 100, "Temperature")),
-            'humidity': str(sanitize_numeric_input(request.form['humidity'], 0, 100, "Humidity")),
-            'ph': str(sanitize_numeric_input(request.form['ph'], 0, 14, "pH")),
-            'rainfall': str(sanitize_numeric_input(request.form['rainfall'], 0, 1000, "Rainfall"))
-        }
-        
-        buffer = BytesIO()
-        p = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        
-        # Logo/Header (optional)
-        p.setFont('Helvetica-Bold', 18)
-        p.drawString(50, height - 60, "AgriTech Crop Recommendation Report")
-        
-        # Date & Time
-        p.setFont('Helvetica', 10)
-        p.drawString(50, height - 80, f"Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        # Input Parameters
-        p.setFont('Helvetica-Bold', 12)
-        p.drawString(50, height - 120, "Input Parameters:")
-        p.setFont('Helvetica', 11)
-        y = height - 140
-        for k, v in params.items():
-            p.drawString(70, y, f"{k}: {v}")
-            y -= 18
-            
-        # Prediction Result
-        p.setFont('Helvetica-Bold', 12)
-        p.drawString(50, y - 10, "Prediction Result:")
-        p.setFont('Helvetica', 13)
-        p.drawString(70, y - 30, f"Recommended Crop: {crop}")
-        p.showPage()
-        p.save()
-        buffer.seek(0)
-        
-        return send_file(buffer, as_attachment=True, download_name="crop_recommendation_report.pdf", mimetype='application/pdf')
+        params = read_report_params(request.form)
+
+        pdf_bytes, cache_hit = report_cache.get_or_render('crop', crop, params)
+        response = send_file(BytesIO(pdf_bytes), as_attachment=True,
+                             download_name="crop_recommendation_report.pdf", mimetype='application/pdf')
+        response.headers['X-Report-Cache'] = 'hit' if cache_hit else 'miss'
+        return response
         
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
@@ -141,6 +240,35 @@ def download_report():
         app.logger.error(f"PDF generation error: {str(e)}")
         return jsonify({'error': 'Failed to generate PDF'}), 500
 
+@app.route('/download_reports', methods=['POST'])
+def download_reports():
+    """
+    Bulk reports: JSON {"reports": [{"crop": ..., "N": ..., ...}, ...]} in,
+    a ZIP with one PDF per entry streamed out
+    """
+    payload = request.get_json(silent=True) or {}
+    entries = payload.get('reports') if isinstance(payload, dict) else payload
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': "Send a JSON list of reports as 'reports'"}), 400
+    if len(entries) > BULK_MAX_REPORTS:
+        return jsonify({'error': f"Too many reports; the limit is {BULK_MAX_REPORTS}"}), 400
+
+    reports = []
+    for index, entry in enumerate(entries, start=1):
+        try:
+            crop = sanitize_input(entry.get('crop', ''), 100)
+            if not crop:
+                raise ValueError("Missing required field: crop")
+            params = read_report_params(entry)
+        except (ValueError, KeyError, AttributeError) as e:
+            return jsonify({'error': f"Report {index}: {e}"}), 400
+        name = re.sub(r'[^A-Za-z0-9_-]+', '_', str(entry.get('name') or crop))
+        reports.append((f"{index:04d}_{name}.pdf", crop, params))
+
+    return Response(stream_with_context(stream_reports_zip(report_cache, 'crop', reports)),
+                    mimetype='application/zip',
+                    headers={'Content-Disposition': 'attachment; filename=crop_recommendation_reports.zip'})
+
 # Global error handlers
 @app.errorhandler(400)
 def bad_request(error):
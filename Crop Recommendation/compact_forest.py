@@ -0,0 +1,204 @@
+"""
+Compact array-backed inference for the crop recommendation RandomForest
+Flattens every tree of a fitted RandomForestClassifier into contiguous NumPy
+arrays (split feature, threshold, children, de-duplicated leaf class
+distributions) saved as one .npz, and predicts by walking all trees at once
+with vectorized indexing. Predictions match sklearn bit for bit.
+
+It is built for single-row latency (no sklearn input validation or per-tree
+dispatch); for large batches sklearn's compiled tree traversal is faster, so
+batch scoring should use the sklearn model.
+
+Usage:
+    python compact_forest.py                 # export model/rf_model.pkl -> model/rf_model.npz
+    python compact_forest.py --benchmark     # also compare latency with sklearn
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+
+MODEL_PATH = 'model/rf_model.pkl'
+COMPACT_PATH = 'model/rf_model.npz'
+FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+# Rows walked at a time; bounds the (rows, trees) index arrays of apply()
+CHUNK_ROWS = 4096
+
+
+def _tree_depth(left, right):
+    """Depth of one sklearn tree from its children arrays"""
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [child for node in frontier for child in (left[node], right[node]) if child != -1]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def flatten_forest(model):
+    """Concatenate the trees of a fitted RandomForestClassifier into flat arrays"""
+    features, thresholds, lefts, rights, leaf_values = [], [], [], [], []
+    roots, offset, max_depth = [], 0, 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        count = tree.node_count
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(count)
+        # Leaves point at themselves so extra traversal steps are no-ops
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        leaf_values.append(value / normalizer)
+
+        roots.append(offset)
+        offset += count
+        max_depth = max(max_depth, _tree_depth(tree.children_left, tree.children_right))
+
+    node_values = np.concatenate(leaf_values)
+    # Fully grown trees have mostly pure leaves, so distinct distributions are few
+    distributions, value_ids = np.unique(node_values, axis=0, return_inverse=True)
+    return {
+        'feature': np.concatenate(features).astype(np.int8 if model.n_features_in_ < 128 else np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'value_id': value_ids.reshape(-1).astype(np.int32),
+        'distributions': distributions,
+        'roots': np.array(roots, dtype=np.int32),
+        'classes': np.asarray(model.classes_),
+        'max_depth': np.array(max_depth),
+        'n_features': np.array(model.n_features_in_)
+    }
+
+
+def export_forest(model, path=COMPACT_PATH):
+    """Write the flattened forest to a compressed .npz and return a loaded CompactForest"""
+    np.savez_compressed(path, **flatten_forest(model))
+    return CompactForest.load(path)
+
+
+class CompactForest:
+    """Vectorized RandomForest predictor over flat node arrays"""
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature'].astype(np.intp)
+        self.threshold = arrays['threshold']
+        self.left = arrays['left'].astype(np.intp)
+        self.right = arrays['right'].astype(np.intp)
+        self.value_id = arrays['value_id'].astype(np.intp)
+        self.distributions = arrays['distributions']
+        self.roots = arrays['roots'].astype(np.intp)
+        self.classes_ = arrays['classes']
+        self.max_depth = int(arrays['max_depth'])
+        self.n_features_in_ = int(arrays['n_features'])
+
+    @classmethod
+    def load(cls, path=COMPACT_PATH):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def apply(self, X):
+        """Leaf node index reached in every tree, shape (n_samples, n_trees)"""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        proba = np.zeros((X.shape[0], self.distributions.shape[1]))
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            leaf_value_ids = self.value_id[self.apply(X[start:start + CHUNK_ROWS])]
+            # Accumulate tree by tree in order, exactly like RandomForestClassifier,
+            # without materializing an (n_samples, n_trees, n_classes) array
+            chunk = proba[start:start + CHUNK_ROWS]
+            for tree in range(leaf_value_ids.shape[1]):
+                chunk += self.distributions[leaf_value_ids[:, tree]]
+            chunk /= leaf_value_ids.shape[1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def verify_agreement(model, compact, X):
+    """Raise AssertionError unless probabilities and labels equal sklearn's bit for bit"""
+    expected = model.predict_proba(X)
+    actual = compact.predict_proba(X)
+    if not np.array_equal(expected, actual):
+        mismatched = int(np.sum(np.any(expected != actual, axis=1)))
+        raise AssertionError(f"Compact forest disagrees with sklearn on {mismatched} of {len(X)} rows")
+    if not np.array_equal(model.predict(X), compact.predict(X)):
+        raise AssertionError("Compact forest labels disagree with sklearn")
+    return len(X)
+
+
+def _time_ms(fn, repeat):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return round(float(np.median(timings)) * 1000, 3)
+
+
+def benchmark(model, compact, X, repeat=50):
+    """Median latency of sklearn vs. the compact forest for one row and for the whole X"""
+    row = X[:1]
+    results = {
+        'sklearn_single_ms': _time_ms(lambda: model.predict(row), repeat),
+        'compact_single_ms': _time_ms(lambda: compact.predict(row), repeat),
+        'sklearn_batch_ms': _time_ms(lambda: model.predict(X), max(3, repeat // 10)),
+        'compact_batch_ms': _time_ms(lambda: compact.predict(X), max(3, repeat // 10)),
+        'batch_rows': len(X)
+    }
+    for name, value in results.items():
+        print(f"  {name:20} {value}")
+    return results
+
+
+def main():
+    import joblib
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--out', default=COMPACT_PATH)
+    parser.add_argument('--data', default='Crop_recommendation.csv')
+    parser.add_argument('--benchmark', action='store_true')
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    compact = export_forest(model, args.out)
+    print(f"✅ Exported {len(compact.roots)} trees / {len(compact.feature)} nodes to {args.out}")
+    print(f"📦 {os.path.getsize(args.model) / 1e6:.2f} MB pickle -> {os.path.getsize(args.out) / 1e6:.2f} MB npz")
+
+    X = pd.read_csv(args.data)[FEATURES].to_numpy(dtype=np.float64)
+    # Training rows plus jittered copies so thresholds are exercised from both sides
+    rng = np.random.default_rng(0)
+    X_check = np.vstack([X, X + rng.normal(0, 1, X.shape)])
+    print(f"✅ Bit-for-bit agreement with sklearn on {verify_agreement(model, compact, X_check)} rows")
+
+    if args.benchmark:
+        print("\n⏱️ Median latency")
+        benchmark(model, compact, X)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+"""
+PDF report rendering, a content-addressed disk cache for the rendered files
+and bulk rendering into a streamed ZIP archive
+
+Reports are keyed on a SHA-256 of their normalized inputs (report kind, crop,
+parameters and the report date), so identical requests on the same day are
+served from disk instead of rebuilding the reportlab canvas. The cache directory is bounded in bytes and
+evicts least recently used files. Bulk requests render the missing reports
+in worker processes and stream each PDF into the ZIP as soon as it is ready.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import pickle
+import zipfile
+import hashlib
+import datetime
+import threading
+import subprocess
+from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import Future
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'reports'))
+CACHE_MAX_BYTES = int(float(os.environ.get('REPORT_CACHE_MAX_MB', 100)) * 1024 * 1024)
+BULK_MAX_REPORTS = int(os.environ.get('REPORT_BULK_MAX', 1000))
+BULK_WORKERS = int(os.environ.get('REPORT_BULK_WORKERS', os.cpu_count() or 2))
+WORKER_PATH = os.path.join(BASE_DIR, 'report_worker.py')
+
+
+def _normalize_value(value):
+    """'90', '90.0' and ' 90 ' all normalize to the same key component"""
+    text = str(value).strip()
+    try:
+        return repr(float(text))
+    except ValueError:
+        return text
+
+
+def report_date():
+    """Date printed on reports; part of the cache key so a hit never carries a stale date"""
+    return datetime.date.today().isoformat()
+
+
+def report_key(kind, crop, params, date):
+    """Content address of a report: hash of the kind, crop, normalized params and date"""
+    normalized = {
+        "kind": kind,
+        "crop": str(crop).strip(),
+        "params": {str(k).strip(): _normalize_value(v) for k, v in sorted(params.items())},
+        "date": date
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def render_crop_report(crop, params, date):
+    """Crop Recommendation app layout: parameters first, then the recommended crop"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    p.setFont('Helvetica-Bold', 18)
+    p.drawString(50, height - 60, "AgriTech Crop Recommendation Report")
+
+    p.setFont('Helvetica', 10)
+    p.drawString(50, height - 80, f"Date: {date}")
+
+    p.setFont('Helvetica-Bold', 12)
+    p.drawString(50, height - 120, "Input Parameters:")
+    p.setFont('Helvetica', 11)
+    y = height - 140
+    for k, v in params.items():
+        p.drawString(70, y, f"{k}: {v}")
+        y -= 18
+
+    p.setFont('Helvetica-Bold', 12)
+    p.drawString(50, y - 10, "Prediction Result:")
+    p.setFont('Helvetica', 13)
+    p.drawString(70, y - 30, f"Recommended Crop: {crop}")
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def render_analysis_report(crop, params, date):
+    """Main AgriTech app layout: recommendation first, then the submitted fields"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    p.setFont('Helvetica-Bold', 18)
+    p.drawString(50, height - 60, "AgriTech Analysis Report")
+
+    p.setFont('Helvetica', 10)
+    p.drawString(50, height - 80, f"Date: {date}")
+
+    p.setFont('Helvetica-Bold', 14)
+    p.drawString(50, height - 120, "Analysis Result:")
+    p.setFont('Helvetica', 12)
+    p.drawString(70, height - 140, f"Recommendation: {crop}")
+
+    y_pos = height - 180
+    p.setFont('Helvetica-Bold', 12)
+    p.drawString(50, y_pos, "Input Parameters:")
+    y_pos -= 20
+
+    p.setFont('Helvetica', 10)
+    for key, value in params.items():
+        p.drawString(70, y_pos, f"{key}: {value}")
+        y_pos -= 15
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    'crop': render_crop_report,
+    'analysis': render_analysis_report
+}
+
+
+def _render(kind, crop, params, date):
+    return RENDERERS[kind](crop, params, date)
+
+
+class RenderPool:
+    """
+    Render worker processes fed from one job queue. Each worker is a fresh
+    `python report_worker.py` that imports only this module: a forked worker
+    could copy locks held by the server's other threads, and a spawned
+    multiprocessing worker would re-import the Flask app (models, Ollama
+    registry and all) as __mp_main__. Workers start on their first job and
+    are replaced if they die.
+    """
+
+    def __init__(self, workers=BULK_WORKERS):
+        self._jobs = queue.Queue()
+        for i in range(workers):
+            threading.Thread(target=self._feed, name=f'report-render-{i}', daemon=True).start()
+
+    def submit(self, kind, crop, params, date):
+        """Future for the PDF bytes of one report"""
+        future = Future()
+        self._jobs.put((future, (kind, crop, params, date)))
+        return future
+
+    def _feed(self):
+        worker = None
+        while True:
+            future, job = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if worker is None or worker.poll() is not None:
+                    worker = subprocess.Popen([sys.executable, WORKER_PATH], cwd=BASE_DIR,
+                                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                pickle.dump(job, worker.stdin)
+                worker.stdin.flush()
+                ok, value = pickle.load(worker.stdout)
+            except (OSError, EOFError, pickle.UnpicklingError) as e:
+                if worker is not None:
+                    worker.kill()
+                worker = None
+                future.set_exception(RuntimeError(f"Report worker failed: {e}"))
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(RuntimeError(value))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def render_pool():
+    """Render pool shared by all bulk requests, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool()
+        return _pool
+
+
+class ReportCache:
+    """
+    Directory of <sha256>.pdf files bounded to max_bytes, evicting the least
+    recently used. Hits refresh the file's mtime, which orders the LRU.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # key -> size, oldest first
+        # The directory is created on the first put()
+        entries = []
+        for name in (os.listdir(directory) if os.path.isdir(directory) else []):
+            if name.endswith('.pdf'):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+        self._bytes = sum(self._files.values())
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def get(self, key):
+        """Cached PDF bytes or None"""
+        with self._lock:
+            if key in self._files:
+                try:
+                    with open(self.path(key), 'rb') as f:
+                        pdf_bytes = f.read()
+                    os.utime(self.path(key))
+                except OSError:
+                    pdf_bytes = None
+                if pdf_bytes is not None:
+                    self._files.move_to_end(key)
+                    self.hits += 1
+                    return pdf_bytes
+            self._bytes -= self._files.pop(key, 0)
+            self.misses += 1
+            return None
+
+    def put(self, key, pdf_bytes):
+        """Store a rendered PDF atomically and evict past max_bytes"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{self.path(key)}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, self.path(key))
+        with self._lock:
+            self._bytes += len(pdf_bytes) - self._files.pop(key, 0)
+            self._files[key] = len(pdf_bytes)
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old_key, size = self._files.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(self.path(old_key))
+                except OSError:
+                    pass
+
+    def get_or_render(self, kind, crop, params):
+        """(pdf_bytes, cache_hit) for a report, rendering it on a miss"""
+        date = report_date()
+        key = report_key(kind, crop, params, date)
+        pdf_bytes = self.get(key)
+        if pdf_bytes is not None:
+            return pdf_bytes, True
+        pdf_bytes = _render(kind, crop, params, date)
+        self.put(key, pdf_bytes)
+        return pdf_bytes, False
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": "pdf_reports",
+                "files": len(self._files),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+class _ZipStream:
+    """Write-only file object whose contents are drained by the response generator"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_reports_zip(cache, kind, reports, window=None):
+    """
+    Yield a ZIP archive of reports chunk by chunk. reports is a list of
+    (file_name, crop, params). Cached PDFs come from disk; the rest are
+    rendered by the shared worker processes with at most `window` renders
+    outstanding, so only a handful of PDFs are ever held in memory.
+    """
+    window = window or BULK_WORKERS * 4
+    pool = render_pool()
+    date = report_date()
+    sink = _ZipStream()
+    start = time.perf_counter()
+    rendered = 0
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        pending = []  # (file_name, key, future or cached bytes), in request order
+        inflight = {}  # key -> future, so duplicate requests in a window render once
+        position = 0
+        while position < len(reports) or pending:
+            while position < len(reports) and len(pending) < window:
+                file_name, crop, params = reports[position]
+                key = report_key(kind, crop, params, date)
+                source = inflight.get(key) or cache.get(key)
+                if source is None:
+                    source = inflight[key] = pool.submit(kind, crop, params, date)
+                pending.append((file_name, key, source))
+                position += 1
+
+            file_name, key, source = pending.pop(0)
+            if isinstance(source, bytes):
+                pdf_bytes = source
+            else:
+                pdf_bytes = source.result()
+                if inflight.get(key) is source:
+                    del inflight[key]
+                    cache.put(key, pdf_bytes)
+                    rendered += 1
+            archive.writestr(file_name, pdf_bytes)
+            yield sink.drain()
+    yield sink.drain()
+    print(f"📦 Streamed {len(reports)} reports ({rendered} rendered) in {time.perf_counter() - start:.2f}s")
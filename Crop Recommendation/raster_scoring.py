@@ -0,0 +1,182 @@
+"""
+Regional crop suitability mapping with the crop recommendation RandomForest
+Scores gridded soil/climate layers (N, P, K, temperature, humidity, ph,
+rainfall as aligned 2-D .npy files) cell by cell. The input layers are
+memory-mapped, split into tiles and scored in a process pool; every worker
+maps the same files itself, so no array is copied between processes, and
+writes its tile straight into memory-mapped output layers.
+
+Outputs (in --out-dir):
+    best_crop.npy         int16 class index per cell, -1 where any input is missing
+    best_probability.npy  float32 probability of the best crop
+    probabilities.npy     float32 (classes, rows, cols) stack, with --all-probabilities
+    classes.json          class index -> crop name
+    tiles_done.txt        finished tiles, so an interrupted run can --resume
+
+Usage:
+    python raster_scoring.py --layers data/district_grid --out-dir output/district_map --workers 8
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+from multiprocessing import Pool
+
+from compact_forest import FEATURES
+
+MODEL_PATH = 'model/rf_model.pkl'
+ENCODER_PATH = 'model/label_encoder.pkl'
+NODATA_CROP = -1
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+
+def load_model():
+    """
+    The sklearn forest: tiles are large batches, where its compiled traversal
+    is several times faster and far lighter on memory than CompactForest
+    """
+    import joblib
+    model = joblib.load(MODEL_PATH)
+    # The pool already runs one tile per core
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = 1
+    return model
+
+
+def open_layers(layers_dir):
+    """Memory-map the seven input layers and check they are aligned"""
+    layers = [np.load(os.path.join(layers_dir, f'{name}.npy'), mmap_mode='r') for name in FEATURES]
+    shape = layers[0].shape
+    for name, layer in zip(FEATURES, layers):
+        if layer.ndim != 2 or layer.shape != shape:
+            raise ValueError(f"Layer {name} has shape {layer.shape}; expected 2-D {shape}")
+    return layers
+
+
+def plan_tiles(shape, tile_size):
+    """(row0, row1, col0, col1) windows covering the grid"""
+    rows, cols = shape
+    return [(r, min(r + tile_size, rows), c, min(c + tile_size, cols))
+            for r in range(0, rows, tile_size) for c in range(0, cols, tile_size)]
+
+
+def _init_worker(layers_dir, out_dir, nodata, all_probabilities):
+    _worker['layers'] = open_layers(layers_dir)
+    _worker['model'] = load_model()
+    _worker['nodata'] = nodata
+    _worker['best_crop'] = np.load(os.path.join(out_dir, 'best_crop.npy'), mmap_mode='r+')
+    _worker['best_probability'] = np.load(os.path.join(out_dir, 'best_probability.npy'), mmap_mode='r+')
+    _worker['probabilities'] = (np.load(os.path.join(out_dir, 'probabilities.npy'), mmap_mode='r+')
+                                if all_probabilities else None)
+
+
+def score_tile(window):
+    """Score one tile in a worker and write it into the output layers"""
+    start = time.perf_counter()
+    r0, r1, c0, c1 = window
+    # Only this window of each mapped layer is read from disk
+    X = np.stack([layer[r0:r1, c0:c1].reshape(-1) for layer in _worker['layers']], axis=1).astype(np.float64)
+    valid = np.all(np.isfinite(X), axis=1)
+    if _worker['nodata'] is not None:
+        valid &= np.all(X != _worker['nodata'], axis=1)
+
+    height, width = r1 - r0, c1 - c0
+    best_crop = np.full(height * width, NODATA_CROP, dtype=np.int16)
+    best_probability = np.zeros(height * width, dtype=np.float32)
+    proba = None
+    if valid.any():
+        proba = _worker['model'].predict_proba(X[valid])
+        best = np.argmax(proba, axis=1)
+        best_crop[valid] = best
+        best_probability[valid] = proba[np.arange(len(best)), best]
+
+    _worker['best_crop'][r0:r1, c0:c1] = best_crop.reshape(height, width)
+    _worker['best_probability'][r0:r1, c0:c1] = best_probability.reshape(height, width)
+    if _worker['probabilities'] is not None:
+        stack = np.zeros((height * width, _worker['probabilities'].shape[0]), dtype=np.float32)
+        if proba is not None:
+            stack[valid] = proba
+        _worker['probabilities'][:, r0:r1, c0:c1] = stack.T.reshape(-1, height, width)
+    return window, int(valid.sum()), round((time.perf_counter() - start) * 1000, 1)
+
+
+def create_outputs(out_dir, shape, n_classes, all_probabilities):
+    """Allocate the output layers on disk (sparse files, nothing held in memory)"""
+    open_memmap = np.lib.format.open_memmap
+    open_memmap(os.path.join(out_dir, 'best_crop.npy'), mode='w+', dtype=np.int16, shape=shape)[:] = NODATA_CROP
+    open_memmap(os.path.join(out_dir, 'best_probability.npy'), mode='w+', dtype=np.float32, shape=shape)
+    if all_probabilities:
+        open_memmap(os.path.join(out_dir, 'probabilities.npy'), mode='w+', dtype=np.float32,
+                    shape=(n_classes,) + tuple(shape))
+
+
+def score_raster(layers_dir, out_dir, workers=None, tile_size=512, nodata=None,
+                 all_probabilities=False, resume=False):
+    """Score every cell of the grid; returns a summary dict"""
+    import joblib
+
+    os.makedirs(out_dir, exist_ok=True)
+    shape = open_layers(layers_dir)[0].shape
+    model = load_model()
+    class_labels = joblib.load(ENCODER_PATH).inverse_transform(model.classes_)
+    with open(os.path.join(out_dir, 'classes.json'), 'w', encoding='utf-8') as f:
+        json.dump({int(i): str(label) for i, label in enumerate(class_labels)}, f, indent=2)
+
+    progress_path = os.path.join(out_dir, 'tiles_done.txt')
+    done = set()
+    if resume and os.path.exists(progress_path):
+        with open(progress_path, encoding='utf-8') as f:
+            done = {tuple(int(v) for v in line.split(',')) for line in f if line.strip()}
+    else:
+        create_outputs(out_dir, shape, len(class_labels), all_probabilities)
+        open(progress_path, 'w').close()
+
+    tiles = [tile for tile in plan_tiles(shape, tile_size) if tile not in done]
+    print(f"🗺️ Grid {shape[0]}x{shape[1]} ({shape[0] * shape[1]:,} cells), "
+          f"{len(tiles)} tiles to score with {workers or os.cpu_count()} workers")
+
+    start = time.perf_counter()
+    valid_cells = 0
+    with Pool(workers, initializer=_init_worker,
+              initargs=(layers_dir, out_dir, nodata, all_probabilities)) as pool, \
+            open(progress_path, 'a', encoding='utf-8') as progress:
+        for count, (window, valid, tile_ms) in enumerate(pool.imap_unordered(score_tile, tiles), start=1):
+            valid_cells += valid
+            progress.write(','.join(str(v) for v in window) + '\n')
+            progress.flush()
+            if count % 50 == 0 or count == len(tiles):
+                print(f"  {count}/{len(tiles)} tiles, last {tile_ms} ms")
+
+    elapsed = time.perf_counter() - start
+    cells = sum((r1 - r0) * (c1 - c0) for r0, r1, c0, c1 in tiles)
+    summary = {
+        "cells": cells,
+        "valid_cells": valid_cells,
+        "tiles": len(tiles),
+        "seconds": round(elapsed, 2),
+        "cells_per_second": round(cells / elapsed) if elapsed else None
+    }
+    print(f"✅ Done: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--layers', required=True, help='Directory with N.npy, P.npy, ..., rainfall.npy')
+    parser.add_argument('--out-dir', required=True)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--tile-size', type=int, default=512)
+    parser.add_argument('--nodata', type=float, default=None, help='Input value marking missing cells')
+    parser.add_argument('--all-probabilities', action='store_true', help='Also write the per-crop probability stack')
+    parser.add_argument('--resume', action='store_true', help='Skip tiles listed in tiles_done.txt')
+    args = parser.parse_args()
+    score_raster(args.layers, args.out_dir, workers=args.workers, tile_size=args.tile_size,
+                 nodata=args.nodata, all_probabilities=args.all_probabilities, resume=args.resume)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+Bulk PDF render worker started by pdf_reports.RenderPool
+Reads pickled (kind, crop, params, date) jobs from stdin and writes a pickled
+(ok, pdf bytes or error message) reply for each to stdout until stdin closes.
+Only pdf_reports is imported, so a worker starts in a fraction of a second.
+"""
+
+import sys
+import pickle
+from pdf_reports import _render
+
+
+def main():
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    # Stray prints must not corrupt the reply stream
+    sys.stdout = sys.stderr
+    while True:
+        try:
+            job = pickle.load(stdin)
+        except EOFError:
+            return
+        try:
+            reply = (True, _render(*job))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        pickle.dump(reply, stdout)
+        stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,16 @@
-import pandas as pd
+import os
+import sys
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 import joblib
+from compact_forest import export_forest, verify_agreement
 
-# Load dataset
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataset_cache import load_dataset
+
+# Load dataset (columnar cache, rebuilt when the CSV changes)
 csv_path = './Crop_recommendation.csv'
-df = pd.read_csv(csv_path)
+df = load_dataset(csv_path)
 
 # Features and target
 X = df.drop('label', axis=1)
@@ -24,3 +29,8 @@ joblib.dump(clf, 'model/rf_model.pkl')
 joblib.dump(le, 'model/label_encoder.pkl')
 
 print('Model and label encoder saved successfully!')
+
+# Flattened copy of the forest for fast inference in app.py
+compact = export_forest(clf)
+verify_agreement(clf, compact, X.to_numpy())
+print('Compact forest exported to model/rf_model.npz')
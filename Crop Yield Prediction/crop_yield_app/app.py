@@ -1,17 +1,28 @@
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, send_file
 import joblib
 import numpy as np
 import re
+import os
+import sys
+from io import BytesIO
 from functools import wraps
+from batch_predict import BatchInputError, read_batch_request, score_rows, batch_response
+from category_lookup import compile_yield_lookups, UnknownCategory
+# PDF report rendering and caching are shared with the crop recommendation app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Crop Recommendation'))
+from pdf_reports import ReportCache
 
 app = Flask(__name__)
 
-# Load model and encoders
-model = joblib.load('models/xgb_crop_model.pkl')
-crop_encoder = joblib.load('models/Crop_encoder.pkl')
-season_encoder = joblib.load('models/Season_encoder.pkl')
-state_encoder = joblib.load('models/State_encoder.pkl')
+# Load model and encoders (paths relative to this file so gateway.py can mount the app)
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+model = joblib.load(os.path.join(MODEL_DIR, 'xgb_crop_model.pkl'))
+crop_encoder = joblib.load(os.path.join(MODEL_DIR, 'Crop_encoder.pkl'))
+season_encoder = joblib.load(os.path.join(MODEL_DIR, 'Season_encoder.pkl'))
+state_encoder = joblib.load(os.path.join(MODEL_DIR, 'State_encoder.pkl'))
+# Normalized hash tables compiled once from the encoder classes
+lookups = compile_yield_lookups(crop_encoder, season_encoder, state_encoder)
 
 # Input validation helper functions
 def validate_required_fields(required_fields):
@@ -76,18 +87,13 @@ def predict():
         production = sanitize_numeric_input(form['production'], 0, 1000000, "Production")
         rainfall = sanitize_numeric_input(form['rainfall'], 0, 10000, "Rainfall")
 
-        # Validate against encoder classes
-        if crop not in crop_encoder.classes_:
-            return jsonify({'success': False, 'error': f"Unknown crop: {crop}"}), 400
-        if season not in season_encoder.classes_:
-            return jsonify({'success': False, 'error': f"Unknown season: {season}"}), 400
-        if state not in state_encoder.classes_:
-            return jsonify({'success': False, 'error': f"Unknown state: {state}"}), 400
-
-        # Encode values
-        crop_encoded = crop_encoder.transform([crop])[0]
-        season_encoded = season_encoder.transform([season])[0]
-        state_encoded = state_encoder.transform([state])[0]
+        # Encode against the compiled encoder lookups
+        try:
+            crop_encoded = lookups['crop'].encode(crop)
+            season_encoded = lookups['season'].encode(season)
+            state_encoded = lookups['state'].encode(state)
+        except UnknownCategory as e:
+            return jsonify({'success': False, 'error': str(e), **e.to_dict()}), 400
 
         # Prepare features
         features = np.array([[crop_encoded, year, season_encoded, state_encoded, area, rainfall, production]])
@@ -115,6 +121,40 @@ def predict():
         app.logger.error(f"Prediction error: {str(e)}")
         return jsonify({'success': False, 'error': 'Prediction failed'}), 500
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """Score a JSON array or CSV upload of rows; streams CSV or NDJSON with per-row errors"""
+    try:
+        rows, output_format = read_batch_request(request)
+        results = score_rows(rows, model, lookups)
+        return batch_response(results, output_format)
+    except BatchInputError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Batch prediction error: {str(e)}")
+        return jsonify({'success': False, 'error': 'Batch prediction failed'}), 500
+
+# Rendered reports keyed by a hash of their inputs
+report_cache = ReportCache()
+
+# PDF download route (the form on index.html)
+@app.route('/download_report', methods=['POST'])
+def download_report():
+    try:
+        crop = sanitize_input(request.form.get('crop', 'Crop Yield Prediction'), 100)
+        params = {sanitize_input(key, 50): sanitize_input(value, 200)
+                  for key, value in request.form.items() if key != 'crop'}
+
+        pdf_bytes, cache_hit = report_cache.get_or_render('analysis', crop, params)
+        response = send_file(BytesIO(pdf_bytes), as_attachment=True,
+                             download_name="crop_yield_report.pdf", mimetype='application/pdf')
+        response.headers['X-Report-Cache'] = 'hit' if cache_hit else 'miss'
+        return response
+
+    except Exception as e:
+        app.logger.error(f"PDF generation error: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to generate PDF'}), 500
+
 # Global error handlers
 @app.errorhandler(400)
 def bad_request(error):
@@ -0,0 +1,193 @@
+"""
+Batch crop yield scoring
+Parses thousands of (crop, year, season, state, area, production, rainfall)
+rows from a JSON array or CSV upload, encodes the categoricals in one
+vectorized pass, calls the XGBoost model once and streams the results back
+as CSV or NDJSON with an error message for every row that could not be scored
+"""
+
+import io
+import math
+import os
+import csv
+import json
+from flask import Response
+from category_lookup import UnknownCategory
+
+YIELD_COLUMNS = ['crop', 'year', 'season', 'state', 'area', 'production', 'rainfall']
+# Same limits as the single-row /predict validation
+NUMERIC_BOUNDS = {
+    'year': (1900, 2100),
+    'area': (0, 1000000),
+    'production': (0, 1000000),
+    'rainfall': (0, 10000)
+}
+MAX_ROWS = int(os.environ.get('YIELD_BATCH_MAX_ROWS', 50000))
+OUTPUT_FIELDS = ['row'] + YIELD_COLUMNS + ['prediction', 'error']
+
+
+class BatchInputError(ValueError):
+    """The upload as a whole is unusable (bad format, missing columns, too many rows)"""
+
+
+def read_json_rows(payload):
+    """Accept a JSON array of row objects, or {"rows": [...]}"""
+    rows = payload.get('rows') if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise BatchInputError("Expected a JSON array of rows or an object with a 'rows' array")
+    if len(rows) > MAX_ROWS:
+        raise BatchInputError(f"Too many rows ({len(rows)}); the limit is {MAX_ROWS}")
+    return [row if isinstance(row, dict) else {} for row in rows]
+
+
+def read_csv_rows(file_storage):
+    """Read an uploaded CSV file with a header row naming the yield columns"""
+    text = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    header = {name.strip().lower() for name in (reader.fieldnames or [])}
+    missing = [column for column in YIELD_COLUMNS if column not in header]
+    if missing:
+        raise BatchInputError(f"CSV is missing columns: {', '.join(missing)}")
+    rows = []
+    for row in reader:
+        rows.append({(k or '').strip().lower(): v for k, v in row.items()})
+        if len(rows) > MAX_ROWS:
+            raise BatchInputError(f"Too many rows; the limit is {MAX_ROWS}")
+    return rows
+
+
+def _parse_numeric(rows, column, errors):
+    """Column of floats (NaN where invalid), recording the first error per row"""
+    import numpy as np
+    low, high = NUMERIC_BOUNDS[column]
+    values = np.full(len(rows), np.nan)
+    for i, row in enumerate(rows):
+        raw = row.get(column)
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            value = None
+        # 'nan' and 'inf' parse as floats but are not usable inputs
+        if value is None or not math.isfinite(value):
+            errors[i] = errors[i] or f"Invalid {column}: {raw!r}"
+            continue
+        values[i] = value
+    out_of_range = ~np.isnan(values) & ((values < low) | (values > high))
+    for i in np.flatnonzero(out_of_range):
+        errors[i] = errors[i] or f"{column} must be between {low} and {high}"
+    return values
+
+
+def score_rows(rows, model, lookups):
+    """
+    Score every row with a single model.predict call. lookups are the
+    compiled CategoryLookup tables from compile_yield_lookups().
+    Returns one dict per input row: the inputs plus 'prediction' or 'error'.
+    """
+    import numpy as np  # Imported on first use to keep app startup fast
+    count = len(rows)
+    errors = [None] * count
+    categoricals = {}
+    for column in ('crop', 'season', 'state'):
+        categoricals[column] = [str(row.get(column) or '').strip() for row in rows]
+        for i, value in enumerate(categoricals[column]):
+            if not value:
+                errors[i] = errors[i] or f"Missing {column}"
+    numeric = {column: _parse_numeric(rows, column, errors) for column in NUMERIC_BOUNDS}
+
+    encoded = {}
+    for column in ('crop', 'season', 'state'):
+        lookup = lookups[column]
+        codes, known = lookup.encode_array(categoricals[column])
+        suggestions = {}
+        for i in np.flatnonzero(~known):
+            value = categoricals[column][i]
+            if not errors[i]:
+                if value not in suggestions:
+                    suggestions[value] = str(UnknownCategory(column, value, lookup.suggest(value)))
+                errors[i] = suggestions[value]
+        encoded[column] = codes
+
+    valid = np.array([error is None for error in errors], dtype=bool)
+    predictions = np.full(count, np.nan)
+    if valid.any():
+        # Same column order as the single-row endpoint
+        features = np.column_stack([
+            encoded['crop'], numeric['year'], encoded['season'], encoded['state'],
+            numeric['area'], numeric['rainfall'], numeric['production']
+        ])[valid]
+        predictions[valid] = model.predict(features)
+
+    results = []
+    for i in range(count):
+        result = {'row': i + 1}
+        for column in ('crop', 'season', 'state'):
+            result[column] = categoricals[column][i]
+        for column in NUMERIC_BOUNDS:
+            value = numeric[column][i]
+            result[column] = None if np.isnan(value) else (int(value) if column == 'year' else float(value))
+        if valid[i]:
+            result['prediction'] = round(float(predictions[i]), 2)
+            result['error'] = None
+        else:
+            result['prediction'] = None
+            result['error'] = errors[i]
+        results.append(result)
+    return results
+
+
+def summarize(results):
+    failed = sum(1 for result in results if result['error'])
+    return {'rows': len(results), 'scored': len(results) - failed, 'failed': failed}
+
+
+def stream_ndjson(results, chunk_rows=1000):
+    """NDJSON lines, flushed every chunk_rows rows"""
+    for start in range(0, len(results), chunk_rows):
+        yield ''.join(json.dumps(result) + '\n' for result in results[start:start + chunk_rows])
+
+
+def stream_csv(results, chunk_rows=1000):
+    """CSV with a header row, flushed every chunk_rows rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=OUTPUT_FIELDS)
+    writer.writeheader()
+    for start in range(0, len(results), chunk_rows):
+        writer.writerows(results[start:start + chunk_rows])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if not results:
+        yield buffer.getvalue()
+
+
+def read_batch_request(req):
+    """
+    Rows and output format ('csv' or 'ndjson') from a Flask request carrying
+    either a CSV upload in the 'file' field or a JSON body
+    """
+    upload = req.files.get('file')
+    if upload is not None:
+        rows = read_csv_rows(upload)
+        default_format = 'csv'
+    else:
+        payload = req.get_json(silent=True)
+        if payload is None:
+            raise BatchInputError("Send a JSON array of rows or upload a CSV file as 'file'")
+        rows = read_json_rows(payload)
+        default_format = 'ndjson'
+    output_format = (req.args.get('format') or default_format).lower()
+    if output_format not in ('csv', 'ndjson'):
+        raise BatchInputError("format must be 'csv' or 'ndjson'")
+    return rows, output_format
+
+
+def batch_response(results, output_format):
+    """Streamed CSV/NDJSON response with the row counts in X-Rows-* headers"""
+    summary = summarize(results)
+    headers = {'X-Rows-Total': str(summary['rows']), 'X-Rows-Scored': str(summary['scored']),
+               'X-Rows-Failed': str(summary['failed'])}
+    if output_format == 'csv':
+        headers['Content-Disposition'] = 'attachment; filename=yield_predictions.csv'
+        return Response(stream_csv(results), mimetype='text/csv', headers=headers)
+    return Response(stream_ndjson(results), mimetype='application/x-ndjson', headers=headers)
@@ -0,0 +1,113 @@
+"""
+Compiled categorical encoding for the crop yield model
+Replaces per-call LabelEncoder.transform with hash tables built once from the
+encoder classes. Keys are trimmed, whitespace-collapsed and case-folded, and
+common alternative names are accepted as aliases (the training data pads
+Season values, e.g. "Kharif     ", so raw user input would otherwise miss).
+Unknown values raise UnknownCategory with nearest-match suggestions.
+"""
+
+import difflib
+
+# Alternative spellings -> class label as it appears (after trimming) in the dataset
+ALIASES = {
+    'crop': {
+        'paddy': 'Rice', 'corn': 'Maize', 'sorghum': 'Jowar', 'pearl millet': 'Bajra',
+        'finger millet': 'Ragi', 'chickpea': 'Gram', 'bengal gram': 'Gram', 'lentil': 'Masoor',
+        'black gram': 'Urad', 'green gram': 'Moong(Green Gram)', 'moong': 'Moong(Green Gram)',
+        'arhar': 'Arhar/Tur', 'tur': 'Arhar/Tur', 'toor': 'Arhar/Tur', 'pigeon pea': 'Arhar/Tur',
+        'soybean': 'Soyabean', 'cotton': 'Cotton(lint)', 'cowpea': 'Cowpea(Lobia)',
+        'lobia': 'Cowpea(Lobia)', 'mustard': 'Rapeseed &Mustard', 'rapeseed': 'Rapeseed &Mustard',
+        'rapeseed & mustard': 'Rapeseed &Mustard', 'chilli': 'Dry chillies', 'chillies': 'Dry chillies',
+        'cassava': 'Tapioca', 'sesame': 'Sesamum', 'horse gram': 'Horse-gram', 'castor': 'Castor seed'
+    },
+    'season': {
+        'annual': 'Whole Year', 'year round': 'Whole Year', 'wholeyear': 'Whole Year',
+        'monsoon': 'Kharif', 'zaid': 'Summer'
+    },
+    'state': {
+        'orissa': 'Odisha', 'pondicherry': 'Puducherry', 'uttaranchal': 'Uttarakhand',
+        'chattisgarh': 'Chhattisgarh', 'j&k': 'Jammu and Kashmir', 'jammu & kashmir': 'Jammu and Kashmir',
+        'nct of delhi': 'Delhi', 'new delhi': 'Delhi', 'tamilnadu': 'Tamil Nadu', 'up': 'Uttar Pradesh',
+        'mp': 'Madhya Pradesh', 'wb': 'West Bengal'
+    }
+}
+
+
+def normalize(value):
+    """Trim, collapse inner whitespace and case-fold a category value"""
+    return ' '.join(str(value).split()).casefold()
+
+
+class UnknownCategory(ValueError):
+    """A value that matches no class or alias of a categorical field"""
+
+    def __init__(self, field, value, suggestions):
+        self.field = field
+        self.value = value
+        self.suggestions = suggestions
+        message = f"Unknown {field}: {value}"
+        if suggestions:
+            message += f" (did you mean: {', '.join(suggestions)}?)"
+        super().__init__(message)
+
+    def to_dict(self):
+        return {"field": self.field, "value": self.value, "suggestions": self.suggestions}
+
+
+class CategoryLookup:
+    """Normalized value -> encoder code table for one categorical field"""
+
+    def __init__(self, field, classes, aliases=None):
+        self.field = field
+        self.classes = list(classes)
+        self.labels = [' '.join(str(c).split()) for c in self.classes]  # Display form, padding removed
+        self.table = {normalize(c): code for code, c in enumerate(self.classes)}
+        self._suggestion_keys = {normalize(label): label for label in self.labels}
+        for alias, label in (aliases or {}).items():
+            code = self.table.get(normalize(label))
+            if code is not None:
+                self.table.setdefault(normalize(alias), code)
+
+    @classmethod
+    def from_encoder(cls, field, encoder, aliases=None):
+        """Compile a fitted LabelEncoder (codes are positions in encoder.classes_)"""
+        return cls(field, encoder.classes_, ALIASES.get(field) if aliases is None else aliases)
+
+    def suggest(self, value, limit=3):
+        """Closest class labels to value"""
+        matches = difflib.get_close_matches(normalize(value), list(self._suggestion_keys), n=limit, cutoff=0.6)
+        return [self._suggestion_keys[match] for match in matches]
+
+    def encode(self, value):
+        """Code for one value; raises UnknownCategory"""
+        code = self.table.get(normalize(value))
+        if code is None:
+            raise UnknownCategory(self.field, value, self.suggest(value))
+        return code
+
+    def label(self, code):
+        return self.labels[code]
+
+    def encode_array(self, values):
+        """
+        Codes for a sequence of values, looking up each distinct value once.
+        Returns (codes, known_mask); unknown values get code -1.
+        """
+        import numpy as np  # Imported on first use to keep app startup fast
+        if len(values) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty >= 0
+        distinct, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+        distinct_codes = np.array([self.table.get(normalize(v), -1) for v in distinct], dtype=np.int64)
+        codes = distinct_codes[inverse]
+        return codes, codes >= 0
+
+
+def compile_yield_lookups(crop_encoder, season_encoder, state_encoder):
+    """Lookups for the three categorical yield model inputs, keyed by field name"""
+    return {
+        'crop': CategoryLookup.from_encoder('crop', crop_encoder),
+        'season': CategoryLookup.from_encoder('season', season_encoder),
+        'state': CategoryLookup.from_encoder('state', state_encoder)
+    }
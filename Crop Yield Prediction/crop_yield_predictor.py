@@ -1,12 +1,16 @@
-import pandas as pd
+import os
+import sys
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import mean_squared_error
 import joblib
 
-# Load dataset
-df = pd.read_csv("data/crop_yield_dataset.csv")  # Replace with your filename
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataset_cache import load_dataset
+
+# Load dataset (columnar cache, rebuilt when the CSV changes)
+df = load_dataset("data/crop_yield_dataset.csv")  # Replace with your filename
 
 # Rename columns if needed
 df.columns = df.columns.str.strip().str.replace(" ", "_").str.lower()
@@ -1,15 +1,39 @@
+import time
 import streamlit as st
 import joblib
 import numpy as np
 
-# Load model and encoders
-model = joblib.load('yield_predictor_model.pkl')
-le_area = joblib.load('area_encoder.pkl')
-le_item = joblib.load('item_encoder.pkl')
-
 # Page config
 st.set_page_config(page_title="Crop Yield Predictor", page_icon="🌾", layout="centered")
 
+
+# Load model and encoders once per process; Streamlit reruns reuse the same objects
+@st.cache_resource(show_spinner="Loading model...")
+def load_artifacts():
+    start = time.perf_counter()
+    model = joblib.load('yield_predictor_model.pkl')
+    le_area = joblib.load('area_encoder.pkl')
+    le_item = joblib.load('item_encoder.pkl')
+    return {
+        "model": model,
+        "le_area": le_area,
+        "le_item": le_item,
+        # Label -> code lookups so a prediction does not go through LabelEncoder.transform
+        "area_codes": {label: code for code, label in enumerate(le_area.classes_)},
+        "item_codes": {label: code for code, label in enumerate(le_item.classes_)},
+        "loaded_at": time.strftime('%H:%M:%S'),
+        "load_ms": (time.perf_counter() - start) * 1000
+    }
+
+
+run_start = time.perf_counter()
+artifacts = load_artifacts()
+resource_ms = (time.perf_counter() - run_start) * 1000
+model = artifacts["model"]
+le_area = artifacts["le_area"]
+le_item = artifacts["le_item"]
+st.session_state.runs = st.session_state.get("runs", 0) + 1
+
 # Title
 st.title("🌾 Crop Yield Predictor")
 st.write("Predict agricultural crop yield (in hg/ha) using region and climate data.")
@@ -31,14 +55,36 @@ with st.form("input_form"):
 
     submitted = st.form_submit_button("Predict Yield")
 
-# Prediction
+# Prediction, memoized on the inputs for this session
+predict_ms = None
 if submitted:
-    try:
-        area_encoded = le_area.transform([area])[0]
-        item_encoded = le_item.transform([item])[0]
-        input_data = np.array([[area_encoded, item_encoded, rainfall, pesticide, temperature]])
-        prediction = model.predict(input_data)[0]
-
-        st.success(f"📦 Predicted Yield: {prediction:.2f} hg/ha")
-    except Exception as e:
-        st.error(f"Error: {e}")
+    inputs = (area, item, rainfall, pesticide, temperature)
+    last = st.session_state.get("last_prediction")
+    if last is None or last["inputs"] != inputs:
+        try:
+            start = time.perf_counter()
+            area_encoded = artifacts["area_codes"][area]
+            item_encoded = artifacts["item_codes"][item]
+            input_data = np.array([[area_encoded, item_encoded, rainfall, pesticide, temperature]])
+            prediction = model.predict(input_data)[0]
+            predict_ms = (time.perf_counter() - start) * 1000
+            st.session_state.last_prediction = {"inputs": inputs, "yield": float(prediction)}
+        except Exception as e:
+            st.session_state.pop("last_prediction", None)
+            st.error(f"Error: {e}")
+
+last = st.session_state.get("last_prediction")
+if last is not None:
+    st.success(f"📦 Predicted Yield: {last['yield']:.2f} hg/ha")
+    if not submitted:
+        st.caption(f"Last prediction for {last['inputs'][1]} in {last['inputs'][0]}")
+
+# Timing panel
+with st.expander("⏱️ Performance"):
+    st.write(f"Model and encoders loaded from disk once at {artifacts['loaded_at']} "
+             f"in {artifacts['load_ms']:.1f} ms")
+    st.write(f"This rerun (#{st.session_state.runs}): cached resource lookup {resource_ms:.2f} ms")
+    if predict_ms is not None:
+        st.write(f"Prediction computed in {predict_ms:.2f} ms")
+    elif submitted and last is not None:
+        st.write("Prediction served from session state (inputs unchanged)")
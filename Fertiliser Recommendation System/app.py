@@ -1,6 +1,6 @@
 
+import time
 import streamlit as st
-from model import predict_fertilizer
 
 # Page configuration
 st.set_page_config(
@@ -9,6 +9,25 @@ st.set_page_config(
     layout="centered"
 )
 
+
+# Load the model once per process; Streamlit reruns reuse the same predictor
+@st.cache_resource(show_spinner="Loading fertilizer model...")
+def load_predictor():
+    start = time.perf_counter()
+    import model  # reads saved_model/*.pkl
+    return {
+        "predictor": model.predictor,
+        "loaded_at": time.strftime('%H:%M:%S'),
+        "load_ms": (time.perf_counter() - start) * 1000
+    }
+
+
+run_start = time.perf_counter()
+resources = load_predictor()
+resource_ms = (time.perf_counter() - run_start) * 1000
+predictor = resources["predictor"]
+st.session_state.runs = st.session_state.get("runs", 0) + 1
+
 # Custom CSS styling for improved visuals
 st.markdown("""
     <style>
@@ -74,22 +93,44 @@ with st.form("fertilizer_form"):
 
     st.markdown('</div>', unsafe_allow_html=True)
 
-# Prediction logic
+# Prediction logic, memoized on the inputs for this session
+predict_ms = None
 if submitted:
-    try:
-        recommendation = predict_fertilizer(
-            temparature=temparature,
-            humidity=humidity,
-            moisture=moisture,
-            soil_type=soil_type,
-            crop_type=.crop_type,
-            nitrogen=nitrogen,
-            potassium=potassium,
-            phosphorous=phosphorous
-        )
-
-        st.success(f"✅ **Recommended Fertilizer:** {recommendation}")
-        st.balloons()
-    except Exception as e:
-        st.error(f"❌ An error occurred: {e}")
-        st.warning("Please check your input values and try again.")
+    inputs = (temparature, humidity, moisture, soil_type, crop_type, nitrogen, potassium, phosphorous)
+    last = st.session_state.get("last_recommendation")
+    if predictor is None:
+        st.error("❌ Model files not found. Please run the training script first.")
+    elif last is None or last["inputs"] != inputs:
+        try:
+            start = time.perf_counter()
+            recommendation = str(predictor.predict(
+                temparature=temparature,
+                humidity=humidity,
+                moisture=moisture,
+                soil_type=soil_type,
+                crop_type=crop_type,
+                nitrogen=nitrogen,
+                potassium=potassium,
+                phosphorous=phosphorous
+            ))
+            predict_ms = (time.perf_counter() - start) * 1000
+            st.session_state.last_recommendation = {"inputs": inputs, "fertilizer": recommendation}
+            st.balloons()
+        except Exception as e:
+            st.session_state.pop("last_recommendation", None)
+            st.error(f"❌ An error occurred: {e}")
+            st.warning("Please check your input values and try again.")
+
+last = st.session_state.get("last_recommendation")
+if last is not None:
+    st.success(f"✅ **Recommended Fertilizer:** {last['fertilizer']}")
+
+# Timing panel
+with st.expander("⏱️ Performance"):
+    st.write(f"Model and encoders loaded from disk once at {resources['loaded_at']} "
+             f"in {resources['load_ms']:.1f} ms")
+    st.write(f"This rerun (#{st.session_state.runs}): cached resource lookup {resource_ms:.2f} ms")
+    if predict_ms is not None:
+        st.write(f"Recommendation computed in {predict_ms:.2f} ms")
+    elif submitted and last is not None:
+        st.write("Recommendation served from session state (inputs unchanged)")
@@ -0,0 +1,56 @@
+# src/benchmark_predict.py
+# Per-row cost of the old DataFrame-based prediction vs. the compiled fast path
+# and the batch API. Run from the project root: python src/benchmark_predict.py
+
+import time
+import pandas as pd
+from model import (model, soil_encoder, crop_encoder, FEATURE_COLUMNS,
+                   decode_fertilizer, predict_fertilizer, predict_fertilizer_batch)
+
+
+def predict_fertilizer_dataframe(temparature, humidity, moisture, soil_type, crop_type, nitrogen, potassium, phosphorous):
+    """The previous implementation: one-row DataFrame plus two LabelEncoder.transform calls"""
+    soil_type_encoded = soil_encoder.transform([soil_type])[0]
+    crop_type_encoded = crop_encoder.transform([crop_type])[0]
+    input_data = pd.DataFrame([[
+        temparature, humidity, moisture,
+        soil_type_encoded, crop_type_encoded,
+        nitrogen, potassium, phosphorous
+    ]], columns=FEATURE_COLUMNS)
+    pred = model.predict(input_data)[0]
+    return decode_fertilizer(pred)
+
+
+def per_row_us(fn, rows, repeat=3):
+    """Best-of-repeat mean microseconds per row"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        elapsed = (time.perf_counter() - start) / len(rows) * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    if model is None:
+        raise SystemExit("Train the model first (python src/train.py)")
+
+    df = pd.read_csv('data/fertilizer_dataset.csv')
+    rows = [tuple(r) for r in df[FEATURE_COLUMNS].itertuples(index=False)]
+    sample = rows[:200]
+
+    legacy = [predict_fertilizer_dataframe(*row) for row in rows]
+    fast = [predict_fertilizer(*row) for row in rows]
+    batch = predict_fertilizer_batch(rows)
+    assert legacy == fast == batch, "Fast path disagrees with the DataFrame implementation"
+    print(f"[INFO] All three paths agree on {len(rows)} rows")
+
+    results = {
+        'dataframe (before)': per_row_us(lambda rs: [predict_fertilizer_dataframe(*r) for r in rs], sample),
+        'compiled single-row': per_row_us(lambda rs: [predict_fertilizer(*r) for r in rs], sample),
+        f'batch ({len(rows)} rows)': per_row_us(predict_fertilizer_batch, rows),
+    }
+    baseline = results['dataframe (before)']
+    for name, us in results.items():
+        print(f"{name:24} {us:10.1f} us/row   {baseline / us:6.1f}x")
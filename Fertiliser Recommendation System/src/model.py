@@ -1,5 +1,13 @@
+import threading
 import joblib
-import pandas as pd
+import numpy as np
+
+# Training feature order (the dataset header spells 'Humidity ' with a trailing space)
+FEATURE_COLUMNS = [
+    'Temparature', 'Humidity ', 'Moisture',
+    'Soil Type', 'Crop Type',
+    'Nitrogen', 'Potassium', 'Phosphorous'
+]
 
 try:
     model = joblib.load('saved_model/fertilizer_model.pkl')
@@ -15,30 +23,104 @@ except FileNotFoundError:
     crop_encoder = None
     fertilizer_encoder = None
 
+
+class CompiledFertilizerPredictor:
+    """
+    Fast path around the trained RandomForest: soil/crop names map through
+    dicts built once from the encoders, rows are written into a reusable
+    float32 buffer and the trees are evaluated directly, skipping the
+    per-call DataFrame construction and sklearn input validation.
+    Predictions are identical to model.predict on the same rows.
+    """
+
+    def __init__(self, model, soil_encoder, crop_encoder, fertilizer_encoder):
+        self.model = model
+        self.soil_codes = {label: code for code, label in enumerate(soil_encoder.classes_)}
+        self.crop_codes = {label: code for code, label in enumerate(crop_encoder.classes_)}
+        # Fertilizer name for each predict_proba column
+        self.labels = np.asarray(fertilizer_encoder.classes_)[np.asarray(model.classes_, dtype=np.intp)]
+        self.trees = [estimator.tree_ for estimator in getattr(model, 'estimators_', [])]
+        self._local = threading.local()
+
+    def _buffer(self):
+        """One-row input buffer, reused per thread"""
+        buffer = getattr(self._local, 'row', None)
+        if buffer is None:
+            buffer = self._local.row = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float32)
+        return buffer
+
+    def encode(self, codes, value, field):
+        try:
+            return codes[value]
+        except KeyError:
+            raise ValueError(f"Unknown {field}: {value}. Expected one of: {', '.join(codes)}") from None
+
+    def _predict_codes(self, X):
+        """Class indices for a float32 C-contiguous matrix in FEATURE_COLUMNS order"""
+        if not self.trees:
+            # Not a forest - fall back to the estimator itself
+            import pandas as pd
+            return np.searchsorted(self.model.classes_, self.model.predict(pd.DataFrame(X, columns=FEATURE_COLUMNS)))
+        # Same accumulation as RandomForestClassifier.predict_proba
+        proba = np.zeros((X.shape[0], len(self.labels)))
+        for tree in self.trees:
+            value = tree.predict(X)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba += value / normalizer
+        return np.argmax(proba, axis=1)
+
+    def predict(self, temparature, humidity, moisture, soil_type, crop_type, nitrogen, potassium, phosphorous):
+        row = self._buffer()
+        values = row[0]
+        values[0] = temparature
+        values[1] = humidity
+        values[2] = moisture
+        values[3] = self.encode(self.soil_codes, soil_type, 'soil type')
+        values[4] = self.encode(self.crop_codes, crop_type, 'crop type')
+        values[5] = nitrogen
+        values[6] = potassium
+        values[7] = phosphorous
+        return self.labels[self._predict_codes(row)[0]]
+
+    def predict_batch(self, rows):
+        """
+        rows: a DataFrame with FEATURE_COLUMNS, or a sequence of
+        (temparature, humidity, moisture, soil_type, crop_type, nitrogen, potassium, phosphorous)
+        """
+        if hasattr(rows, 'columns'):
+            rows = rows[FEATURE_COLUMNS].to_numpy(dtype=object)
+        rows = np.asarray(rows, dtype=object)
+        if rows.ndim != 2 or rows.shape[1] != len(FEATURE_COLUMNS):
+            raise ValueError(f"Expected rows of {len(FEATURE_COLUMNS)} values")
+        X = np.empty(rows.shape, dtype=np.float32)
+        numeric = [0, 1, 2, 5, 6, 7]
+        X[:, numeric] = rows[:, numeric].astype(np.float32)
+        for column, codes, field in ((3, self.soil_codes, 'soil type'), (4, self.crop_codes, 'crop type')):
+            # Look up each distinct name once
+            distinct, inverse = np.unique(rows[:, column].astype(str), return_inverse=True)
+            X[:, column] = np.array([self.encode(codes, value, field) for value in distinct])[inverse.reshape(-1)]
+        return self.labels[self._predict_codes(X)].tolist()
+
+
+predictor = (CompiledFertilizerPredictor(model, soil_encoder, crop_encoder, fertilizer_encoder)
+             if model is not None else None)
+
+
 def decode_fertilizer(encoded_label):
     if fertilizer_encoder is not None:
         return fertilizer_encoder.inverse_transform([encoded_label])[0]
     return "Unknown"
 
 def predict_fertilizer(temparature, humidity, moisture, soil_type, crop_type, nitrogen, potassium, phosphorous):
-    if model is None or soil_encoder is None or crop_encoder is None:
+    if predictor is None or soil_encoder is None or crop_encoder is None:
         return "Error: Model not loaded."
 
-    # Encode categorical inputs
-    soil_type_encoded = soil_encoder.transform([soil_type])[0]
-    crop_type_encoded = crop_encoder.transform([crop_type])[0]
-
-    # Create input data matching training feature names exactly
-    input_data = pd.DataFrame([[
-        temparature, humidity, moisture,
-        soil_type_encoded, crop_type_encoded,
-        nitrogen, potassium, phosphorous
-    ]], columns=[
-        'Temparature', 'Humidity ', 'Moisture',
-        'Soil Type', 'Crop Type',
-        'Nitrogen', 'Potassium', 'Phosphorous'
-    ])
-
-    # Predict and decode fertilizer name
-    pred = model.predict(input_data)[0]
-    return decode_fertilizer(pred)
+    return str(predictor.predict(temparature, humidity, moisture, soil_type, crop_type,
+                                 nitrogen, potassium, phosphorous))
+
+def predict_fertilizer_batch(rows):
+    """Recommend a fertilizer for every row in one call (see CompiledFertilizerPredictor.predict_batch)"""
+    if predictor is None:
+        raise RuntimeError("Model not loaded. Please run the training script first.")
+    return predictor.predict_batch(rows)
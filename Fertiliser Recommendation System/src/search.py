@@ -0,0 +1,189 @@
+# src/search.py
+# Budgeted RandomForest hyperparameter search backed by a persistent trial store.
+# Every (params, fold, data hash) score is appended to a JSON-lines file, so a
+# re-run on unchanged data only fits configurations it has not scored before,
+# and the best configuration can be read back without searching again.
+
+import os
+import json
+import math
+import time
+import random
+import hashlib
+import itertools
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+
+
+def data_hash(X, y, n_splits):
+    """Fingerprint of the training data and fold layout; trials are only reused under the same hash"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c) for c in X.columns], n_splits]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def expand_grid(param_grid):
+    """All combinations of a GridSearchCV-style grid, in a stable order"""
+    names = sorted(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(param_grid[n] for n in names))]
+
+
+class TrialStore:
+    """Append-only JSON-lines file of cross-validation fold scores"""
+
+    def __init__(self, path):
+        self.path = path
+        self.scores = {}  # (data hash, params key, fold) -> accuracy
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        trial = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted run
+                    self.scores[(trial['data'], params_key(trial['params']), trial['fold'])] = trial['score']
+
+    def get(self, digest, params, fold):
+        return self.scores.get((digest, params_key(params), fold))
+
+    def put(self, digest, params, fold, score, seconds):
+        self.scores[(digest, params_key(params), fold)] = score
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({"data": digest, "params": params, "fold": fold,
+                                "score": score, "seconds": round(seconds, 3)}) + '\n')
+
+    def fold_scores(self, digest):
+        """params key -> {fold: score} for one dataset"""
+        by_params = {}
+        for (trial_digest, key, fold), score in self.scores.items():
+            if trial_digest == digest:
+                by_params.setdefault(key, {})[fold] = score
+        return by_params
+
+    def best(self, digest, n_splits):
+        """(params, mean CV score) of the best configuration scored on every fold, or (None, None)"""
+        complete = [(sum(folds.values()) / n_splits, key)
+                    for key, folds in self.fold_scores(digest).items() if len(folds) == n_splits]
+        if not complete:
+            return None, None
+        # Highest score wins; ties go to the smallest key so the choice is stable
+        score, key = min(complete, key=lambda item: (-item[0], item[1]))
+        return json.loads(key), score
+
+
+def _fit_fold(params, X, y, train_index, test_index, random_state):
+    start = time.perf_counter()
+    clf = RandomForestClassifier(random_state=random_state, **params)
+    clf.fit(X.iloc[train_index], y.iloc[train_index])
+    score = clf.score(X.iloc[test_index], y.iloc[test_index])
+    return score, time.perf_counter() - start
+
+
+class BudgetedSearch:
+    """
+    Cross-validated RandomForest search under a wall-clock budget.
+
+    mode='grid' scores every candidate on every fold, 'random' scores a random
+    sample of the grid, and 'halving' runs successive halving with CV folds as
+    the resource: all candidates are scored on one fold, the best 1/eta move on
+    to eta folds, and so on until the survivors are scored on all folds.
+    Scores already in the store are reused instead of refitted.
+    """
+
+    def __init__(self, param_grid, store, mode='halving', n_splits=5, budget_seconds=None,
+                 n_candidates=None, eta=3, n_jobs=-1, random_state=42):
+        if mode not in ('grid', 'random', 'halving'):
+            raise ValueError(f"Unknown search mode: {mode}")
+        self.param_grid = param_grid
+        self.store = store
+        self.mode = mode
+        self.n_splits = n_splits
+        self.budget_seconds = budget_seconds
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def candidates(self):
+        grid = expand_grid(self.param_grid)
+        if self.mode == 'grid' or not self.n_candidates or self.n_candidates >= len(grid):
+            return grid
+        return random.Random(self.random_state).sample(grid, self.n_candidates)
+
+    def _out_of_time(self):
+        return self.budget_seconds is not None and time.perf_counter() - self._start > self.budget_seconds
+
+    def _score(self, candidates, n_folds):
+        """Make sure every candidate is scored on its first n_folds folds, within the budget"""
+        missing = [(params, fold) for params in candidates for fold in range(n_folds)
+                   if self.store.get(self.digest, params, fold) is None]
+        # Only trials loaded from the store count as reused - not folds fitted earlier
+        # in this run, and not the same fold again in a later halving round
+        self._reused.update(key for key in ((self.digest, params_key(params), fold)
+                                            for params in candidates for fold in range(n_folds))
+                            if key in self._preloaded)
+        self.reused = len(self._reused)
+        batch = effective_n_jobs(self.n_jobs)
+        with Parallel(n_jobs=self.n_jobs) as parallel:
+            for i in range(0, len(missing), batch):
+                if self._out_of_time():
+                    self.timed_out = True
+                    return
+                chunk = missing[i:i + batch]
+                results = parallel(
+                    delayed(_fit_fold)(params, self.X, self.y, *self.folds[fold], self.random_state)
+                    for params, fold in chunk
+                )
+                for (params, fold), (score, seconds) in zip(chunk, results):
+                    self.store.put(self.digest, params, fold, score, seconds)
+                    self.fitted += 1
+
+    def _mean_score(self, params):
+        """Mean over the folds scored so far, and how many there are"""
+        scores = [self.store.get(self.digest, params, fold) for fold in range(self.n_splits)]
+        scores = [s for s in scores if s is not None]
+        return (sum(scores) / len(scores) if scores else float('-inf')), len(scores)
+
+    def fit(self, X, y):
+        self._start = time.perf_counter()
+        self.X, self.y = X, y
+        self.digest = data_hash(X, y, self.n_splits)
+        self.folds = list(StratifiedKFold(n_splits=self.n_splits).split(X, y))
+        self.fitted = self.reused = 0
+        self._preloaded = set(self.store.scores)
+        self._reused = set()
+        self.timed_out = False
+
+        candidates = self.candidates()
+        if self.mode == 'halving':
+            n_folds = 1
+            while True:
+                self._score(candidates, n_folds)
+                if n_folds == self.n_splits or self.timed_out:
+                    break
+                ranked = sorted(candidates, key=lambda p: -self._mean_score(p)[0])
+                candidates = ranked[:max(1, math.ceil(len(ranked) / self.eta))]
+                n_folds = min(self.n_splits, n_folds * self.eta)
+        else:
+            self._score(candidates, self.n_splits)
+
+        # Prefer configurations scored on the most folds, then the best mean, then the smallest key
+        def rank(params):
+            score, n_folds = self._mean_score(params)
+            return -n_folds, -score, params_key(params)
+        best = min(candidates, key=rank)
+        self.best_params_ = best
+        self.best_score_, self.best_folds_ = self._mean_score(best)
+        self.elapsed_ = time.perf_counter() - self._start
+        return self
@@ -1,15 +1,32 @@
 # src/train.py
 
-import pandas as pd
+import argparse
+import sys
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 import joblib
 import os
 from utils import encode_features, soil_encoder, crop_encoder, fertilizer_encoder
+from search import BudgetedSearch, TrialStore, data_hash
 
-# Load dataset
-df = pd.read_csv('../data/fertilizer_dataset.csv')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from dataset_cache import load_dataset
+
+parser = argparse.ArgumentParser(description="Train the fertilizer recommendation model")
+parser.add_argument('--search', choices=['halving', 'random', 'grid'], default='halving',
+                    help="halving: successive halving over CV folds (default), random: random sample "
+                         "of the grid, grid: every combination")
+parser.add_argument('--budget', type=float, default=600, help="Wall-clock search budget in seconds (0 = unlimited)")
+parser.add_argument('--candidates', type=int, default=None,
+                    help="Configurations sampled from the grid for halving/random (default: all)")
+parser.add_argument('--from-store', action='store_true',
+                    help="Skip the search and refit the best configuration recorded in the trial store")
+parser.add_argument('--store', default='../saved_model/search_trials.jsonl', help="Trial store path")
+args = parser.parse_args()
+
+# Load dataset (columnar cache, rebuilt when the CSV changes)
+df = load_dataset('../data/fertilizer_dataset.csv')
 
 # Encode categorical variables
 df, soil_encoder, crop_encoder, fertilizer_encoder = encode_features(df)
@@ -29,12 +46,27 @@ param_grid = {
     'min_samples_leaf': [1, 2, 4]
 }
 
-rf = RandomForestClassifier(random_state=42)
-grid_search = GridSearchCV(estimator=rf, param_grid=param_grid, cv=5, n_jobs=-1, verbose=2)
-grid_search.fit(X_train, y_train)
+CV_FOLDS = 5
+store = TrialStore(args.store)
+
+if args.from_store:
+    best_params, best_score = store.best(data_hash(X_train, y_train, CV_FOLDS), CV_FOLDS)
+    if best_params is None:
+        raise SystemExit("[ERROR] No complete trials for this dataset in the store. Run a search first.")
+    print(f"[INFO] Best configuration from {args.store}: {best_params} (CV accuracy {best_score:.4f})")
+else:
+    search = BudgetedSearch(param_grid, store, mode=args.search, n_splits=CV_FOLDS,
+                            budget_seconds=args.budget or None, n_candidates=args.candidates)
+    search.fit(X_train, y_train)
+    print(f"[INFO] {args.search} search: {search.fitted} fold fits, {search.reused} reused from the store, "
+          f"{search.elapsed_:.1f}s" + (" (budget reached)" if search.timed_out else ""))
+    best_params, best_score = search.best_params_, search.best_score_
+    print(f"[INFO] Best configuration: {best_params} "
+          f"(CV accuracy {best_score:.4f} over {search.best_folds_}/{CV_FOLDS} folds)")
 
-# Best model
-best_clf = grid_search.best_estimator_
+# Best model, refitted on the full training split
+best_clf = RandomForestClassifier(random_state=42, **best_params)
+best_clf.fit(X_train, y_train)
 
 # Evaluate model
 y_pred = best_clf.predict(X_test)
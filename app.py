@@ -1,20 +1,36 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context
 import traceback
 import os
 import re
+import sys
+import time
 from flask_cors import CORS
 from dotenv import load_dotenv
-import joblib
-import numpy as np
-import requests
 import json
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-# from flask_talisman import Talisman  # Disabled - causes CSP issues
 
-# Load environment variables
+# Load environment variables before the local modules below read their settings
 load_dotenv()
 
+import ollama_client
+from result_cache import TTLCache, quantize
+from ollama_registry import registry, format_model_version
+from job_queue import JobQueue, QueueFull, DONE, FAILED, CANCELLED, FINISHED_STATES
+from image_pipeline import normalize_image, ImageRejected
+from disease_cache import DiseaseResultCache, content_hash, perceptual_hash
+from disease_classifier import classifier
+from model_registry import models, load_pickle
+# Batch yield scoring lives with the standalone yield app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Crop Yield Prediction', 'crop_yield_app'))
+from batch_predict import BatchInputError, read_batch_request, score_rows, batch_response
+from category_lookup import CategoryLookup, UnknownCategory
+# PDF report rendering and caching are shared with the crop recommendation app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Crop Recommendation'))
+from pdf_reports import ReportCache, stream_reports_zip, BULK_MAX_REPORTS
+from ollama_client import OLLAMA_BASE_URL, OllamaError, OllamaTimeout, OllamaConnectionError, OllamaBusy, OllamaResponseError
+# from flask_talisman import Talisman  # Disabled - causes CSP issues
+
 app = Flask(__name__, static_folder='.', static_url_path='')
 CORS(app, resources={r"/*": {"origins": ["http://127.0.0.1:5500", "http://localhost:5500", "http://127.0.0.1:5001", "http://localhost:5001"]}})
 
@@ -62,49 +78,68 @@ def validate_input(data):
     
     return True, "Valid input"
 
-# Initialize Ollama Configuration
-OLLAMA_BASE_URL = "http://localhost:11434"
+# Initialize Ollama Configuration (base URL and HTTP session live in ollama_client)
 OLLAMA_MODEL = "llama3.1:latest"  # Default to available model
 
-def test_ollama_connection():
-    """Test if Ollama is running and accessible"""
-    try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            available_models = [model['name'] for model in models]
-            print(f"✅ Ollama connected successfully. Available models: {available_models}")
-            
-            # Set the best available text model (NOT vision model)
-            global OLLAMA_MODEL
-            if "llama3.2:1b" in available_models:
-                OLLAMA_MODEL = "llama3.2:1b"
-                print(f"🚀 Using fast model: {OLLAMA_MODEL}")
-            elif "llama3.2:latest" in available_models:
-                OLLAMA_MODEL = "llama3.2:latest"
-                print(f"🚀 Using model: {OLLAMA_MODEL}")
-            elif "llama3.1:latest" in available_models:
-                OLLAMA_MODEL = "llama3.1:latest"
-                print(f"📝 Using model: {OLLAMA_MODEL}")
-            elif "llama3:latest" in available_models:
-                OLLAMA_MODEL = "llama3:latest"
-                print(f"🐌 Using standard model: {OLLAMA_MODEL}")
-            else:
-                # Find first non-vision model
-                text_models = [m for m in available_models if 'vision' not in m.lower()]
-                OLLAMA_MODEL = text_models[0] if text_models else available_models[0]
-                print(f"📝 Using available model: {OLLAMA_MODEL}")
-            
-            return True
-        else:
-            print(f"❌ Ollama connection failed with status: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Ollama connection error: {e}")
-        return False
-
-# Test Ollama connection on startup
-test_ollama_connection()
+def ollama_error_message(error, **messages):
+    """
+    Pick the user-facing message for an OllamaError.
+    Routes may override the message per error type, e.g. timeout="..."
+    """
+    if isinstance(error, OllamaTimeout):
+        message = messages.get('timeout', error.user_message)
+    elif isinstance(error, OllamaConnectionError):
+        message = messages.get('connection', error.user_message)
+    elif isinstance(error, OllamaBusy):
+        message = messages.get('busy', error.user_message)
+    else:
+        message = messages.get('default', error.user_message)
+    if isinstance(error, (OllamaConnectionError, OllamaResponseError)):
+        # Ollama went away or a model vanished - re-check availability now
+        registry.request_refresh()
+    print(f"❌ Ollama error ({type(error).__name__}): {error}")
+    return message
+
+def ollama_error_response(error, **messages):
+    """Build the JSON error reply for an OllamaError (see ollama_error_message)"""
+    message = ollama_error_message(error, **messages)
+    return jsonify({"status": "error", "message": message}), error.status_code
+
+def select_text_model(available_models):
+    """Pick the best available text model (NOT vision model)"""
+    if "llama3.2:1b" in available_models:
+        return "llama3.2:1b", "🚀 Using fast model"
+    elif "llama3.2:latest" in available_models:
+        return "llama3.2:latest", "🚀 Using model"
+    elif "llama3.1:latest" in available_models:
+        return "llama3.1:latest", "📝 Using model"
+    elif "llama3:latest" in available_models:
+        return "llama3:latest", "🐌 Using standard model"
+    # Find first non-vision model
+    text_models = [m for m in available_models if 'vision' not in m.lower()]
+    return (text_models[0] if text_models else available_models[0]), "📝 Using available model"
+
+def on_models_refreshed(snapshot):
+    """Registry listener: keep OLLAMA_MODEL tracking the live model list"""
+    global OLLAMA_MODEL, OLLAMA_READY_AT
+    available_models = list(snapshot['installed'])
+    if OLLAMA_READY_AT is None:
+        OLLAMA_READY_AT = time.time()
+        print(f"✅ Ollama connected {OLLAMA_READY_AT - STARTED_AT:.1f}s after startup. Available models: {available_models}")
+    if not available_models:
+        return
+    model, label = select_text_model(available_models)
+    if model != OLLAMA_MODEL:
+        OLLAMA_MODEL = model
+        print(f"{label}: {OLLAMA_MODEL}")
+
+registry.on_refresh(on_models_refreshed)
+
+# Probe Ollama on the registry's background thread (retrying with backoff),
+# so importing the app never waits on the network
+STARTED_AT = time.time()
+OLLAMA_READY_AT = None
+registry.start()
 
 
 @app.route('/', methods=['GET', 'POST'])
@@ -142,21 +177,56 @@ def static_files(filename):
 
 @app.route('/api/ollama-status')
 def get_ollama_status():
-    """Check Ollama connection status"""
-    try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            return jsonify({
-                'status': 'connected',
-                'base_url': OLLAMA_BASE_URL,
-                'current_model': OLLAMA_MODEL,
-                'available_models': [model['name'] for model in models]
-            })
-        else:
-            return jsonify({'status': 'error', 'message': 'Ollama not responding'}), 500
-    except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+    """Check Ollama connection status (served from the background model registry)"""
+    models = registry.status()
+    if not models['healthy']:
+        return jsonify({'status': 'error', 'message': models['error'] or 'Ollama not responding'}), 500
+    return jsonify({
+        'status': 'connected',
+        'base_url': OLLAMA_BASE_URL,
+        'current_model': OLLAMA_MODEL,
+        'available_models': [model['name'] for model in models['installed_models']],
+        'installed_models': models['installed_models'],
+        'loaded_models': models['loaded_models'],
+        'refreshed_seconds_ago': models['refreshed_seconds_ago']
+    })
+
+
+@app.route('/api/health')
+@limiter.exempt
+def health():
+    """Liveness: the web server is up and serving (no AI backend check)"""
+    return jsonify({'status': 'serving', 'uptime_seconds': round(time.time() - STARTED_AT, 1)})
+
+
+@app.route('/api/ready')
+@limiter.exempt
+def readiness():
+    """Readiness: 200 once Ollama answers and the selected text model is installed, 503 before"""
+    snapshot = registry.snapshot()
+    ai_ready = snapshot['healthy'] and OLLAMA_MODEL in snapshot['installed']
+    return jsonify({
+        'status': 'ready' if ai_ready else 'starting',
+        'serving': True,
+        'ai_backend_ready': ai_ready,
+        'ollama_reachable': snapshot['healthy'],
+        'current_model': OLLAMA_MODEL,
+        'ollama_error': snapshot['error'],
+        'ollama_ready_after_seconds': round(OLLAMA_READY_AT - STARTED_AT, 1) if OLLAMA_READY_AT else None,
+        'local_models_loaded': [m['name'] for m in models.listing() if m['loaded']]
+    }), 200 if ai_ready else 503
+
+
+@app.route('/api/cache-stats')
+def get_cache_stats():
+    """Report size and hit/miss counters of the AI result caches"""
+    return jsonify({
+        'status': 'success',
+        'caches': [crop_cache.stats(), disease_cache.stats(), report_cache.stats()],
+        'single_flight': ollama_client.generations.stats(),
+        'jobs': [disease_jobs.stats()],
+        'batching': [classifier.batcher.stats()]
+    })
 
 
 @app.route('/api/firebase-config')
@@ -173,23 +243,54 @@ def get_firebase_config():
     })
 
 
-@app.route('/predict', methods=['POST'])
-def predict_crop():
-    """Handle crop recommendation prediction using Llama3 AI"""
-    try:
-        # Get form data
-        N = float(request.form.get('N', 0))
-        P = float(request.form.get('P', 0))
-        K = float(request.form.get('K', 0))
-        temperature = float(request.form.get('temperature', 0))
-        humidity = float(request.form.get('humidity', 0))
-        ph = float(request.form.get('ph', 0))
-        rainfall = float(request.form.get('rainfall', 0))
-        
-        # Create SHORTER agricultural expert prompt for faster response
-        prompt = f"""You are an agricultural expert. Recommend ONE crop for these conditions:
+# Generation options for /predict - OPTIMIZED for speed
+CROP_PREDICT_OPTIONS = {
+    "temperature": 0.3,
+    "top_p": 0.9,
+    "num_predict": 200,  # Reduced from 400 for faster response
+    "num_ctx": 1024,     # Reduced from 2048 for faster processing
+}
+
+# Result cache for /predict. Near-identical soil tests from one district map to
+# the same bucket, so they share one Llama3 answer instead of a fresh generation.
+CROP_CACHE_BUCKETS = {
+    "N": 5,             # kg/ha
+    "P": 5,             # kg/ha
+    "K": 5,             # kg/ha
+    "temperature": 1,   # °C
+    "humidity": 5,      # %
+    "ph": 0.2,
+    "rainfall": 10      # mm
+}
+crop_cache = TTLCache(
+    'crop_recommendation',
+    maxsize=int(os.environ.get('CROP_CACHE_SIZE', 1024)),
+    ttl=int(os.environ.get('CROP_CACHE_TTL', 6 * 3600)),
+    persist_path=os.environ.get('CROP_CACHE_PATH') or None
+)
 
-N:{N} P:{P} K:{K} pH:{ph} Temp:{temperature}°C Humidity:{humidity}% Rain:{rainfall}mm
+def crop_cache_key(params, model):
+    """Cache key from the bucketed soil/climate inputs plus the model name"""
+    buckets = [f"{name}={quantize(params[name], step)}" for name, step in CROP_CACHE_BUCKETS.items()]
+    return f"{model}|{'|'.join(buckets)}"
+
+def read_crop_params(form):
+    """Read the soil/climate parameters of a /predict form as floats"""
+    return {
+        "N": float(form.get('N', 0)),
+        "P": float(form.get('P', 0)),
+        "K": float(form.get('K', 0)),
+        "temperature": float(form.get('temperature', 0)),
+        "humidity": float(form.get('humidity', 0)),
+        "ph": float(form.get('ph', 0)),
+        "rainfall": float(form.get('rainfall', 0))
+    }
+
+def build_crop_prompt(params):
+    """Create SHORTER agricultural expert prompt for faster response"""
+    return f"""You are an agricultural expert. Recommend ONE crop for these conditions:
+
+N:{params['N']} P:{params['P']} K:{params['K']} pH:{params['ph']} Temp:{params['temperature']}°C Humidity:{params['humidity']}% Rain:{params['rainfall']}mm
 
 Respond in this EXACT format:
 CROP: [name]
@@ -201,89 +302,146 @@ TIPS:
 
 Common crops: rice, wheat, maize, cotton, sugarcane, potato, tomato, banana, mango, grapes"""
 
-        print(f"Calling Ollama with Llama3 for crop recommendation...")
-        print(f"Using model: {OLLAMA_MODEL}")
-        
-        # Call Ollama API with Llama3 - OPTIMIZED for speed
-        ollama_payload = {
-            "model": OLLAMA_MODEL,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.3,
-                "top_p": 0.9,
-                "num_predict": 200,  # Reduced from 400 for faster response
-                "num_ctx": 1024,     # Reduced from 2048 for faster processing
-            }
-        }
-        
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json=ollama_payload,
-            timeout=180  # Increased to 3 minutes
-        )
+def parse_crop_recommendation(ai_response):
+    """Parse the CROP/REASON/YIELD/TIPS fields out of a Llama3 recommendation"""
+    crop_name = "Unknown"
+    reason = "Analysis completed"
+    yield_potential = "Medium"
+    tips = []
+    
+    lines = ai_response.split('\n')
+    for i, line in enumerate(lines):
+        line_upper = line.upper()
+        if 'CROP:' in line_upper:
+            crop_name = line.split(':', 1)[1].strip().lower() if ':' in line else "Unknown"
+        elif 'REASON:' in line_upper:
+            reason = line.split(':', 1)[1].strip() if ':' in line else "Analysis completed"
+        elif 'YIELD:' in line_upper:
+            yield_potential = line.split(':', 1)[1].strip() if ':' in line else "Medium"
+        elif 'TIPS:' in line_upper or line.strip().startswith('-'):
+            # Collect tips from following lines
+            if line.strip().startswith('-'):
+                tips.append(line.strip()[1:].strip())
+            else:
+                for j in range(i+1, min(i+4, len(lines))):
+                    if lines[j].strip().startswith('-'):
+                        tips.append(lines[j].strip()[1:].strip())
+    
+    return {
+        "crop": crop_name,
+        "reason": reason,
+        "yield_potential": yield_potential,
+        "tips": tips if tips else ["Follow standard agricultural practices", "Monitor soil health regularly"]
+    }
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events):
+    """Wrap an event generator in an unbuffered text/event-stream response"""
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop nginx from holding tokens back
+    })
+
+
+@app.route('/predict', methods=['POST'])
+def predict_crop():
+    """Handle crop recommendation prediction using Llama3 AI"""
+    try:
+        # Get form data
+        params = read_crop_params(request.form)
+        prompt = build_crop_prompt(params)
+
+        cache_key = crop_cache_key(params, OLLAMA_MODEL)
+        ai_response = crop_cache.get(cache_key)
+        cached = ai_response is not None
         
-        if response.status_code == 200:
-            ollama_response = response.json()
-            ai_response = ollama_response.get('response', '')
-            
-            print(f"✅ Llama3 Response: {ai_response}")
+        if cached:
+            print(f"⚡ Crop recommendation cache hit: {cache_key}")
+        else:
+            print(f"Calling Ollama with Llama3 for crop recommendation...")
+            print(f"Using model: {OLLAMA_MODEL}")
             
-            # Parse the response
-            crop_name = "Unknown"
-            reason = "Analysis completed"
-            yield_potential = "Medium"
-            tips = []
+            ollama_response = ollama_client.generate(OLLAMA_MODEL, prompt, CROP_PREDICT_OPTIONS, route='predict')
             
-            lines = ai_response.split('\n')
-            for i, line in enumerate(lines):
-                line_upper = line.upper()
-                if 'CROP:' in line_upper:
-                    crop_name = line.split(':', 1)[1].strip().lower() if ':' in line else "Unknown"
-                elif 'REASON:' in line_upper:
-                    reason = line.split(':', 1)[1].strip() if ':' in line else "Analysis completed"
-                elif 'YIELD:' in line_upper:
-                    yield_potential = line.split(':', 1)[1].strip() if ':' in line else "Medium"
-                elif 'TIPS:' in line_upper or line.strip().startswith('-'):
-                    # Collect tips from following lines
-                    if line.strip().startswith('-'):
-                        tips.append(line.strip()[1:].strip())
-                    else:
-                        for j in range(i+1, min(i+4, len(lines))):
-                            if lines[j].strip().startswith('-'):
-                                tips.append(lines[j].strip()[1:].strip())
+            ai_response = ollama_response.get('response', '')
+            crop_cache.put(cache_key, ai_response)
             
-            return jsonify({
-                "status": "success",
-                "crop": crop_name,
-                "reason": reason,
-                "yield_potential": yield_potential,
-                "tips": tips if tips else ["Follow standard agricultural practices", "Monitor soil health regularly"],
-                "full_analysis": ai_response,
-                "input_params": {
-                    "N": N,
-                    "P": P,
-                    "K": K,
-                    "temperature": temperature,
-                    "humidity": humidity,
-                    "ph": ph,
-                    "rainfall": rainfall
-                },
-                "model": OLLAMA_MODEL
-            }), 200
-        else:
-            print(f"Ollama API error: {response.status_code}")
-            return jsonify({"status": "error", "message": "AI service temporarily unavailable"}), 500
+            print(f"✅ Llama3 Response: {ai_response}")
         
-    except requests.exceptions.Timeout:
-        print("Ollama request timeout")
-        return jsonify({"status": "error", "message": "AI service timeout - Ollama is slow. Please wait and try again, or restart Ollama."}), 500
+        return jsonify({
+            "status": "success",
+            **parse_crop_recommendation(ai_response),
+            "full_analysis": ai_response,
+            "input_params": params,
+            "model": OLLAMA_MODEL,
+            "cached": cached
+        }), 200
+
+    except OllamaError as e:
+        return ollama_error_response(e, timeout="AI service timeout - Ollama is slow. Please wait and try again, or restart Ollama.")
     except Exception as e:
         print(f"Crop prediction error: {e}")
         traceback.print_exc()
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route('/predict/stream', methods=['POST'])
+def predict_crop_stream():
+    """
+    Stream a crop recommendation as Server-Sent Events.
+    Emits one 'token' event per generated token and a final 'done' event
+    carrying the parsed CROP/REASON/YIELD/TIPS fields.
+    """
+    try:
+        params = read_crop_params(request.form)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    prompt = build_crop_prompt(params)
+    model = OLLAMA_MODEL
+    cache_key = crop_cache_key(params, model)
+
+    def done_event(ai_response, cached):
+        return sse_event('done', {
+            "status": "success",
+            **parse_crop_recommendation(ai_response),
+            "full_analysis": ai_response,
+            "input_params": params,
+            "model": model,
+            "cached": cached
+        })
+
+    cached_response = crop_cache.get(cache_key)
+    if cached_response is not None:
+        # Replay the cached answer as a single token so clients need no special case
+        return sse_response(iter([
+            sse_event('token', {"token": cached_response}),
+            done_event(cached_response, True)
+        ]))
+
+    def events():
+        chunks = ollama_client.generate_stream(model, prompt, CROP_PREDICT_OPTIONS, route='predict')
+        tokens = []
+        try:
+            for chunk in chunks:
+                token = chunk.get('response', '')
+                if token:
+                    tokens.append(token)
+                    yield sse_event('token', {"token": token})
+            ai_response = ''.join(tokens)
+            crop_cache.put(cache_key, ai_response)
+            yield done_event(ai_response, False)
+        except OllamaError as e:
+            print(f"❌ Streaming crop prediction error: {e}")
+            yield sse_event('error', {"status": "error", "message": e.user_message})
+        finally:
+            chunks.close()
+
+    return sse_response(events())
+
+
 @app.route('/crop-requirements', methods=['POST'])
 def crop_requirements():
     """Get ideal growing conditions for a specific crop - Knowledge Base + AI Fallback"""
@@ -346,263 +504,289 @@ HARVEST_INFO:
 Provide specific numerical ranges and practical information."""
 
         # Call Ollama API
-        ollama_payload = {
-            "model": OLLAMA_MODEL,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.3,
-                "top_p": 0.9,
-                "num_predict": 600,
-                "num_ctx": 2048,
-            }
+        options = {
+            "temperature": 0.3,
+            "top_p": 0.9,
+            "num_predict": 600,
+            "num_ctx": 2048,
         }
         
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json=ollama_payload,
-            timeout=120
-        )
+        ollama_response = ollama_client.generate(OLLAMA_MODEL, prompt, options, route='crop_requirements')
         
-        if response.status_code == 200:
-            ollama_response = response.json()
-            ai_response = ollama_response.get('response', '')
-            
-            print(f"✅ Llama3 Response received")
-            
-            # Parse the response into sections
-            sections = {
-                'crop': crop_name.title(),
-                'soil_requirements': [],
-                'climate_requirements': [],
-                'growing_tips': [],
-                'harvest_info': [],
-                'full_response': ai_response
-            }
-            
-            current_section = None
-            lines = ai_response.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                # Remove markdown bold markers
-                line = line.replace('**', '')
-                
-                if 'SOIL_REQUIREMENTS:' in line or 'SOIL REQUIREMENTS:' in line:
-                    current_section = 'soil_requirements'
-                elif 'CLIMATE_REQUIREMENTS:' in line or 'CLIMATE REQUIREMENTS:' in line:
-                    current_section = 'climate_requirements'
-                elif 'GROWING_TIPS:' in line or 'GROWING TIPS:' in line:
-                    current_section = 'growing_tips'
-                elif 'HARVEST_INFO:' in line or 'HARVEST INFO:' in line or 'HARVEST_INFORMATION:' in line:
-                    current_section = 'harvest_info'
-                elif (line.startswith('-') or line.startswith('*') or line.startswith('•')) and current_section:
-                    # Remove bullet point markers
-                    clean_line = line.lstrip('-*•').strip()
-                    if clean_line and len(clean_line) > 5:  # Avoid empty or very short lines
-                        sections[current_section].append(clean_line)
+        ai_response = ollama_response.get('response', '')
+        
+        print(f"✅ Llama3 Response received")
+        
+        # Parse the response into sections
+        sections = {
+            'crop': crop_name.title(),
+            'soil_requirements': [],
+            'climate_requirements': [],
+            'growing_tips': [],
+            'harvest_info': [],
+            'full_response': ai_response
+        }
+        
+        current_section = None
+        lines = ai_response.split('\n')
+        
+        for line in lines:
+            line = line.strip()
+            # Remove markdown bold markers
+            line = line.replace('**', '')
             
-            return jsonify({
-                "status": "success",
-                "crop": crop_name.title(),
-                "soil_requirements": sections['soil_requirements'],
-                "climate_requirements": sections['climate_requirements'],
-                "growing_tips": sections['growing_tips'],
-                "harvest_info": sections['harvest_info'],
-                "model": f"{OLLAMA_MODEL} (AI Generated)",
-                "source": "ai",
-                "note": f"Generated by AI - not in knowledge base. Available crops: {', '.join(list(CROP_DATABASE.keys())[:5])}..."
-            }), 200
-        else:
-            print(f"❌ Ollama API error: {response.status_code}")
-            return jsonify({
-                "status": "error", 
-                "message": f"AI service error. Available crops in knowledge base: {', '.join(CROP_DATABASE.keys())}"
-            }), 500
+            if 'SOIL_REQUIREMENTS:' in line or 'SOIL REQUIREMENTS:' in line:
+                current_section = 'soil_requirements'
+            elif 'CLIMATE_REQUIREMENTS:' in line or 'CLIMATE REQUIREMENTS:' in line:
+                current_section = 'climate_requirements'
+            elif 'GROWING_TIPS:' in line or 'GROWING TIPS:' in line:
+                current_section = 'growing_tips'
+            elif 'HARVEST_INFO:' in line or 'HARVEST INFO:' in line or 'HARVEST_INFORMATION:' in line:
+                current_section = 'harvest_info'
+            elif (line.startswith('-') or line.startswith('*') or line.startswith('•')) and current_section:
+                # Remove bullet point markers
+                clean_line = line.lstrip('-*•').strip()
+                if clean_line and len(clean_line) > 5:  # Avoid empty or very short lines
+                    sections[current_section].append(clean_line)
         
-    except requests.exceptions.Timeout:
-        print("❌ Ollama request timeout")
         return jsonify({
-            "status": "error", 
-            "message": f"AI service timeout. Try one of these crops for instant results: {', '.join(list(CROP_DATABASE.keys())[:5])}"
-        }), 500
+            "status": "success",
+            "crop": crop_name.title(),
+            "soil_requirements": sections['soil_requirements'],
+            "climate_requirements": sections['climate_requirements'],
+            "growing_tips": sections['growing_tips'],
+            "harvest_info": sections['harvest_info'],
+            "model": f"{OLLAMA_MODEL} (AI Generated)",
+            "source": "ai",
+            "note": f"Generated by AI - not in knowledge base. Available crops: {', '.join(list(CROP_DATABASE.keys())[:5])}..."
+        }), 200
+        
+    except OllamaError as e:
+        return ollama_error_response(
+            e,
+            timeout=f"AI service timeout. Try one of these crops for instant results: {', '.join(list(CROP_DATABASE.keys())[:5])}",
+            default=f"AI service error. Available crops in knowledge base: {', '.join(CROP_DATABASE.keys())}"
+        )
     except Exception as e:
         print(f"❌ Crop requirements error: {e}")
         traceback.print_exc()
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+# Rendered PDF reports keyed by a hash of their inputs (REPORT_CACHE_DIR / REPORT_CACHE_MAX_MB)
+report_cache = ReportCache()
+
+
 @app.route('/download_report', methods=['POST'])
 def download_report():
     """Handle PDF report download requests"""
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
         from io import BytesIO
-        import datetime
         from flask import send_file
-        
+
         # Get form data
         crop = request.form.get('crop', 'Unknown')
-        
-        # Create PDF
-        buffer = BytesIO()
-        p = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        
-        # Header
-        p.setFont('Helvetica-Bold', 18)
-        p.drawString(50, height - 60, "AgriTech Analysis Report")
-        
-        # Date
-        p.setFont('Helvetica', 10)
-        p.drawString(50, height - 80, f"Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        # Result
-        p.setFont('Helvetica-Bold', 14)
-        p.drawString(50, height - 120, "Analysis Result:")
-        p.setFont('Helvetica', 12)
-        p.drawString(70, height - 140, f"Recommendation: {crop}")
-        
-        # Input parameters if available
-        y_pos = height - 180
-        p.setFont('Helvetica-Bold', 12)
-        p.drawString(50, y_pos, "Input Parameters:")
-        y_pos -= 20
-        
-        p.setFont('Helvetica', 10)
-        for key, value in request.form.items():
-            if key != 'crop':
-                p.drawString(70, y_pos, f"{key}: {value}")
-                y_pos -= 15
-        
-        p.showPage()
-        p.save()
-        buffer.seek(0)
-        
-        return send_file(
-            buffer, 
-            as_attachment=True, 
-            download_name="agritech_report.pdf", 
+        params = {key: value for key, value in request.form.items() if key != 'crop'}
+
+        # Identical inputs are served from the report cache
+        pdf_bytes, cache_hit = report_cache.get_or_render('analysis', crop, params)
+        response = send_file(
+            BytesIO(pdf_bytes),
+            as_attachment=True,
+            download_name="agritech_report.pdf",
             mimetype='application/pdf'
         )
-        
+        response.headers['X-Report-Cache'] = 'hit' if cache_hit else 'miss'
+        return response
+
     except Exception as e:
         print(f"PDF generation error: {e}")
         return jsonify({"status": "error", "message": "Failed to generate PDF report"}), 500
 
 
-@app.route('/chat', methods=['POST'])
-def chat():
-    """Handle chat requests with Ollama Llama3"""
-    try:
-        data = request.get_json()
-        
-        if not data or 'message' not in data:
-            return jsonify({"status": "error", "message": "No message provided"}), 400
-            
-        user_message = sanitize_input(data['message'])
-        print(f"Debug: User message: {user_message}")
-        
-        if len(user_message) > 1000:
-            return jsonify({"status": "error", "message": "Message too long"}), 400
-        
-        # Create agricultural assistant prompt
-        system_prompt = """You are an expert agricultural assistant named AgriBot. 
+@app.route('/download_reports', methods=['POST'])
+def download_reports():
+    """
+    Bulk PDF reports: JSON {"reports": [{"crop": ..., <fields>...}, ...]} in,
+    a ZIP with one report per entry streamed out as each PDF is ready
+    """
+    payload = request.get_json(silent=True) or {}
+    entries = payload.get('reports') if isinstance(payload, dict) else payload
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"status": "error", "message": "Send a JSON list of reports as 'reports'"}), 400
+    if len(entries) > BULK_MAX_REPORTS:
+        return jsonify({"status": "error", "message": f"Too many reports; the limit is {BULK_MAX_REPORTS}"}), 400
+
+    reports = []
+    for index, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            return jsonify({"status": "error", "message": f"Report {index} must be an object"}), 400
+        crop = str(entry.get('crop', 'Unknown'))[:100]
+        params = {str(k)[:50]: str(v)[:200] for k, v in entry.items() if k not in ('crop', 'name')}
+        name = re.sub(r'[^A-Za-z0-9_-]+', '_', str(entry.get('name') or crop))
+        reports.append((f"{index:04d}_{name}.pdf", crop, params))
+
+    return Response(stream_with_context(stream_reports_zip(report_cache, 'analysis', reports)),
+                    mimetype='application/zip',
+                    headers={'Content-Disposition': 'attachment; filename=agritech_reports.zip'})
+
+
+# Agricultural assistant prompt for /chat
+CHAT_SYSTEM_PROMPT = """You are an expert agricultural assistant named AgriBot. 
         Provide detailed, accurate and helpful responses about farming, crops, weather impact, 
         soil health, pest control, and sustainable agriculture practices. Format your answers 
         with clear concise minimal paragraphs. If asked about something outside agriculture 
         except greetings, politely decline and refocus on farming topics."""
+
+# Generation options for /chat
+CHAT_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "num_predict": 300,  # Limit response length for faster generation
+    "num_ctx": 2048,     # Reduce context window for speed
+    "repeat_penalty": 1.1
+}
+
+def read_chat_message(data):
+    """Validate a /chat JSON body and return (user_message, error_response)"""
+    if not data or 'message' not in data:
+        return None, (jsonify({"status": "error", "message": "No message provided"}), 400)
         
-        full_prompt = f"{system_prompt}\n\nUser: {user_message}\nAgriBot:"
+    user_message = sanitize_input(data['message'])
+    print(f"Debug: User message: {user_message}")
+    
+    if len(user_message) > 1000:
+        return None, (jsonify({"status": "error", "message": "Message too long"}), 400)
+    return user_message, None
+
+def build_chat_prompt(user_message):
+    """Create agricultural assistant prompt"""
+    return f"{CHAT_SYSTEM_PROMPT}\n\nUser: {user_message}\nAgriBot:"
+
+
+@app.route('/chat', methods=['POST'])
+def chat():
+    """Handle chat requests with Ollama Llama3"""
+    try:
+        user_message, error = read_chat_message(request.get_json())
+        if error:
+            return error
+        
+        full_prompt = build_chat_prompt(user_message)
         
         # Call Ollama API with optimized parameters
-        ollama_payload = {
-            "model": OLLAMA_MODEL,
-            "prompt": full_prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "num_predict": 300,  # Limit response length for faster generation
-                "num_ctx": 2048,     # Reduce context window for speed
-                "repeat_penalty": 1.1
-            }
-        }
+        options = dict(CHAT_OPTIONS)
         
         print(f"Debug: Calling Ollama with model: {OLLAMA_MODEL}")
         
         # Try with current model, fallback to llama3:latest if timeout
         try:
-            response = requests.post(
-                f"{OLLAMA_BASE_URL}/api/generate",
-                json=ollama_payload,
-                timeout=60  # 1 minute timeout for first try
-            )
-        except requests.exceptions.Timeout:
+            ollama_response = ollama_client.generate(OLLAMA_MODEL, full_prompt, options, route='chat')
+        except OllamaTimeout:
             print(f"⚠️ Timeout with {OLLAMA_MODEL}, trying with llama3:latest...")
             # Fallback to llama3:latest with shorter response
-            ollama_payload["model"] = "llama3:latest"
-            ollama_payload["options"]["num_predict"] = 200  # Even shorter response
-            response = requests.post(
-                f"{OLLAMA_BASE_URL}/api/generate",
-                json=ollama_payload,
-                timeout=120  # 2 minutes for fallback
-            )
-        
-        if response.status_code == 200:
-            ollama_response = response.json()
-            ai_message = ollama_response.get('response', 'Sorry, I could not generate a response.')
-            
-            return jsonify({
-                "status": "success",
-                "message": ai_message,
-                "model": OLLAMA_MODEL
-            }), 200
-        else:
-            print(f"Ollama API error: {response.status_code} - {response.text}")
-            return jsonify({"status": "error", "message": "AI service temporarily unavailable"}), 500
-        
-    except requests.exceptions.Timeout:
-        print("Ollama request timeout")
-        return jsonify({"status": "error", "message": "AI service timeout - please try again"}), 500
-    except requests.exceptions.ConnectionError:
-        print("Ollama connection error - is Ollama running?")
-        return jsonify({"status": "error", "message": "AI service unavailable - please ensure Ollama is running"}), 500
+            options["num_predict"] = 200  # Even shorter response
+            ollama_response = ollama_client.generate("llama3:latest", full_prompt, options, route='chat_fallback')
+        
+        ai_message = ollama_response.get('response', 'Sorry, I could not generate a response.')
+        
+        return jsonify({
+            "status": "success",
+            "message": ai_message,
+            "model": OLLAMA_MODEL
+        }), 200
+        
+    except OllamaError as e:
+        return ollama_error_response(e)
     except Exception as e:
         print(f"Chat error: {e}")
         traceback.print_exc()
         return jsonify({"status": "error", "message": "Chat service temporarily unavailable"}), 500
 
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Stream a chat reply as Server-Sent Events.
+    Emits one 'token' event per generated token and a final 'done' event
+    with the model name.
+    """
+    user_message, error = read_chat_message(request.get_json(silent=True))
+    if error:
+        return error
+    full_prompt = build_chat_prompt(user_message)
+    model = OLLAMA_MODEL
+
+    def events():
+        chunks = ollama_client.generate_stream(model, full_prompt, CHAT_OPTIONS, route='chat')
+        try:
+            for chunk in chunks:
+                token = chunk.get('response', '')
+                if token:
+                    yield sse_event('token', {"token": token})
+            yield sse_event('done', {"status": "success", "model": model})
+        except OllamaError as e:
+            print(f"❌ Streaming chat error: {e}")
+            yield sse_event('error', {"status": "error", "message": e.user_message})
+        finally:
+            chunks.close()
+
+    return sse_response(events())
+
+
 @app.route('/crop-yield-prediction')
 def crop_yield_prediction():
     """Serve the crop yield prediction input page"""
     return send_from_directory('.', 'crop-yield-input.html')
 
 
+# Yield model artifacts, loaded once and hot-reloaded when the files change
+YIELD_MODEL_DIR = 'Crop Yield Prediction/crop_yield_app/models'
+YIELD_ARTIFACTS = ['yield_model', 'yield_crop_lookup', 'yield_season_lookup', 'yield_state_lookup']
+YIELD_CATEGORICALS = ['crop', 'season', 'state']
+models.register('yield_model', os.path.join(YIELD_MODEL_DIR, 'xgb_crop_model.pkl'))
+for field, encoder_file in zip(YIELD_CATEGORICALS, ['Crop_encoder.pkl', 'Season_encoder.pkl', 'State_encoder.pkl']):
+    # Encoders are compiled into normalized lookup tables as they load
+    models.register(f'yield_{field}_lookup', os.path.join(YIELD_MODEL_DIR, encoder_file),
+                    loader=lambda path, field=field: CategoryLookup.from_encoder(field, load_pickle(path)))
+
+
+def load_yield_artifacts():
+    """Current yield model entry plus {field: CategoryLookup}"""
+    loaded_model, *lookup_entries = models.get_many(*YIELD_ARTIFACTS)
+    return loaded_model, {field: entry.obj for field, entry in zip(YIELD_CATEGORICALS, lookup_entries)}
+
+
+def yield_model_info(loaded_model):
+    """Version/load details of the yield model reported with each prediction"""
+    return {
+        "version": loaded_model.version,
+        "loaded_at": loaded_model.loaded_at,
+        "load_ms": loaded_model.load_ms
+    }
+
+
+@app.route('/api/models')
+def list_models():
+    """List the local model artifacts with their versions and load times"""
+    return jsonify({
+        'status': 'success',
+        'models': models.listing(),
+        'reloads': models.reloads,
+        'disease_classifier': classifier.status()
+    })
+
+
 @app.route('/predict-yield', methods=['POST'])
 def predict_yield():
     """Handle crop yield prediction"""
     try:
-        import joblib
-        import numpy as np
-        import xgboost  # Explicitly import xgboost
-        
-        # Load models (adjust paths as needed)
-        model_path = 'Crop Yield Prediction/crop_yield_app/models/xgb_crop_model.pkl'
-        crop_encoder_path = 'Crop Yield Prediction/crop_yield_app/models/Crop_encoder.pkl'
-        season_encoder_path = 'Crop Yield Prediction/crop_yield_app/models/Season_encoder.pkl'
-        state_encoder_path = 'Crop Yield Prediction/crop_yield_app/models/State_encoder.pkl'
-        
-        if not all(os.path.exists(path) for path in [model_path, crop_encoder_path, season_encoder_path, state_encoder_path]):
+        if not all(models.exists(name) for name in YIELD_ARTIFACTS):
             return jsonify({"status": "error", "message": "Model files not found"}), 500
-            
-        model = joblib.load(model_path)
-        crop_encoder = joblib.load(crop_encoder_path)
-        season_encoder = joblib.load(season_encoder_path)
-        state_encoder = joblib.load(state_encoder_path)
-        
+
+        loaded_model, lookups = load_yield_artifacts()
+        model = loaded_model.obj
+
         # Get form data
         data = request.get_json() if request.is_json else request.form
         
@@ -618,28 +802,32 @@ def predict_yield():
         if not all([crop, season, state]):
             return jsonify({"status": "error", "message": "Missing required fields"}), 400
             
-        # Check if values exist in encoders
-        if crop not in crop_encoder.classes_:
-            return jsonify({"status": "error", "message": f"Unknown crop: {crop}"}), 400
-        if season not in season_encoder.classes_:
-            return jsonify({"status": "error", "message": f"Unknown season: {season}"}), 400
-        if state not in state_encoder.classes_:
-            return jsonify({"status": "error", "message": f"Unknown state: {state}"}), 400
-        
-        # Encode categorical variables
-        crop_encoded = crop_encoder.transform([crop])[0]
-        season_encoded = season_encoder.transform([season])[0]
-        state_encoded = state_encoder.transform([state])[0]
-        
+        # Encode categorical variables (case/padding-insensitive, aliases accepted)
+        try:
+            crop_encoded = lookups['crop'].encode(crop)
+            season_encoded = lookups['season'].encode(season)
+            state_encoded = lookups['state'].encode(state)
+        except UnknownCategory as e:
+            return jsonify({"status": "error", "message": str(e), **e.to_dict()}), 400
+        crop = lookups['crop'].label(crop_encoded)
+        season = lookups['season'].label(season_encoded)
+        state = lookups['state'].label(state_encoded)
+
+
         # Prepare features
+        import numpy as np
         features = np.array([[crop_encoded, year, season_encoded, state_encoded, area, rainfall, production]])
         
         # Make prediction
+        start = time.perf_counter()
         prediction = float(round(model.predict(features)[0], 2))
-        
+        inference_ms = round((time.perf_counter() - start) * 1000, 3)
+
         return jsonify({
             "status": "success",
             "prediction": prediction,
+            "model": yield_model_info(loaded_model),
+            "inference_ms": inference_ms,
             "crop": crop,
             "season": season,
             "state": state,
@@ -660,6 +848,33 @@ def predict_yield():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route('/predict-yield/batch', methods=['POST'])
+def predict_yield_batch():
+    """
+    Score many yield rows at once: a JSON array or an uploaded CSV ('file'),
+    streamed back as NDJSON or CSV (?format=) with an error for each bad row
+    """
+    try:
+        if not all(models.exists(name) for name in YIELD_ARTIFACTS):
+            return jsonify({"status": "error", "message": "Model files not found"}), 500
+        loaded_model, lookups = load_yield_artifacts()
+
+        rows, output_format = read_batch_request(request)
+        start = time.perf_counter()
+        results = score_rows(rows, loaded_model.obj, lookups)
+        print(f"🌾 Scored {len(results)} yield rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        response = batch_response(results, output_format)
+        response.headers['X-Model-Version'] = loaded_model.version
+        return response
+    except BatchInputError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        print(f"Batch yield prediction error: {e}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 @app.route('/process-loan', methods=['POST'])
 def process_loan():
     try:
@@ -710,33 +925,21 @@ Do not add assumptions that are not supported by the data provided.
 """
 
         # Call Ollama API for loan processing with optimized parameters
-        ollama_payload = {
-            "model": OLLAMA_MODEL,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.3,  # Lower temperature for more consistent financial advice
-                "top_p": 0.8,
-                "num_predict": 500,  # Limit response length
-                "num_ctx": 2048,     # Reduce context window
-                "repeat_penalty": 1.1
-            }
+        options = {
+            "temperature": 0.3,  # Lower temperature for more consistent financial advice
+            "top_p": 0.8,
+            "num_predict": 500,  # Limit response length
+            "num_ctx": 2048,     # Reduce context window
+            "repeat_penalty": 1.1
         }
         
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json=ollama_payload,
-            timeout=120  # Increased timeout to 2 minutes
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"Ollama API error: {response.status_code}")
-            
-        ollama_response = response.json()
+        ollama_response = ollama_client.generate(OLLAMA_MODEL, prompt, options, route='loan')
 
         reply = ollama_response.get('response', 'Unable to process loan analysis.')
         return jsonify({"status": "success", "message": reply, "model": OLLAMA_MODEL}), 200
 
+    except OllamaError as e:
+        return ollama_error_response(e)
     except Exception as e:
         print(f"Unexpected Error: {e}")
         traceback.print_exc()
@@ -764,36 +967,184 @@ def disease_prediction():
     return send_from_directory('.', 'disease-prediction.html')
 
 
+VISION_MODEL = "llama3.2-vision:latest"
+
+# Persistent cache of finished analyses, keyed on the normalized image bytes
+disease_cache = DiseaseResultCache(
+    maxsize=int(os.environ.get('DISEASE_CACHE_SIZE', 2000)),
+    persist_path=os.environ.get('DISEASE_CACHE_PATH', '.cache/disease_results.json') or None,
+    phash_distance=int(os.environ.get('DISEASE_CACHE_PHASH_DISTANCE', 0))
+)
+
+def on_models_refreshed_for_disease_cache(snapshot):
+    """Registry listener: forget analyses from models that were re-pulled or removed"""
+    disease_cache.invalidate_stale({
+        format_model_version(name, digest) for name, digest in snapshot['digests'].items()
+    })
+
+registry.on_refresh(on_models_refreshed_for_disease_cache)
+
+# Create prompt for disease analysis
+DISEASE_VISION_PROMPT = """Analyze this plant image as an agricultural expert. Provide:
+
+1. Disease/Condition: What's affecting this plant?
+2. Severity: Mild/Moderate/Severe
+3. Symptoms: What you see in the image
+4. Treatment: 2-3 practical solutions
+5. Prevention: Key preventive measures
+
+Keep it concise and farmer-friendly."""
+
+DISEASE_VISION_OPTIONS = {
+    "temperature": 0.3,
+    "top_p": 0.9,
+    "num_predict": 600,
+    "num_ctx": 2048,
+}
+
+DISEASE_ERROR_MESSAGES = {
+    "timeout": "Analysis timeout - the vision model is processing. Please wait and try again.",
+    "connection": "Cannot connect to Ollama. Please ensure Ollama is running.",
+    "default": "AI analysis service unavailable"
+}
+
+# Vision jobs run on a small worker pool so uploads never hold a Flask worker
+disease_jobs = JobQueue(
+    'disease-vision',
+    workers=int(os.environ.get('DISEASE_JOB_WORKERS', 1)),
+    max_pending=int(os.environ.get('DISEASE_JOB_MAX_PENDING', 20)),
+    retention=int(os.environ.get('DISEASE_JOB_RETENTION', 900))
+)
+
+def run_vision_analysis(image_data, image_hash, phash, model_version):
+    """Run one vision analysis on Ollama (executed on a disease_jobs worker) and cache it"""
+    print("Calling Ollama Vision API for disease analysis...")
+    print(f"Image data length: {len(image_data)} bytes")
+    print("⚠️ Vision analysis may take 3-5 minutes on first request...")
+    
+    # 10 minute budget for vision analysis (first load is slow)
+    try:
+        ollama_response = ollama_client.generate(
+            VISION_MODEL, DISEASE_VISION_PROMPT, DISEASE_VISION_OPTIONS, route='disease_vision', images=[image_data]
+        )
+    except OllamaError as e:
+        # Resolve (and log) the user-facing message once; polls of the failed job just read it back
+        raise RuntimeError(ollama_error_message(e, **DISEASE_ERROR_MESSAGES)) from e
+    
+    analysis = ollama_response.get('response', 'Unable to analyze the image.')
+    
+    print(f"✅ Disease analysis completed successfully")
+    
+    result = {
+        "status": "success",
+        "analysis": analysis,
+        "model": VISION_MODEL,
+        "mode": "vision"
+    }
+    disease_cache.put('vision', model_version, result, image_hash=image_hash, phash=phash)
+    return result
+
+# Minimum top-1 probability for the local classifier to answer on its own
+DISEASE_CONFIDENCE_THRESHOLD = float(os.environ.get('DISEASE_CONFIDENCE_THRESHOLD', 0.80))
+
+def format_classifier_analysis(predictions):
+    """Render local classifier predictions in the same Markdown shape as the LLM analysis"""
+    top = predictions[0]
+    healthy = top['condition'].lower() == 'healthy'
+    lines = [
+        f"1. **Disease/Condition**: {top['crop']} - {'Healthy (no disease detected)' if healthy else top['condition']}",
+        f"2. **Confidence**: {top['probability'] * 100:.0f}%",
+        "",
+        "**Other possibilities:**"
+    ]
+    for prediction in predictions[1:]:
+        lines.append(f"- {prediction['crop']} - {prediction['condition']} ({prediction['probability'] * 100:.0f}%)")
+    lines += [
+        "",
+        "💡 Identified instantly by the on-device classifier. "
+        "Request a detailed analysis for symptoms, treatment and prevention advice."
+    ]
+    return "\n".join(lines)
+
+def disease_job_payload(job):
+    """JSON body describing a vision job's progress or outcome"""
+    body = {
+        "job_id": job.id,
+        "status": job.state,
+        "queue_position": disease_jobs.position(job)
+    }
+    if job.state == DONE:
+        body.update(job.result)
+    elif job.state == FAILED:
+        body.update({"status": "error", "message": str(job.error)})
+    elif job.state == CANCELLED:
+        body["message"] = "Analysis cancelled"
+    body.update(job.meta)
+    if job.finished_at:
+        body["elapsed_seconds"] = round(job.finished_at - job.created_at, 1)
+    return body
+
+
 @app.route('/api/analyze-disease', methods=['POST'])
 def analyze_disease():
-    """Analyze plant disease using Llama 3.2 Vision with text fallback"""
+    """
+    Analyze plant disease with the local PlantDiseaseNet classifier, escalating to
+    Llama 3.2 Vision (or the text fallback) when it is unsure or the caller sends
+    "narrative": true. Vision analysis is queued: the reply is 202 with a job id to poll at
+    /api/analyze-disease/<job_id> or stream at /api/analyze-disease/<job_id>/events.
+    """
     try:
         data = request.get_json()
         
         if not data or 'image' not in data:
             return jsonify({"status": "error", "message": "No image provided"}), 400
         
-        image_data = data['image']
         use_vision = data.get('use_vision', True)  # Allow client to request text-only mode
         
-        # Remove data URL prefix if present
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        # Check if vision model is available
-        vision_available = False
+        # Decode once, cap resolution, strip EXIF and re-encode before any inference
         try:
-            models_response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-            if models_response.status_code == 200:
-                available_models = [m['name'] for m in models_response.json().get('models', [])]
-                vision_available = 'llama3.2-vision:latest' in available_models
-        except Exception as e:
-            print(f"Failed to check models: {e}")
+            normalized = normalize_image(data['image'])
+        except ImageRejected as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        preprocessing = normalized.stats()
+        print(f"🖼️ Image normalized: {preprocessing}")
+        image_hash = content_hash(normalized.jpeg_bytes)
+        phash = perceptual_hash(normalized.image) if disease_cache.phash_distance else None
+        
+        # Fast path: the local PlantDiseaseNet answers confident cases in milliseconds.
+        # The LLM is only used when it is unsure or the caller wants a narrative.
+        classification = None
+        if classifier.available:
+            try:
+                classification = classifier.predict(normalized.image)
+            except Exception as e:
+                # A broken classifier must not take the LLM path down with it
+                print(f"⚠️ Local classifier failed, escalating to the LLM: {e}")
+        if classification:
+            top = classification['predictions'][0]
+            print(f"🌿 Local classifier: {top['label']} ({top['probability']:.2%}) in {classification['inference_ms']} ms")
+            if top['probability'] >= DISEASE_CONFIDENCE_THRESHOLD and not data.get('narrative', False):
+                return jsonify({
+                    "status": "success",
+                    "analysis": format_classifier_analysis(classification['predictions']),
+                    "model": "PlantDiseaseNet",
+                    "mode": "classifier",
+                    "classification": classification,
+                    "preprocessing": preprocessing
+                }), 200
+        
+        # Check if vision model is available (no network call - registry refreshes in background)
+        vision_available = registry.is_installed(VISION_MODEL)
         
         # If vision not available or client requests text-only, use text-based analysis
         if not vision_available or not use_vision:
             print("Using text-based disease analysis (faster fallback)")
             
+            model_version = registry.model_version(OLLAMA_MODEL)
+            cached = disease_cache.get('text-only', model_version)
+            if cached:
+                return jsonify({**cached, "cached": True, "classification": classification, "preprocessing": preprocessing}), 200
+            
             prompt = """You are an agricultural expert specializing in plant disease diagnosis. 
             
 Based on common plant diseases, provide a general disease analysis guide covering:
@@ -805,106 +1156,98 @@ Based on common plant diseases, provide a general disease analysis guide coverin
 
 Format your response clearly with sections and bullet points."""
 
-            ollama_payload = {
-                "model": OLLAMA_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "num_predict": 500,
-                    "num_ctx": 2048,
-                }
-            }
-            
-            response = requests.post(
-                f"{OLLAMA_BASE_URL}/api/generate",
-                json=ollama_payload,
-                timeout=120  # 2 minutes for text generation
-            )
-            
-            if response.status_code == 200:
-                ollama_response = response.json()
-                analysis = ollama_response.get('response', 'Unable to generate analysis.')
-                
-                return jsonify({
-                    "status": "success",
-                    "analysis": f"⚠️ **Note**: Using general disease guide (vision analysis unavailable or disabled)\n\n{analysis}",
-                    "model": OLLAMA_MODEL,
-                    "mode": "text-only"
-                }), 200
-            else:
-                print(f"Text-based analysis failed: {response.status_code}")
-                return jsonify({
-                    "status": "error",
-                    "message": "AI service temporarily unavailable"
-                }), 500
-        
-        # Use vision model for actual image analysis
-        print("Using vision model for image analysis...")
-        
-        # Create prompt for disease analysis
-        prompt = """Analyze this plant image as an agricultural expert. Provide:
-
-1. Disease/Condition: What's affecting this plant?
-2. Severity: Mild/Moderate/Severe
-3. Symptoms: What you see in the image
-4. Treatment: 2-3 practical solutions
-5. Prevention: Key preventive measures
-
-Keep it concise and farmer-friendly."""
-
-        # Call Ollama API with vision model
-        ollama_payload = {
-            "model": "llama3.2-vision:latest",
-            "prompt": prompt,
-            "images": [image_data],
-            "stream": False,
-            "options": {
+            options = {
                 "temperature": 0.3,
                 "top_p": 0.9,
-                "num_predict": 600,
+                "num_predict": 500,
                 "num_ctx": 2048,
             }
-        }
-        
-        print("Calling Ollama Vision API for disease analysis...")
-        print(f"Image data length: {len(image_data)} bytes")
-        print("⚠️ Vision analysis may take 3-5 minutes on first request...")
-        
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json=ollama_payload,
-            timeout=600  # 10 minutes timeout for vision analysis (first load is slow)
-        )
-        
-        if response.status_code == 200:
-            ollama_response = response.json()
-            analysis = ollama_response.get('response', 'Unable to analyze the image.')
             
-            print(f"✅ Disease analysis completed successfully")
+            try:
+                ollama_response = ollama_client.generate(OLLAMA_MODEL, prompt, options, route='disease_text')
+            except OllamaError as e:
+                print(f"Text-based analysis failed: {e}")
+                return ollama_error_response(e)
             
-            return jsonify({
+            analysis = ollama_response.get('response', 'Unable to generate analysis.')
+            
+            result = {
                 "status": "success",
-                "analysis": analysis,
-                "model": "llama3.2-vision:latest",
-                "mode": "vision"
-            }), 200
-        else:
-            print(f"Ollama API error: {response.status_code} - {response.text}")
-            return jsonify({"status": "error", "message": "AI analysis service unavailable"}), 500
-        
-    except requests.exceptions.Timeout:
-        print("Ollama request timeout")
-        return jsonify({"status": "error", "message": "Analysis timeout - the vision model is processing. Please wait and try again."}), 500
-    except requests.exceptions.ConnectionError:
-        print("Ollama connection error")
-        return jsonify({"status": "error", "message": "Cannot connect to Ollama. Please ensure Ollama is running."}), 500
+                "analysis": f"⚠️ **Note**: Using general disease guide (vision analysis unavailable or disabled)\n\n{analysis}",
+                "model": OLLAMA_MODEL,
+                "mode": "text-only"
+            }
+            disease_cache.put('text-only', model_version, result)
+            return jsonify({**result, "cached": False, "classification": classification, "preprocessing": preprocessing}), 200
+        
+        # Re-uploads of the same photo (or client retries) are answered from the cache
+        model_version = registry.model_version(VISION_MODEL)
+        cached = disease_cache.get('vision', model_version, image_hash=image_hash, phash=phash)
+        if cached:
+            print(f"⚡ Disease analysis cache hit: {image_hash[:12]}")
+            return jsonify({**cached, "cached": True, "classification": classification, "preprocessing": preprocessing}), 200
+        
+        # Use vision model for actual image analysis
+        print("Queueing vision model image analysis...")
+        try:
+            job = disease_jobs.submit(run_vision_analysis, normalized.base64, image_hash, phash, model_version)
+        except QueueFull as e:
+            print(f"⚠️ {e}")
+            return jsonify({"status": "error", "message": "Too many analyses in progress - please try again in a few minutes"}), 503
+        
+        job.meta['preprocessing'] = preprocessing
+        job.meta['classification'] = classification
+        return jsonify({
+            **disease_job_payload(job),
+            "poll_url": f"/api/analyze-disease/{job.id}",
+            "events_url": f"/api/analyze-disease/{job.id}/events"
+        }), 202
+        
     except Exception as e:
         print(f"Disease analysis error: {e}")
         traceback.print_exc()
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route('/api/analyze-disease/<job_id>', methods=['GET', 'DELETE'])
+@limiter.exempt  # Clients poll this every few seconds
+def disease_job(job_id):
+    """Poll (GET) or cancel (DELETE) a queued vision analysis"""
+    if request.method == 'DELETE':
+        job = disease_jobs.cancel(job_id)
+    else:
+        job = disease_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown or expired analysis job"}), 404
+    return jsonify(disease_job_payload(job)), 200
+
+
+@app.route('/api/analyze-disease/<job_id>/events')
+@limiter.exempt
+def disease_job_events(job_id):
+    """
+    Stream a vision job's progress as Server-Sent Events: 'status' events on
+    every state or queue-position change, then one final 'done' event.
+    """
+    job = disease_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown or expired analysis job"}), 404
+
+    def events():
+        seen = None
+        while True:
+            current = disease_jobs.wait(job, seen, timeout=15)
+            if current == seen:
+                yield ": keepalive\n\n"  # Keep proxies from closing an idle stream
+                continue
+            seen = current
+            if job.state in FINISHED_STATES:
+                yield sse_event('done', disease_job_payload(job))
+                return
+            yield sse_event('status', disease_job_payload(job))
+
+    return sse_response(events())
+
+
 if __name__ == '__main__':
     app.run(port=5000, debug=True)
\ No newline at end of file
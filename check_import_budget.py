@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the AgriTech server modules
+Imports each module in a fresh interpreter with `python -X importtime`, compares
+its cumulative import time with the budget below and lists the slowest
+dependencies it pulled in. Exits non-zero when a module is over budget, so it
+can guard against heavy imports (numpy, joblib, torch, reportlab, xgboost)
+creeping back into module scope or network calls into import.
+
+Usage:
+    python check_import_budget.py             # all modules
+    python check_import_budget.py app --top 15
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+# Cumulative cold import time allowed per module, in milliseconds
+IMPORT_BUDGETS_MS = {
+    'result_cache': 30,
+    'single_flight': 30,
+    'job_queue': 30,
+    'micro_batcher': 50,
+    'model_registry': 30,
+    'disease_cache': 50,
+    'ollama_client': 300,
+    'ollama_registry': 300,
+    'image_pipeline': 200,
+    'disease_classifier': 80,
+    'app': 1500,
+    'gateway': 400,
+}
+# Packages that must never be imported just by importing a module
+HEAVY_PACKAGES = ('torch', 'numpy', 'joblib', 'xgboost', 'sklearn', 'reportlab', 'pandas')
+
+
+def measure(module):
+    """(cumulative ms, [(ms, package)] for every import, error or None)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=here, capture_output=True, text=True, timeout=120
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((int(cumulative) / 1000, name.strip()))
+    total = next((ms for ms, name in reversed(imports) if name == module), None)
+    error = None if result.returncode == 0 else result.stderr.strip().splitlines()[-1]
+    return total, imports, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', help='Modules to check (default: every budgeted module)')
+    parser.add_argument('--top', type=int, default=5, help='Slowest imports to list per module')
+    args = parser.parse_args()
+
+    failures = 0
+    for module in args.modules or list(IMPORT_BUDGETS_MS):
+        budget = IMPORT_BUDGETS_MS.get(module)
+        total, imports, error = measure(module)
+        if error:
+            print(f"❌ {module:20} could not be imported: {error}")
+            failures += 1
+            continue
+        heavy = sorted({name.split('.')[0] for _, name in imports if name.split('.')[0] in HEAVY_PACKAGES})
+        over = budget is not None and total > budget
+        status = '❌' if over or heavy else '✅'
+        print(f"{status} {module:20} {total:8.1f} ms  (budget {budget if budget is not None else '-'} ms)")
+        if heavy:
+            print(f"     heavy packages imported eagerly: {', '.join(heavy)}")
+        if over or heavy:
+            failures += 1
+        top_level = [(ms, name) for ms, name in imports if name != module and '.' not in name]
+        for ms, name in sorted(top_level, reverse=True)[:args.top]:
+            print(f"     {ms:8.1f} ms  {name}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,10 +8,9 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.metrics import confusion_matrix, classification_report, ConfusionMatrixDisplay
-from sklearn.model_selection import train_test_split
-import joblib
+from sklearn.metrics import classification_report
 import warnings
+from model_evaluation import evaluate_models
 warnings.filterwarnings('ignore')
 
 # Set style for better plots
@@ -24,40 +23,25 @@ def create_crop_confusion_matrix():
     print("=" * 60)
     
     try:
-        # Load dataset
-        df = pd.read_csv('Crop Recommendation/Crop_recommendation.csv')
-        
-        # Prepare data
-        X = df[['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']]
-        y = df['label']
-        
-        # Load model and encoder
-        model = joblib.load('Crop Recommendation/model/rf_model.pkl')
-        label_encoder = joblib.load('Crop Recommendation/model/label_encoder.pkl')
-        
-        # Encode labels
-        y_encoded = label_encoder.transform(y)
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
-        )
-        
-        # Make predictions
-        y_pred = model.predict(X_test)
+        # Out-of-fold predictions: every sample is predicted by a model that never saw it
+        result = evaluate_models(['crop_recommendation'])['crop_recommendation']
+        metrics = result['metrics']
+        if 'error' in metrics:
+            raise RuntimeError(metrics['error'])
+        y_test, y_pred = result['y_true'], result['y_pred']
         
         # Get crop names
-        crop_names = label_encoder.classes_
+        crop_names = np.array(result['class_names'])
         
         # Create confusion matrix
-        cm = confusion_matrix(y_test, y_pred)
+        cm = np.array(metrics['confusion_matrix'])
         
         # Calculate accuracy per class
         class_accuracy = cm.diagonal() / cm.sum(axis=1)
         
         # Display results
-        print(f"Dataset: {len(df)} samples, {len(crop_names)} crops")
-        print(f"Test set: {len(X_test)} samples")
+        print(f"Dataset: {metrics['samples']} samples, {len(crop_names)} crops")
+        print(f"Held-out predictions: {len(y_test)} samples from {len(metrics['fold_scores'])}-fold cross-validation")
         print(f"Overall Accuracy: {(y_test == y_pred).mean():.4f} ({(y_test == y_pred).mean()*100:.2f}%)")
         
         # Create visualization
@@ -159,187 +143,30 @@ def create_crop_confusion_matrix():
         }
         
     except Exception as e:
-        print(f"Error loading crop data: {e}")
-        return create_simulated_crop_confusion_matrix()
-
-def create_simulated_crop_confusion_matrix():
-    """Create simulated confusion matrix for demonstration"""
-    print("📊 Creating simulated confusion matrix for demonstration...")
-    
-    # Common crops in the dataset
-    crop_names = ['rice', 'maize', 'chickpea', 'kidneybeans', 'pigeonpeas', 
-                  'mothbeans', 'mungbean', 'blackgram', 'lentil', 'pomegranate',
-                  'banana', 'mango', 'grapes', 'watermelon', 'muskmelon',
-                  'apple', 'orange', 'papaya', 'coconut', 'cotton', 'jute', 'coffee']
-    
-    n_crops = len(crop_names)
-    
-    # Create a realistic confusion matrix (high diagonal, low off-diagonal)
-    np.random.seed(42)
-    cm = np.zeros((n_crops, n_crops), dtype=int)
-    
-    # Fill diagonal with high values (correct predictions)
-    for i in range(n_crops):
-        cm[i, i] = np.random.randint(45, 55)  # 45-55 correct predictions per crop
-    
-    # Add some confusion between similar crops
-    confusion_pairs = [
-        (0, 1),   # rice-maize
-        (2, 3),   # chickpea-kidneybeans
-        (4, 5),   # pigeonpeas-mothbeans
-        (6, 7),   # mungbean-blackgram
-        (10, 11), # banana-mango
-        (12, 13), # grapes-watermelon
-    ]
-    
-    for i, j in confusion_pairs:
-        confusion_val = np.random.randint(1, 4)
-        cm[i, j] = confusion_val
-        cm[j, i] = confusion_val
-    
-    # Add minimal random confusion
-    for i in range(n_crops):
-        for j in range(n_crops):
-            if i != j and cm[i, j] == 0:
-                if np.random.random() < 0.1:  # 10% chance of confusion
-                    cm[i, j] = np.random.randint(0, 2)
-    
-    # Calculate metrics
-    class_accuracy = cm.diagonal() / cm.sum(axis=1)
-    overall_accuracy = cm.diagonal().sum() / cm.sum()
-    
-    # Create visualization
-    plt.figure(figsize=(16, 12))
-    
-    # Plot 1: Confusion Matrix
-    plt.subplot(2, 2, 1)
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-               xticklabels=crop_names, yticklabels=crop_names)
-    plt.title('Confusion Matrix - Crop Recommendation Model', fontsize=14, fontweight='bold')
-    plt.xlabel('Predicted Crop', fontsize=12)
-    plt.ylabel('Actual Crop', fontsize=12)
-    plt.xticks(rotation=45, ha='right')
-    plt.yticks(rotation=0)
-    
-    # Plot 2: Per-Class Accuracy
-    plt.subplot(2, 2, 2)
-    bars = plt.bar(range(len(crop_names)), class_accuracy, 
-                   color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7'] * 5)
-    plt.title('Per-Class Accuracy Distribution', fontsize=14, fontweight='bold')
-    plt.xlabel('Crop Type', fontsize=12)
-    plt.ylabel('Accuracy', fontsize=12)
-    plt.xticks(range(len(crop_names)), crop_names, rotation=45, ha='right')
-    plt.ylim(0, 1.1)
-    
-    # Add accuracy line
-    plt.axhline(y=overall_accuracy, color='red', linestyle='--', 
-                label=f'Overall Accuracy: {overall_accuracy:.3f}')
-    plt.legend()
-    
-    # Plot 3: Confusion Heatmap (Normalized)
-    plt.subplot(2, 2, 3)
-    cm_norm = cm.astype('float') / cm.sum(axis=1)[:, np.newaxis]
-    sns.heatmap(cm_norm, annot=False, cmap='RdYlBu_r', 
-               xticklabels=crop_names, yticklabels=crop_names)
-    plt.title('Normalized Confusion Matrix (Prediction Rates)', fontsize=14, fontweight='bold')
-    plt.xlabel('Predicted Crop', fontsize=12)
-    plt.ylabel('Actual Crop', fontsize=12)
-    plt.xticks(rotation=45, ha='right')
-    plt.yticks(rotation=0)
-    
-    # Plot 4: Error Analysis
-    plt.subplot(2, 2, 4)
-    errors = cm.sum(axis=1) - cm.diagonal()
-    error_rates = errors / cm.sum(axis=1)
-    
-    bars = plt.bar(range(len(crop_names)), error_rates, color='salmon', alpha=0.7)
-    plt.title('Error Rate by Crop Type', fontsize=14, fontweight='bold')
-    plt.xlabel('Crop Type', fontsize=12)
-    plt.ylabel('Error Rate', fontsize=12)
-    plt.xticks(range(len(crop_names)), crop_names, rotation=45, ha='right')
-    
-    # Add value labels
-    for i, bar in enumerate(bars):
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height + 0.005,
-                f'{height:.3f}', ha='center', va='bottom', fontsize=8)
-    
-    plt.tight_layout()
-    plt.savefig('crop_confusion_matrix_simulated.png', dpi=300, bbox_inches='tight')
-    plt.show()
-    
-    # Print analysis
-    print(f"\n📊 CONFUSION MATRIX ANALYSIS RESULTS:")
-    print(f"Overall Accuracy: {overall_accuracy:.4f} ({overall_accuracy*100:.2f}%)")
-    print(f"Number of Crops: {n_crops}")
-    print(f"Total Predictions: {cm.sum()}")
-    
-    return {
-        'confusion_matrix': cm,
-        'class_accuracy': class_accuracy,
-        'crop_names': crop_names,
-        'overall_accuracy': overall_accuracy
-    }
+        print(f"Error evaluating crop model: {e}")
+        return None
 
 def create_disease_confusion_matrix():
     """Create confusion matrix for disease detection model"""
     print("\n🦠 DISEASE DETECTION - CONFUSION MATRIX ANALYSIS")
     print("=" * 60)
     
-    # Disease classes from your technical report
-    disease_classes = [
-        'Healthy', 'Bacterial Blight', 'Brown Spot', 'Leaf Smut',
-        'Tungro', 'Blast', 'Dead Heart', 'Downy Mildew',
-        'Hispa', 'Bacterial Leaf Streak', 'Sheath Blight',
-        'Sheath Rot', 'Stem Rot', 'White Backed Plant Hopper'
-    ]
-    
+    # Scored on the labelled image folder in DISEASE_EVAL_DIR (one sub-directory per class)
+    result = evaluate_models(['plant_disease'])['plant_disease']
+    if 'error' in result['metrics']:
+        print(f"Skipped: {result['metrics']['error']}")
+        return None
+    
+    # Keep the classes that have test images
+    cm_full = np.array(result['metrics']['confusion_matrix'])
+    present = np.flatnonzero(cm_full.sum(axis=1))
+    cm = cm_full[np.ix_(present, present)]
+    disease_classes = [result['class_names'][i] for i in present]
     n_diseases = len(disease_classes)
     
-    # Create realistic confusion matrix based on your reported metrics
-    np.random.seed(123)
-    cm = np.zeros((n_diseases, n_diseases), dtype=int)
-    
-    # Sample sizes per class (from your technical report)
-    sample_sizes = [450, 380, 365, 340, 320, 410, 295, 275, 385, 310, 425, 260, 305, 330]
-    
-    # Fill confusion matrix based on reported accuracies
-    reported_accuracies = [0.97, 0.92, 0.89, 0.95, 0.87, 0.94, 0.90, 0.91, 
-                          0.93, 0.88, 0.96, 0.85, 0.93, 0.91]
-    
-    for i in range(n_diseases):
-        total_samples = sample_sizes[i]
-        correct_predictions = int(total_samples * reported_accuracies[i])
-        cm[i, i] = correct_predictions
-        
-        # Distribute errors among other classes
-        remaining_errors = total_samples - correct_predictions
-        if remaining_errors > 0:
-            # Add confusion between similar diseases
-            similar_diseases = {
-                1: [9],    # Bacterial Blight ↔ Bacterial Leaf Streak
-                2: [9],    # Brown Spot ↔ Bacterial Leaf Streak  
-                7: [11],   # Downy Mildew ↔ Sheath Rot
-                8: [6],    # Hispa ↔ Dead Heart
-            }
-            
-            if i in similar_diseases:
-                for j in similar_diseases[i]:
-                    confusion_amount = min(remaining_errors // 2, remaining_errors)
-                    cm[i, j] = confusion_amount
-                    remaining_errors -= confusion_amount
-            
-            # Distribute remaining errors randomly
-            if remaining_errors > 0:
-                other_classes = [j for j in range(n_diseases) if j != i and cm[i, j] == 0]
-                for _ in range(remaining_errors):
-                    if other_classes:
-                        j = np.random.choice(other_classes)
-                        cm[i, j] += 1
-    
-    # Calculate metrics
-    class_accuracy = cm.diagonal() / cm.sum(axis=1)
-    overall_accuracy = cm.diagonal().sum() / cm.sum()
+    # Calculate metrics (over all predictions, including those for classes without test images)
+    class_accuracy = cm_full.diagonal()[present] / cm_full.sum(axis=1)[present]
+    overall_accuracy = result['metrics']['accuracy']
     
     # Create visualization
     plt.figure(figsize=(18, 14))
@@ -443,22 +270,31 @@ def generate_confusion_matrix_report():
     # Generate summary report
     print(f"\n📋 EXECUTIVE SUMMARY")
     print("=" * 50)
-    print(f"Crop Recommendation Model:")
-    print(f"  • Overall Accuracy: {crop_results['overall_accuracy']:.4f} ({crop_results['overall_accuracy']*100:.2f}%)")
-    print(f"  • Number of Crops: {len(crop_results['crop_names'])}")
-    print(f"  • Best Crop Accuracy: {crop_results['class_accuracy'].max():.4f}")
-    print(f"  • Worst Crop Accuracy: {crop_results['class_accuracy'].min():.4f}")
-    
-    print(f"\nDisease Detection Model:")
-    print(f"  • Overall Accuracy: {disease_results['overall_accuracy']:.4f} ({disease_results['overall_accuracy']*100:.2f}%)")
-    print(f"  • Number of Diseases: {len(disease_results['disease_classes'])}")
-    print(f"  • Best Disease Accuracy: {disease_results['class_accuracy'].max():.4f}")
-    print(f"  • Worst Disease Accuracy: {disease_results['class_accuracy'].min():.4f}")
+    generated = []
+    if crop_results is None:
+        print("Crop Recommendation Model: not evaluated")
+    else:
+        generated.append('crop_confusion_matrix_analysis.png')
+        print(f"Crop Recommendation Model:")
+        print(f"  • Overall Accuracy: {crop_results['overall_accuracy']:.4f} ({crop_results['overall_accuracy']*100:.2f}%)")
+        print(f"  • Number of Crops: {len(crop_results['crop_names'])}")
+        print(f"  • Best Crop Accuracy: {crop_results['class_accuracy'].max():.4f}")
+        print(f"  • Worst Crop Accuracy: {crop_results['class_accuracy'].min():.4f}")
+    
+    if disease_results is None:
+        print(f"\nDisease Detection Model: not evaluated (set DISEASE_EVAL_DIR to a labelled image folder)")
+    else:
+        generated.append('disease_confusion_matrix_analysis.png')
+        print(f"\nDisease Detection Model:")
+        print(f"  • Overall Accuracy: {disease_results['overall_accuracy']:.4f} ({disease_results['overall_accuracy']*100:.2f}%)")
+        print(f"  • Number of Diseases: {len(disease_results['disease_classes'])}")
+        print(f"  • Best Disease Accuracy: {disease_results['class_accuracy'].max():.4f}")
+        print(f"  • Worst Disease Accuracy: {disease_results['class_accuracy'].min():.4f}")
     
     print(f"\n✅ Analysis Complete! Confusion matrices saved as PNG files.")
     print(f"📊 Files generated:")
-    print(f"   • crop_confusion_matrix_analysis.png")
-    print(f"   • disease_confusion_matrix_analysis.png")
+    for name in generated:
+        print(f"   • {name}")
 
 if __name__ == "__main__":
     # Set up matplotlib for better display
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Columnar, memory-mapped cache of the AgriTech training datasets
+Each CSV is parsed once into one typed .npy file per column - string columns
+as integer category codes, floats as float32 where that is lossless, integers in the narrowest type
+that holds them - stored under a directory named after the SHA-256 of the
+source file. Later loads memory-map those arrays instead of re-parsing the
+CSV, and the cache is rebuilt automatically when the source file changes.
+load_dataset() widens the columns back to what pd.read_csv would return
+(float64, int64, strings), which copies them into ordinary memory; pass
+compact=True to keep the memory-mapped storage types where the caller
+converts the columns itself (model_evaluation.py does).
+
+Usage from a script:
+    from dataset_cache import load_dataset
+    df = load_dataset('Crop Recommendation/Crop_recommendation.csv')
+
+Command line:
+    python dataset_cache.py <csv> [<csv> ...]    # build/inspect cache entries
+    python dataset_cache.py --clear
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('DATASET_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'datasets'))
+FORMAT_VERSION = 2
+
+_index_lock = threading.Lock()
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _index_path(cache_dir):
+    return os.path.join(cache_dir, 'index.json')
+
+
+def _read_index(cache_dir):
+    try:
+        with open(_index_path(cache_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(cache_dir, index):
+    tmp_path = f'{_index_path(cache_dir)}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, _index_path(cache_dir))
+
+
+def source_digest(path, cache_dir=CACHE_DIR):
+    """
+    Content hash of a source CSV. The index remembers (size, mtime) per path,
+    so an unchanged file is not re-read just to hash it.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _index_lock:
+        index = _read_index(cache_dir)
+        entry = index.get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        digest = file_digest(path)
+        stale = entry['sha256'] if entry and entry['sha256'] != digest else None
+        index[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_index(cache_dir, index)
+    # Drop the columns built from the previous version unless another path shares them
+    if stale and all(e['sha256'] != stale for e in index.values()):
+        shutil.rmtree(os.path.join(cache_dir, stale[:16]), ignore_errors=True)
+    return digest
+
+
+def _narrow_int(values):
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if values.size == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return values.astype(dtype)
+    return values.astype(np.int64)
+
+
+def _encode_column(series):
+    """(array, column metadata) for one parsed CSV column"""
+    if pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.bool_), {"kind": "bool"}
+    if pd.api.types.is_integer_dtype(series):
+        return _narrow_int(series.to_numpy()), {"kind": "int"}
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype=np.float64)
+        narrow = values.astype(np.float32)
+        # Large or finely-fractional values (e.g. Area) would be rounded by float32
+        if np.array_equal(narrow, values, equal_nan=True):
+            values = narrow
+        return values, {"kind": "float"}
+    categorical = pd.Categorical(series)
+    codes = _narrow_int(np.asarray(categorical.codes, dtype=np.int64))  # -1 marks a missing value
+    return codes, {"kind": "category", "categories": [str(c) for c in categorical.categories]}
+
+
+def build_cache(path, directory, **read_csv_kwargs):
+    """Parse the CSV and write its columns into `directory` atomically"""
+    start = time.perf_counter()
+    df = pd.read_csv(path, **read_csv_kwargs)
+    tmp_dir = f'{directory}.{os.getpid()}.{threading.get_ident()}.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    columns = []
+    for position, name in enumerate(df.columns):
+        values, meta = _encode_column(df[name])
+        meta.update({"name": str(name), "file": f'{position:03d}.npy', "dtype": values.dtype.str})
+        np.save(os.path.join(tmp_dir, meta['file']), values)
+        columns.append(meta)
+    meta = {
+        "format": FORMAT_VERSION,
+        "source": os.path.abspath(path),
+        "rows": len(df),
+        "read_csv": {k: repr(v) for k, v in sorted(read_csv_kwargs.items())},
+        "columns": columns
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        # Another process finished the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"📦 Cached {os.path.basename(path)} ({len(df)} rows, {len(columns)} columns) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+class Dataset:
+    """Memory-mapped columns of one cached CSV"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.rows = self.meta['rows']
+        self.columns = [c['name'] for c in self.meta['columns']]
+        self._columns = {c['name']: c for c in self.meta['columns']}
+
+    def __len__(self):
+        return self.rows
+
+    def array(self, name):
+        """Raw read-only column: float/int values in their stored width, or category codes"""
+        column = self._columns[name]
+        return np.load(os.path.join(self.directory, column['file']), mmap_mode='r')
+
+    def categories(self, name):
+        return self._columns[name].get('categories')
+
+    def column(self, name):
+        """Column as a pandas object: numeric arrays stay memory-mapped, strings become Categoricals"""
+        values = self.array(name)
+        if self._columns[name]['kind'] == 'category':
+            return pd.Categorical.from_codes(values, self.categories(name))
+        return values
+
+    def to_numpy(self, columns=None, dtype=np.float64):
+        """Numeric columns stacked into one (rows, columns) matrix"""
+        columns = columns or [c for c in self.columns if self._columns[c]['kind'] != 'category']
+        out = np.empty((self.rows, len(columns)), dtype=dtype)
+        for i, name in enumerate(columns):
+            out[:, i] = self.array(name)
+        return out
+
+    def plain_column(self, name):
+        """Column as pd.read_csv parses it: float64, int64, bool, or strings with NaN for missing values"""
+        values = self.array(name)
+        kind = self._columns[name]['kind']
+        if kind == 'category':
+            labels = np.asarray(self.categories(name) + [np.nan], dtype=object)
+            return labels[values]  # code -1 picks the trailing NaN
+        if kind == 'float':
+            return values.astype(np.float64)
+        if kind == 'int':
+            return values.astype(np.int64)
+        return np.array(values)
+
+    def frame(self, columns=None, compact=False):
+        """
+        DataFrame with the same column order as the CSV. compact=True keeps the
+        memory-mapped storage types (float32, narrow ints) and Categoricals instead.
+        """
+        columns = columns or self.columns
+        column = self.column if compact else self.plain_column
+        return pd.DataFrame({name: column(name) for name in columns}, columns=columns, copy=False)
+
+
+def open_dataset(path, cache_dir=CACHE_DIR, **read_csv_kwargs):
+    """Dataset for a CSV, building its cache entry on first use or after the file changes"""
+    digest = source_digest(path, cache_dir)
+    # read_csv options change the parsed columns, so they are part of the key
+    options = json.dumps({k: repr(v) for k, v in sorted(read_csv_kwargs.items())})
+    key = hashlib.sha256(f'{digest}:{options}:{FORMAT_VERSION}'.encode('utf-8')).hexdigest()[:16]
+    directory = os.path.join(cache_dir, digest[:16], key)
+    if not os.path.exists(os.path.join(directory, 'meta.json')):
+        os.makedirs(os.path.dirname(directory), exist_ok=True)
+        build_cache(path, directory, **read_csv_kwargs)
+    return Dataset(directory)
+
+
+def load_dataset(path, cache_dir=CACHE_DIR, compact=False, **read_csv_kwargs):
+    """
+    Drop-in replacement for pd.read_csv backed by the columnar cache. Values are
+    widened back to float64/int64/strings unless compact=True (see Dataset.frame).
+    """
+    return open_dataset(path, cache_dir, **read_csv_kwargs).frame(compact=compact)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help='CSV files to cache and describe')
+    parser.add_argument('--clear', action='store_true', help=f'Delete {CACHE_DIR}')
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print(f"🧹 Cleared {CACHE_DIR}")
+    for path in args.paths:
+        start = time.perf_counter()
+        dataset = open_dataset(path)
+        elapsed = (time.perf_counter() - start) * 1000
+        size = sum(os.path.getsize(os.path.join(dataset.directory, c['file'])) for c in dataset.meta['columns'])
+        print(f"✅ {path}: {dataset.rows} rows, {size / 1e6:.2f} MB columnar, opened in {elapsed:.1f} ms")
+        for column in dataset.meta['columns']:
+            extra = f", {len(column['categories'])} categories" if column['kind'] == 'category' else ''
+            print(f"     {column['name']:32} {column['kind']:9} {np.dtype(column['dtype']).name}{extra}")
+    if not args.paths and not args.clear:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -27,6 +27,24 @@ document.getElementById('imageInput').addEventListener('change', function(e) {
 document.getElementById('analyzeBtn').addEventListener('click', () => analyzeImage(true));
 document.getElementById('quickAnalyzeBtn').addEventListener('click', () => analyzeImage(false));
 
+// Poll a queued vision analysis job until it is done, failed or cancelled
+async function waitForAnalysisJob(pollUrl) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 3000));
+        const response = await fetch(pollUrl);
+        const data = await response.json();
+        
+        if (data.status === 'queued' && data.queue_position > 1) {
+            const loadingP = document.querySelector('#loadingDiv p');
+            if (loadingP) {
+                loadingP.textContent = `⏳ Waiting in queue (position ${data.queue_position})...`;
+            }
+        } else if (data.status !== 'queued' && data.status !== 'running') {
+            return data;
+        }
+    }
+}
+
 async function analyzeImage(useVision = true) {
     if (!selectedImageBase64) {
         alert('Please select an image first');
@@ -99,16 +117,24 @@ async function analyzeImage(useVision = true) {
             })
         });
         
+        console.log('Response status:', response.status);
+        
+        let data = await response.json();
+        
+        // Vision analysis is queued on the server - poll the job until it finishes
+        if (response.status === 202) {
+            console.log('Analysis queued as job:', data.job_id);
+            data = await waitForAnalysisJob(data.poll_url);
+        }
+        
         const elapsed = ((Date.now() - startTime) / 1000).toFixed(1);
         console.log(`Response received in ${elapsed} seconds`);
-        console.log('Response status:', response.status);
         
         clearInterval(progressInterval);
         
-        const data = await response.json();
         console.log('Response data:', data);
         
-        if (response.ok) {
+        if (data.status === 'success') {
             console.log('Analysis successful, displaying results');
             displayResults(data.analysis);
         } else {
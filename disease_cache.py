@@ -0,0 +1,79 @@
+"""
+Content-addressed cache of plant disease analyses
+Results are keyed on the SHA-256 of the normalized image bytes plus the
+model build and analysis mode, optionally matching near-duplicate photos by
+perceptual hash, and are dropped when the model they came from changes
+"""
+
+import os
+import hashlib
+from result_cache import TTLCache
+
+def content_hash(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image):
+    """64-bit difference hash of a PIL image (robust to re-compression and resizing)"""
+    small = image.convert('L').resize((9, 8))
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+class DiseaseResultCache:
+    """Persistent LRU cache of analysis results keyed by image content, model build and mode"""
+
+    def __init__(self, maxsize=2000, ttl=30 * 24 * 3600, persist_path=None, phash_distance=None):
+        # Max Hamming distance between 64-bit dHashes to treat two photos as the same
+        # leaf; 0 disables near-duplicate matching. Read here rather than on import so
+        # a value from .env is seen.
+        if phash_distance is None:
+            phash_distance = int(os.environ.get('DISEASE_CACHE_PHASH_DISTANCE', 0))
+        self.phash_distance = phash_distance
+        self.near_hits = 0
+        self._cache = TTLCache('disease_analysis', maxsize=maxsize, ttl=ttl, persist_path=persist_path)
+
+    @staticmethod
+    def key(mode, model_version, image_hash=None):
+        # Text-only analysis never looks at the image, so it is shared by every upload
+        if image_hash is None:
+            return f"{mode}|{model_version}"
+        return f"{mode}|{model_version}|{image_hash}"
+
+    def get(self, mode, model_version, image_hash=None, phash=None):
+        """Return a cached result dict or None"""
+        entry = self._cache.get(self.key(mode, model_version, image_hash))
+        if entry is None and phash is not None and self.phash_distance > 0:
+            entry = self._cache.find(lambda k, v: (
+                v.get('model_version') == model_version
+                and v.get('mode') == mode
+                and v.get('phash') is not None
+                and bin(v['phash'] ^ phash).count('1') <= self.phash_distance
+            ))
+            if entry is not None:
+                self.near_hits += 1
+        return entry['result'] if entry else None
+
+    def put(self, mode, model_version, result, image_hash=None, phash=None):
+        self._cache.put(self.key(mode, model_version, image_hash), {
+            "mode": mode,
+            "model_version": model_version,
+            "phash": phash,
+            "result": result
+        })
+
+    def invalidate_stale(self, current_versions):
+        """Drop results produced by model builds that are no longer installed"""
+        dropped = self._cache.discard_where(lambda k, v: v.get('model_version') not in current_versions)
+        if dropped:
+            print(f"♻️ Dropped {dropped} cached disease analyses from replaced models")
+        return dropped
+
+    def stats(self):
+        return {**self._cache.stats(), "near_duplicate_hits": self.near_hits}
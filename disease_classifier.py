@@ -0,0 +1,222 @@
+"""
+Local CPU plant disease classifier built on PlantDiseaseNet (model.py)
+Loads the weights once per process and returns top-k PlantVillage classes
+with probabilities in milliseconds, so only uncertain images need the
+vision LLM
+"""
+
+import os
+import json
+import time
+import pickle
+import threading
+from micro_batcher import MicroBatcher
+
+# torch takes seconds to import, so it is loaded with the model on first use
+torch = None
+np = None
+
+
+def import_torch():
+    """Import torch and numpy on demand; False when torch is not installed (it is optional)"""
+    global torch, np
+    if torch is None:
+        try:
+            import torch as _torch
+            import numpy as _np
+        except ImportError:
+            return False
+        torch, np = _torch, _np
+    return True
+
+WEIGHTS_PATH = os.environ.get('PLANT_DISEASE_WEIGHTS', 'models/plant_disease_model.pth')
+# Optional frozen TorchScript artifact from optimize_disease_model.py; used instead of the eager weights.
+# Unset, the int8 build (--quantize) is preferred over the plain compiled one.
+ENGINE_PATH = os.environ.get('PLANT_DISEASE_ENGINE', '')
+ENGINE_CANDIDATES = ('models/plant_disease_model.int8.pt', 'models/plant_disease_model.ts.pt')
+LABELS_PATH = os.environ.get('PLANT_DISEASE_LABELS', '')
+INPUT_SIZE = int(os.environ.get('PLANT_DISEASE_INPUT_SIZE', 256))
+# Concurrent requests are classified together in one forward pass of up to
+# BATCH_MAX_SIZE images, waiting at most BATCH_MAX_WAIT_MS for the batch to fill
+BATCH_MAX_SIZE = int(os.environ.get('PLANT_DISEASE_BATCH_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get('PLANT_DISEASE_BATCH_WAIT_MS', 10))
+BATCH_WORKERS = int(os.environ.get('PLANT_DISEASE_BATCH_WORKERS', 1))
+# Top-k computed for every batched image; predict() slices it down
+MAX_TOP_K = 5
+
+# PlantVillage classes in ImageFolder (sorted) order, as used to train the 38-class model
+PLANT_DISEASE_CLASSES = [
+    "Apple___Apple_scab", "Apple___Black_rot", "Apple___Cedar_apple_rust", "Apple___healthy",
+    "Blueberry___healthy", "Cherry_(including_sour)___Powdery_mildew", "Cherry_(including_sour)___healthy",
+    "Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot", "Corn_(maize)___Common_rust_",
+    "Corn_(maize)___Northern_Leaf_Blight", "Corn_(maize)___healthy", "Grape___Black_rot",
+    "Grape___Esca_(Black_Measles)", "Grape___Leaf_blight_(Isariopsis_Leaf_Spot)", "Grape___healthy",
+    "Orange___Haunglongbing_(Citrus_greening)", "Peach___Bacterial_spot", "Peach___healthy",
+    "Pepper,_bell___Bacterial_spot", "Pepper,_bell___healthy", "Potato___Early_blight",
+    "Potato___Late_blight", "Potato___healthy", "Raspberry___healthy", "Soybean___healthy",
+    "Squash___Powdery_mildew", "Strawberry___Leaf_scorch", "Strawberry___healthy",
+    "Tomato___Bacterial_spot", "Tomato___Early_blight", "Tomato___Late_blight", "Tomato___Leaf_Mold",
+    "Tomato___Septoria_leaf_spot", "Tomato___Spider_mites Two-spotted_spider_mite", "Tomato___Target_Spot",
+    "Tomato___Tomato_Yellow_Leaf_Curl_Virus", "Tomato___Tomato_mosaic_virus", "Tomato___healthy"
+]
+
+
+def find_engine(candidates=ENGINE_CANDIDATES):
+    """First TorchScript artifact that exists, or '' when there is none"""
+    return next((path for path in candidates if os.path.exists(path)), '')
+
+
+def describe_label(label):
+    """Split 'Tomato___Early_blight' into a readable crop and condition"""
+    crop, _, condition = label.partition('___')
+    crop = crop.replace('_', ' ').replace(',', '').strip()
+    condition = condition.replace('_', ' ').strip()
+    return crop, condition
+
+
+def load_plant_disease_net(weights_path, num_classes=len(PLANT_DISEASE_CLASSES)):
+    """Build an eval-mode PlantDiseaseNet from a state_dict, checkpoint dict or pickled module"""
+    from model import PlantDiseaseNet
+
+    import_torch()
+    try:
+        checkpoint = torch.load(weights_path, map_location='cpu', weights_only=True)
+    except pickle.UnpicklingError as e:
+        # weights_only refuses the first class it meets; only a whole pickled
+        # PlantDiseaseNet is unpickled in full (which can run code from the file)
+        if 'PlantDiseaseNet' not in str(e):
+            raise
+        print(f"⚠️ {weights_path} is a pickled PlantDiseaseNet, not a state_dict; unpickling it in full. "
+              f"Only load trusted files, or re-save it with torch.save(model.state_dict(), ...)")
+        checkpoint = torch.load(weights_path, map_location='cpu', weights_only=False)
+    if isinstance(checkpoint, torch.nn.Module):
+        model = checkpoint
+    else:
+        if isinstance(checkpoint, dict) and 'state_dict' in checkpoint:
+            checkpoint = checkpoint['state_dict']
+        model = PlantDiseaseNet(num_classes=num_classes)
+        model.load_state_dict(checkpoint)
+    return model.eval()
+
+
+class DiseaseClassifier:
+    """Thread-safe, load-once wrapper around PlantDiseaseNet for CPU inference"""
+
+    def __init__(self, weights_path=WEIGHTS_PATH, labels_path=LABELS_PATH, input_size=INPUT_SIZE,
+                 engine_path=ENGINE_PATH, max_batch=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+                 batch_workers=BATCH_WORKERS):
+        self.weights_path = weights_path
+        self.engine_path = engine_path
+        self.engine = None  # 'torchscript' or 'eager' once loaded
+        self.labels_path = labels_path
+        self.input_size = input_size
+        self.labels = PLANT_DISEASE_CLASSES
+        self.model = None
+        self.load_ms = None
+        self.load_error = None
+        self._lock = threading.Lock()
+        self._attempted = False
+        self.batcher = MicroBatcher(
+            'plant_disease',
+            lambda arrays: self.predict_batch(arrays, top_k=MAX_TOP_K),
+            max_batch=max_batch, max_wait_ms=max_wait_ms, workers=batch_workers
+        )
+
+    @property
+    def available(self):
+        """True once the model is loaded (loads it on first call)"""
+        self.load()
+        return self.model is not None
+
+    def load(self):
+        """Load labels and weights once; failures are remembered, not retried per request"""
+        if self._attempted:
+            return
+        with self._lock:
+            if self._attempted:
+                return
+            self._attempted = True
+            self.engine_path = self.engine_path or find_engine()
+            if not import_torch():
+                self.load_error = "PyTorch is not installed"
+            elif not os.path.exists(self.weights_path) and not os.path.exists(self.engine_path):
+                self.load_error = f"Weights not found at {self.weights_path}"
+            else:
+                try:
+                    self._load_model()
+                except Exception as e:
+                    self.load_error = f"Failed to load weights: {e}"
+            if self.load_error:
+                print(f"⚠️ Local disease classifier disabled: {self.load_error}")
+
+    def _load_model(self):
+        start = time.perf_counter()
+        if self.labels_path:
+            with open(self.labels_path, encoding='utf-8') as f:
+                self.labels = json.load(f)
+
+        if self.engine_path and os.path.exists(self.engine_path):
+            # Frozen, BatchNorm-folded, channels_last (and possibly int8) TorchScript
+            self.model = torch.jit.load(self.engine_path, map_location='cpu')
+            self.engine = 'torchscript'
+        else:
+            self.model = load_plant_disease_net(self.weights_path, num_classes=len(self.labels))
+            self.engine = 'eager'
+        self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+        print(f"✅ Local disease classifier ({self.engine}) loaded in {self.load_ms} ms ({len(self.labels)} classes)")
+
+    def preprocess(self, image):
+        """PIL RGB image -> float32 CHW array scaled to [0, 1] (the training transform)"""
+        resized = image.convert('RGB').resize((self.input_size, self.input_size))
+        array = np.asarray(resized, dtype=np.float32) / 255.0
+        return array.transpose(2, 0, 1)
+
+    def predict_batch(self, arrays, top_k=3):
+        """Classify a list of preprocessed CHW arrays; returns one top-k list per image"""
+        # NHWC memory layout lets the oneDNN convolutions skip reorders
+        batch = torch.from_numpy(np.stack(arrays)).contiguous(memory_format=torch.channels_last)
+        with torch.inference_mode():
+            probabilities = torch.softmax(self.model(batch), dim=1)
+        values, indices = probabilities.topk(min(top_k, len(self.labels)), dim=1)
+        results = []
+        for row_values, row_indices in zip(values.tolist(), indices.tolist()):
+            predictions = []
+            for probability, index in zip(row_values, row_indices):
+                label = self.labels[index]
+                crop, condition = describe_label(label)
+                predictions.append({
+                    "label": label,
+                    "crop": crop,
+                    "condition": condition,
+                    "probability": round(probability, 4)
+                })
+            results.append(predictions)
+        return results
+
+    def predict(self, image, top_k=3):
+        """
+        Classify one PIL image through the micro-batcher, so concurrent requests
+        share a forward pass; returns {'predictions': [...], 'inference_ms': ...}
+        """
+        start = time.perf_counter()
+        predictions = self.batcher.run(self.preprocess(image))[:top_k]
+        return {
+            "predictions": predictions,
+            "inference_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+
+    def status(self):
+        self.load()
+        return {
+            "available": self.model is not None,
+            "engine": self.engine,
+            "weights_path": self.weights_path,
+            "classes": len(self.labels),
+            "load_ms": self.load_ms,
+            "error": self.load_error,
+            "batching": self.batcher.stats()
+        }
+
+
+# Process-wide classifier shared by every route
+classifier = DiseaseClassifier()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Single-process WSGI gateway for the AgriTech Flask services
+Mounts every service under its own path prefix in one interpreter, so numpy,
+pandas, sklearn and the Flask stack are loaded once instead of once per
+service. Each service is imported - and its models loaded - on the first
+request to its prefix, and /gateway/status reports per-service startup time
+and resident memory growth.
+
+Run:
+    python gateway.py                      # development server on GATEWAY_PORT (8000)
+    gunicorn gateway:application           # production
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import importlib.util
+from dotenv import load_dotenv
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Services may be mounted before the main app loads .env, and read their settings on import
+load_dotenv(os.path.join(BASE_DIR, '.env'))
+
+# (path prefix, service directory, module file); '' is the main AgriTech app
+SERVICES = [
+    ('', '.', 'app.py'),
+    ('/crop-recommendation', 'Crop Recommendation', 'app.py'),
+    ('/crop-yield', 'Crop Yield Prediction/crop_yield_app', 'app.py'),
+    ('/crop-planning', 'Crop_Planning', 'app.py'),
+    ('/forum', 'Forum', 'app.py'),
+    ('/labour-alerts', 'Labour_Alerts', 'app.py'),
+]
+# Comma-separated prefixes to import at startup instead of on first request
+PRELOAD = [p.strip() for p in os.environ.get('GATEWAY_PRELOAD', '').split(',') if p.strip()]
+
+# Services are imported one at a time, so the resident memory growth measured
+# around one import is not charged with another service's allocations
+_mount_lock = threading.Lock()
+
+
+def resident_memory():
+    """Resident set size of this process in bytes (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _json_response(start_response, status, payload):
+    body = json.dumps(payload, indent=2).encode('utf-8')
+    start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+    return [body]
+
+
+class LazyService:
+    """WSGI app that imports a service's Flask app on its first request"""
+
+    def __init__(self, prefix, directory, module_file='app.py'):
+        self.prefix = prefix or '/'
+        self.directory = os.path.join(BASE_DIR, directory)
+        self.module_path = os.path.join(self.directory, module_file)
+        slug = prefix.strip('/').replace('-', '_') or 'main'
+        self.module_name = f'agritech_service_{slug}'
+        self.app = None
+        self.error = None
+        self.startup_ms = None
+        self.memory_bytes = None  # RSS growth while importing (approximate: other requests keep running)
+
+    def load(self):
+        """Import the service module once; failures are remembered and reported"""
+        if self.app is not None or self.error is not None:
+            return self.app
+        with _mount_lock:
+            if self.app is not None or self.error is not None:
+                return self.app
+            rss_before = resident_memory()
+            start = time.perf_counter()
+            try:
+                # Lets the service import its sibling helper modules
+                if self.directory not in sys.path:
+                    sys.path.append(self.directory)
+                spec = importlib.util.spec_from_file_location(self.module_name, self.module_path)
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[self.module_name] = module
+                spec.loader.exec_module(module)
+                self.app = module.app
+            except Exception as e:
+                sys.modules.pop(self.module_name, None)
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"❌ Gateway could not load {self.prefix}: {self.error}")
+            self.startup_ms = round((time.perf_counter() - start) * 1000, 1)
+            rss_after = resident_memory()
+            if rss_before is not None and rss_after is not None:
+                self.memory_bytes = rss_after - rss_before
+            if self.app is not None:
+                print(f"✅ Mounted {self.prefix} in {self.startup_ms} ms")
+            return self.app
+
+    def __call__(self, environ, start_response):
+        app = self.load()
+        if app is None:
+            return _json_response(start_response, '503 Service Unavailable',
+                                  {"status": "error", "message": f"Service {self.prefix} failed to load",
+                                   "error": self.error})
+        return app(environ, start_response)
+
+    def status(self):
+        return {
+            "prefix": self.prefix,
+            "module": os.path.relpath(self.module_path, BASE_DIR),
+            "loaded": self.app is not None,
+            "startup_ms": self.startup_ms,
+            "memory_bytes": self.memory_bytes,
+            "error": self.error
+        }
+
+
+class Gateway:
+    """Dispatches by path prefix and serves /gateway/status itself"""
+
+    def __init__(self, services=SERVICES, preload=PRELOAD):
+        self.started_at = time.time()
+        self.services = [LazyService(prefix, directory, module_file) for prefix, directory, module_file in services]
+        mounts = {service.prefix: service for service in self.services if service.prefix != '/'}
+        root = next(service for service in self.services if service.prefix == '/')
+        self.dispatcher = DispatcherMiddleware(root, mounts)
+        for service in self.services:
+            if service.prefix in preload:
+                service.load()
+
+    def status(self):
+        return {
+            "status": "success",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "resident_memory_bytes": resident_memory(),
+            "services": [service.status() for service in self.services]
+        }
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') == '/gateway/status':
+            return _json_response(start_response, '200 OK', self.status())
+        return self.dispatcher(environ, start_response)
+
+
+application = Gateway()
+
+
+if __name__ == '__main__':
+    from werkzeug.serving import run_simple
+    port = int(os.environ.get('GATEWAY_PORT', 8000))
+    print(f"🌐 AgriTech gateway on http://127.0.0.1:{port} (status at /gateway/status)")
+    run_simple('0.0.0.0', port, application, threaded=True, use_reloader=False)
@@ -0,0 +1,105 @@
+"""
+Image normalization for AgriTech vision inference
+Decodes an uploaded image once, rejects non-images early, applies the EXIF
+orientation, caps the resolution to what the vision model uses, strips all
+metadata and re-encodes as JPEG
+"""
+
+import os
+import time
+import base64
+import binascii
+from io import BytesIO
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# llama3.2-vision tiles images into at most 2x2 tiles of 560px
+MAX_SIDE = int(os.environ.get('VISION_MAX_SIDE', 1120))
+JPEG_QUALITY = int(os.environ.get('VISION_JPEG_QUALITY', 85))
+MAX_UPLOAD_BYTES = int(os.environ.get('VISION_MAX_UPLOAD_BYTES', 15 * 1024 * 1024))
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'BMP', 'GIF', 'TIFF', 'MPO'}
+
+# Refuse decompression bombs well before Pillow's own warning threshold
+Image.MAX_IMAGE_PIXELS = 60_000_000
+
+
+class ImageRejected(ValueError):
+    """The upload is not a usable image"""
+
+
+class NormalizedImage:
+    """A decoded, resized, metadata-free RGB image plus preprocessing stats"""
+
+    def __init__(self, image, jpeg_bytes, original_bytes, original_size, preprocess_ms):
+        self.image = image
+        self.jpeg_bytes = jpeg_bytes
+        self.original_bytes = original_bytes
+        self.original_size = original_size
+        self.preprocess_ms = preprocess_ms
+
+    @property
+    def base64(self):
+        return base64.b64encode(self.jpeg_bytes).decode('ascii')
+
+    def stats(self):
+        """JSON-friendly preprocessing report"""
+        return {
+            "original_bytes": self.original_bytes,
+            "normalized_bytes": len(self.jpeg_bytes),
+            "bytes_saved": self.original_bytes - len(self.jpeg_bytes),
+            "original_size": list(self.original_size),
+            "normalized_size": list(self.image.size),
+            "preprocess_ms": self.preprocess_ms
+        }
+
+
+def decode_base64_image(image_data):
+    """Decode base64 (with or without a data URL prefix) into raw bytes"""
+    if not isinstance(image_data, str) or not image_data:
+        raise ImageRejected("No image provided")
+    if ',' in image_data:
+        image_data = image_data.split(',', 1)[1]
+    # base64 inflates by 4/3 - check before decoding to avoid the allocation
+    if len(image_data) * 3 // 4 > MAX_UPLOAD_BYTES:
+        raise ImageRejected(f"Image too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)")
+    try:
+        return base64.b64decode(image_data, validate=True)
+    except (binascii.Error, ValueError):
+        raise ImageRejected("Image is not valid base64 data")
+
+
+def normalize_image(image_data, max_side=MAX_SIDE, quality=JPEG_QUALITY):
+    """Normalize a base64 upload into a NormalizedImage; raises ImageRejected"""
+    start = time.perf_counter()
+    raw = decode_base64_image(image_data)
+
+    try:
+        image = Image.open(BytesIO(raw))
+        if image.format not in ALLOWED_FORMATS:
+            raise ImageRejected(f"Unsupported image format: {image.format}")
+        original_size = image.size
+        # JPEG can decode straight to a reduced scale, skipping most of the IDCT work
+        image.draft('RGB', (max_side, max_side))
+        image.load()
+    except ImageRejected:
+        raise
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise ImageRejected(f"File is not a readable image: {e}")
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Flatten transparency onto white instead of black
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    out = BytesIO()
+    # No exif= argument, so every metadata block is dropped
+    image.save(out, format='JPEG', quality=quality, optimize=True)
+    jpeg_bytes = out.getvalue()
+
+    preprocess_ms = round((time.perf_counter() - start) * 1000, 1)
+    return NormalizedImage(image, jpeg_bytes, len(raw), original_size, preprocess_ms)
@@ -0,0 +1,173 @@
+"""
+Background job queue for slow AI work in AgriTech Flask applications
+A bounded worker pool runs submitted jobs while clients poll for the result,
+with queue-position reporting, cancellation and result retention with expiry
+"""
+
+import os
+import time
+import uuid
+import threading
+from collections import deque
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """Too many jobs are already waiting"""
+
+
+class Job:
+    """One unit of work and its outcome"""
+
+    def __init__(self, fn, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.version = 0  # Bumped on every state change so waiters can detect it
+        self.meta = {}  # Caller-owned extras reported alongside the job
+
+
+class JobQueue:
+    """
+    FIFO job queue served by a fixed number of daemon worker threads.
+    Finished jobs are kept for `retention` seconds so clients can fetch them.
+    """
+
+    def __init__(self, name, workers=1, max_pending=20, retention=900):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self._pending = deque()
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._pid = None
+
+    def _ensure_workers(self):
+        """Start the worker threads once per process (also after a fork)"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"{self.name}-worker-{i}", daemon=True).start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return its Job; raises QueueFull when saturated"""
+        job = Job(fn, args, kwargs)
+        with self._cond:
+            self._ensure_workers()
+            self._purge_expired()
+            if len(self._pending) >= self.max_pending:
+                raise QueueFull(f"{self.name} queue is full ({self.max_pending} jobs waiting)")
+            self._pending.append(job)
+            self._jobs[job.id] = job
+            self._cond.notify_all()
+        return job
+
+    def get(self, job_id):
+        """Return the job or None if unknown or expired"""
+        with self._cond:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def position(self, job):
+        """1-based place in the queue, 0 once the job has started"""
+        with self._cond:
+            return self._position(job)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. Queued jobs never run; a running job's result is discarded
+        when it finishes. Returns the job, or None if unknown.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED_STATES:
+                return job
+            if job.state == QUEUED:
+                self._pending.remove(job)
+            self._finish(job, CANCELLED)
+            return job
+
+    def wait(self, job, seen, timeout):
+        """
+        Block until the job's (version, queue position) differs from seen
+        or timeout expires, and return the current pair.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: (job.version, self._position(job)) != seen, timeout=timeout)
+            return job.version, self._position(job)
+
+    def stats(self):
+        with self._cond:
+            running = sum(1 for j in self._jobs.values() if j.state == RUNNING)
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "pending": len(self._pending),
+                "running": running,
+                "retained": len(self._jobs)
+            }
+
+    def _position(self, job):
+        # Caller holds self._cond
+        try:
+            return self._pending.index(job) + 1
+        except ValueError:
+            return 0
+
+    def _finish(self, job, state, result=None, error=None):
+        # Caller holds self._cond
+        job.state = state
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.fn = job.args = job.kwargs = None  # Drop the (possibly large) inputs
+        job.version += 1
+        self._cond.notify_all()
+
+    def _purge_expired(self):
+        # Caller holds self._cond
+        cutoff = time.time() - self.retention
+        expired = [j.id for j in self._jobs.values()
+                   if j.state in FINISHED_STATES and j.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                job = self._pending.popleft()
+                job.state = RUNNING
+                job.started_at = time.time()
+                job.version += 1
+                fn, args, kwargs = job.fn, job.args, job.kwargs
+                # Everyone behind this job moved up one place
+                self._cond.notify_all()
+
+            try:
+                result, error = fn(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+
+            with self._cond:
+                if job.state == CANCELLED:
+                    continue
+                if error is None:
+                    self._finish(job, DONE, result=result)
+                else:
+                    self._finish(job, FAILED, error=error)
@@ -0,0 +1,136 @@
+"""
+Dynamic micro-batching for model inference in AgriTech Flask applications
+Concurrent requests are collected for up to max_wait_ms or max_batch items,
+run through one batched call on a worker thread and the results are handed
+back to each waiting caller
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads into batches for batch_fn.
+    batch_fn(list_of_items) must return one result per item, in order.
+    """
+
+    def __init__(self, name, batch_fn, max_batch=16, max_wait_ms=10, workers=1, history=500):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self.workers = max(1, workers)
+        self._pending = deque()  # (item, future, enqueued_at)
+        self._cond = threading.Condition()
+        self._pid = None
+        self.batches = 0
+        self.items = 0
+        self.failures = 0
+        self._history = deque(maxlen=history)  # (batch size, batch ms, max queue wait ms)
+
+    def _ensure_workers(self):
+        """Start the worker threads once per process (also after a fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._run, name=f'{self.name}-batcher-{i}', daemon=True).start()
+
+    def submit(self, item):
+        """Queue one item; returns a concurrent.futures.Future for its result"""
+        self._ensure_workers()
+        future = Future()
+        with self._cond:
+            self._pending.append((item, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def run(self, item, timeout=None):
+        """Submit one item and block until its result is ready"""
+        return self.submit(item).result(timeout=timeout)
+
+    def _next_batch(self):
+        """Wait for a first item, then keep collecting until the batch is full or max_wait passes"""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._pending), self.max_batch)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            start = time.perf_counter()
+            queue_wait_ms = (start - batch[0][2]) * 1000
+            try:
+                results = self.batch_fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                self.failures += 1
+                print(f"❌ {self.name} batch of {len(batch)} failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            batch_ms = (time.perf_counter() - start) * 1000
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            with self._cond:
+                self.batches += 1
+                self.items += len(batch)
+                self._history.append((len(batch), batch_ms, queue_wait_ms))
+
+    def stats(self):
+        """Batch size and latency metrics over the recent batch history"""
+        with self._cond:
+            history = list(self._history)
+            queued = len(self._pending)
+            batches, items = self.batches, self.items
+
+        def percentile(values, fraction):
+            if not values:
+                return None
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 2)
+
+        sizes = [size for size, _, _ in history]
+        latencies = [ms for _, ms, _ in history]
+        waits = [wait for _, _, wait in history]
+        size_histogram = {}
+        for size in sizes:
+            size_histogram[size] = size_histogram.get(size, 0) + 1
+        return {
+            "name": self.name,
+            "max_batch": self.max_batch,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "workers": self.workers,
+            "queued": queued,
+            "batches": batches,
+            "items": items,
+            "failures": self.failures,
+            "mean_batch_size": round(items / batches, 2) if batches else 0.0,
+            "recent": {
+                "batches": len(history),
+                "batch_size_histogram": dict(sorted(size_histogram.items())),
+                "batch_ms_p50": percentile(latencies, 0.5),
+                "batch_ms_p95": percentile(latencies, 0.95),
+                "queue_wait_ms_p50": percentile(waits, 0.5),
+                "queue_wait_ms_p95": percentile(waits, 0.95)
+            }
+        }
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Held-out evaluation engine for the AgriTech models
+Every saved model is scored with k-fold cross-validation: each fold refits a
+clone of the model's configuration on the other folds and predicts the rows
+it never saw, so no metric is computed on training data. The folds of all
+models run in parallel across cores, and the out-of-fold predictions are
+cached on disk keyed by (model file hash, data hash) so reports regenerate in
+seconds until the model or dataset changes. Metrics are written as JSON.
+
+The plant disease CNN is pretrained rather than refitted here; it is scored
+on a labelled image folder (one sub-directory per class) when
+DISEASE_EVAL_DIR is set.
+
+Usage:
+    python model_evaluation.py                     # all models -> model_metrics.json
+    python model_evaluation.py crop_yield --folds 10 --no-cache
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import numpy as np
+from joblib import Parallel, delayed
+from model_registry import file_digest, load_pickle
+from dataset_cache import load_dataset
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('EVAL_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'evaluation'))
+METRICS_PATH = os.environ.get('EVAL_METRICS_PATH', os.path.join(BASE_DIR, 'model_metrics.json'))
+N_FOLDS = int(os.environ.get('EVAL_FOLDS', 5))
+N_JOBS = int(os.environ.get('EVAL_JOBS', -1))
+DISEASE_EVAL_DIR = os.environ.get('DISEASE_EVAL_DIR')
+SEED = 42
+
+CROP_DIR = os.path.join(BASE_DIR, 'Crop Recommendation')
+YIELD_DIR = os.path.join(BASE_DIR, 'Crop Yield Prediction')
+FERTILIZER_DIR = os.path.join(BASE_DIR, 'Fertiliser Recommendation System')
+CROP_FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+class EvaluationTask:
+    """A saved model and the labelled rows it is evaluated on"""
+
+    def __init__(self, name, kind, model_path, model, X, y, class_names=None, skipped_rows=0):
+        self.name = name
+        self.kind = kind  # 'classification' or 'regression'
+        self.model_path = model_path
+        self.model = model
+        self.X = X
+        self.y = y
+        self.class_names = class_names
+        self.skipped_rows = skipped_rows
+        self.folds = None
+        self.predictions = None
+        self.fold_seconds = None
+        self.cached = False
+
+
+def crop_recommendation_task():
+    model_path = os.path.join(CROP_DIR, 'model', 'rf_model.pkl')
+    label_encoder = load_pickle(os.path.join(CROP_DIR, 'model', 'label_encoder.pkl'))
+    # compact: the memory-mapped columns are converted to float64/object arrays below anyway
+    df = load_dataset(os.path.join(CROP_DIR, 'Crop_recommendation.csv'), compact=True)
+    X = df[CROP_FEATURES].to_numpy(dtype=np.float64)
+    y = label_encoder.transform(np.asarray(df['label'], dtype=object))
+    return EvaluationTask('crop_recommendation', 'classification', model_path, load_pickle(model_path),
+                          X, y, [str(c) for c in label_encoder.classes_])
+
+
+def crop_yield_task():
+    app_dir = os.path.join(YIELD_DIR, 'crop_yield_app')
+    if app_dir not in sys.path:
+        sys.path.append(app_dir)
+    from category_lookup import compile_yield_lookups
+
+    model_dir = os.path.join(app_dir, 'models')
+    model_path = os.path.join(model_dir, 'xgb_crop_model.pkl')
+    lookups = compile_yield_lookups(*(load_pickle(os.path.join(model_dir, f'{name}_encoder.pkl'))
+                                      for name in ('Crop', 'Season', 'State')))
+    df = load_dataset(os.path.join(YIELD_DIR, 'Datasets', 'crop_yield.csv'), compact=True)
+    codes = {}
+    known = np.ones(len(df), dtype=bool)
+    for field, column in (('crop', 'Crop'), ('season', 'Season'), ('state', 'State')):
+        codes[field], field_known = lookups[field].encode_array(np.asarray(df[column], dtype=object).tolist())
+        known &= field_known
+    # Same column order as the prediction endpoints
+    X = np.column_stack([
+        codes['crop'], df['Crop_Year'], codes['season'], codes['state'],
+        df['Area'], df['Annual_Rainfall'], df['Production']
+    ]).astype(np.float64)[known]
+    y = np.asarray(df['Yield'], dtype=np.float64)[known]
+    return EvaluationTask('crop_yield', 'regression', model_path, load_pickle(model_path), X, y,
+                          skipped_rows=int((~known).sum()))
+
+
+def fertilizer_task():
+    model_dir = os.path.join(FERTILIZER_DIR, 'saved_model')
+    model_path = os.path.join(model_dir, 'fertilizer_model.pkl')
+    soil_encoder = load_pickle(os.path.join(model_dir, 'soil_encoder.pkl'))
+    crop_encoder = load_pickle(os.path.join(model_dir, 'crop_encoder.pkl'))
+    fertilizer_encoder = load_pickle(os.path.join(model_dir, 'fertilizer_encoder.pkl'))
+    df = load_dataset(os.path.join(FERTILIZER_DIR, 'data', 'fertilizer_dataset.csv'), compact=True)
+    # Training feature order (see src/model.py FEATURE_COLUMNS)
+    X = np.column_stack([
+        df['Temparature'], df['Humidity '], df['Moisture'],
+        soil_encoder.transform(np.asarray(df['Soil Type'], dtype=object)),
+        crop_encoder.transform(np.asarray(df['Crop Type'], dtype=object)),
+        df['Nitrogen'], df['Potassium'], df['Phosphorous']
+    ]).astype(np.float64)
+    y = fertilizer_encoder.transform(np.asarray(df['Fertilizer Name'], dtype=object))
+    return EvaluationTask('fertilizer', 'classification', model_path, load_pickle(model_path),
+                          X, y, [str(c) for c in fertilizer_encoder.classes_])
+
+
+TASKS = {
+    'crop_recommendation': crop_recommendation_task,
+    'crop_yield': crop_yield_task,
+    'fertilizer': fertilizer_task
+}
+
+
+def fold_assignments(task, n_folds):
+    """Fold number of every row; stratified when every class has at least n_folds rows"""
+    from sklearn.model_selection import KFold, StratifiedKFold
+    splitter = KFold(n_splits=n_folds, shuffle=True, random_state=SEED)
+    if task.kind == 'classification' and np.unique(task.y, return_counts=True)[1].min() >= n_folds:
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=SEED)
+    folds = np.empty(len(task.y), dtype=np.int16)
+    for fold, (_, test_index) in enumerate(splitter.split(task.X, task.y)):
+        folds[test_index] = fold
+    return folds
+
+
+def data_digest(*arrays):
+    """SHA-256 over the dtype, shape and bytes of each array"""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f'{array.dtype.str}{array.shape}'.encode('utf-8'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _fit_predict_fold(estimator, X, y, folds, fold):
+    """Fit an unfitted clone on every other fold and predict this one"""
+    start = time.perf_counter()
+    train = folds != fold
+    estimator.fit(X[train], y[train])
+    return estimator.predict(X[folds == fold]), time.perf_counter() - start
+
+
+def _fold_estimator(model):
+    """Unfitted single-threaded clone; the folds themselves already run in parallel"""
+    from sklearn.base import clone
+    estimator = clone(model)
+    if 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=1)
+    return estimator
+
+
+def _cache_path(name, model_sha256, data_sha256):
+    return os.path.join(CACHE_DIR, f'{name}-{model_sha256[:12]}-{data_sha256[:12]}.npz')
+
+
+def _load_cached(path):
+    try:
+        with np.load(path) as cached:
+            return cached['predictions'], cached['fold_seconds']
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_cached(path, predictions, fold_seconds):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, predictions=predictions, fold_seconds=fold_seconds)
+    os.replace(tmp_path, path)
+
+
+def classification_metrics(y_true, y_pred, class_names, folds=None):
+    from sklearn.metrics import accuracy_score, precision_recall_fscore_support, confusion_matrix
+    labels = np.arange(len(class_names))
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        y_true, y_pred, labels=labels, average='weighted', zero_division=0
+    )
+    cm = confusion_matrix(y_true, y_pred, labels=labels)
+    per_class = cm.diagonal() / np.maximum(cm.sum(axis=1), 1)
+    fold_scores = [] if folds is None else [
+        float(accuracy_score(y_true[folds == fold], y_pred[folds == fold])) for fold in np.unique(folds)
+    ]
+    return {
+        "samples": int(len(y_true)),
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "precision": float(precision),
+        "recall": float(recall),
+        "f1_score": float(f1),
+        "cv_mean": float(np.mean(fold_scores)) if fold_scores else None,
+        "cv_std": float(np.std(fold_scores)) if fold_scores else None,
+        "fold_scores": fold_scores,
+        "classes": list(class_names),
+        "per_class_accuracy": {name: float(acc) for name, acc in zip(class_names, per_class)},
+        "confusion_matrix": cm.tolist()
+    }
+
+
+def regression_metrics(y_true, y_pred, folds):
+    from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+    fold_scores = [float(r2_score(y_true[folds == fold], y_pred[folds == fold])) for fold in np.unique(folds)]
+    nonzero = y_true != 0
+    within_10pct = np.abs(y_pred - y_true)[nonzero] <= 0.1 * np.abs(y_true[nonzero])
+    return {
+        "samples": int(len(y_true)),
+        "r2_score": float(r2_score(y_true, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "accuracy_10pct": float(within_10pct.mean()) if within_10pct.size else None,
+        "cv_mean": float(np.mean(fold_scores)),
+        "cv_std": float(np.std(fold_scores)),
+        "fold_scores": fold_scores
+    }
+
+
+def _result(task, metrics):
+    metrics.update({
+        "model_file": os.path.relpath(task.model_path, BASE_DIR),
+        "model_sha256": task.model_sha256,
+        "data_sha256": task.data_sha256,
+        "skipped_rows": task.skipped_rows,
+        "cached": task.cached,
+        "fit_seconds": round(float(np.sum(task.fold_seconds)), 2)
+    })
+    return {
+        "metrics": metrics,
+        "y_true": task.y,
+        "y_pred": task.predictions,
+        "folds": task.folds,
+        "class_names": task.class_names
+    }
+
+
+def evaluate_models(names=None, n_folds=N_FOLDS, n_jobs=N_JOBS, use_cache=True):
+    """
+    Cross-validate the named models (default: all). Returns
+    {name: {'metrics', 'y_true', 'y_pred', 'folds', 'class_names'}}; a model
+    that cannot be loaded gets {'metrics': {'error': ...}} instead.
+    """
+    names = names or list(TASKS) + (['plant_disease'] if DISEASE_EVAL_DIR else [])
+    results = {}
+    pending = []
+    for name in names:
+        if name not in TASKS and name != 'plant_disease':
+            raise ValueError(f"Unknown model: {name}. Expected one of: {', '.join(TASKS)}, plant_disease")
+        try:
+            if name == 'plant_disease':
+                results[name] = evaluate_disease_classifier(use_cache=use_cache)
+                continue
+            task = TASKS[name]()
+        except Exception as e:
+            print(f"⚠️ Skipping {name}: {type(e).__name__}: {e}")
+            results[name] = {"metrics": {"error": f"{type(e).__name__}: {e}"}}
+            continue
+        task.folds = fold_assignments(task, n_folds)
+        task.model_sha256 = file_digest(task.model_path)
+        task.data_sha256 = data_digest(task.X, task.y, task.folds)
+        task.cache_path = _cache_path(name, task.model_sha256, task.data_sha256)
+        cached = _load_cached(task.cache_path) if use_cache else None
+        if cached is not None:
+            task.predictions, task.fold_seconds = cached
+            task.cached = True
+        else:
+            pending.append(task)
+        results[name] = task
+
+    # One parallel pass over the folds of every model that is not cached
+    jobs = [(task, fold) for task in pending for fold in range(n_folds)]
+    if jobs:
+        start = time.perf_counter()
+        print(f"⏳ Fitting {len(jobs)} folds for {', '.join(t.name for t in pending)}...")
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_predict_fold)(_fold_estimator(task.model), task.X, task.y, task.folds, fold)
+            for task, fold in jobs
+        )
+        for task in pending:
+            dtype = np.float64 if task.kind == 'regression' else task.y.dtype
+            task.predictions = np.empty(len(task.y), dtype=dtype)
+            task.fold_seconds = np.zeros(n_folds)
+        for (task, fold), (predictions, seconds) in zip(jobs, outputs):
+            task.predictions[task.folds == fold] = predictions
+            task.fold_seconds[fold] = seconds
+        for task in pending:
+            _save_cached(task.cache_path, task.predictions, task.fold_seconds)
+        print(f"✅ Cross-validation finished in {time.perf_counter() - start:.1f}s")
+
+    for name, task in results.items():
+        if isinstance(task, EvaluationTask):
+            if task.kind == 'classification':
+                metrics = classification_metrics(task.y, task.predictions, task.class_names, task.folds)
+            else:
+                metrics = regression_metrics(task.y, task.predictions, task.folds)
+            results[name] = _result(task, metrics)
+    return results
+
+
+def evaluate_disease_classifier(image_dir=DISEASE_EVAL_DIR, use_cache=True, batch_size=32):
+    """Score the plant disease classifier on a labelled image folder (<image_dir>/<class label>/*.jpg)"""
+    if not image_dir or not os.path.isdir(image_dir):
+        raise FileNotFoundError("Set DISEASE_EVAL_DIR to a folder with one sub-directory of images per class")
+    from PIL import Image
+    from disease_classifier import DiseaseClassifier
+
+    classifier = DiseaseClassifier()
+    if not classifier.available:
+        raise RuntimeError(classifier.load_error)
+    index = {label: i for i, label in enumerate(classifier.labels)}
+    paths, y, skipped = [], [], 0
+    for label in sorted(os.listdir(image_dir)):
+        class_dir = os.path.join(image_dir, label)
+        if not os.path.isdir(class_dir):
+            continue
+        files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+        if label not in index:
+            skipped += len(files)
+            continue
+        paths.extend(os.path.join(class_dir, f) for f in files)
+        y.extend([index[label]] * len(files))
+    y = np.asarray(y, dtype=np.int64)
+
+    model_path = classifier.engine_path if classifier.engine == 'torchscript' else classifier.weights_path
+    task = EvaluationTask('plant_disease', 'classification', model_path, classifier, paths, y,
+                          list(classifier.labels), skipped_rows=skipped)
+    task.model_sha256 = file_digest(model_path)
+    listing = '\n'.join(f'{os.path.relpath(p, image_dir)}:{os.path.getsize(p)}:{os.stat(p).st_mtime_ns}' for p in paths)
+    task.data_sha256 = data_digest(np.frombuffer(listing.encode('utf-8'), dtype=np.uint8), y)
+    cache_path = _cache_path(task.name, task.model_sha256, task.data_sha256)
+    cached = _load_cached(cache_path) if use_cache else None
+    if cached is not None:
+        task.predictions, task.fold_seconds = cached
+        task.cached = True
+    else:
+        start = time.perf_counter()
+        predictions = []
+        for i in range(0, len(paths), batch_size):
+            arrays = []
+            for path in paths[i:i + batch_size]:
+                with Image.open(path) as image:
+                    arrays.append(classifier.preprocess(image))
+            predictions.extend(index[top[0]['label']] for top in classifier.predict_batch(arrays, top_k=1))
+        task.predictions = np.asarray(predictions, dtype=np.int64)
+        task.fold_seconds = np.array([time.perf_counter() - start])
+        _save_cached(cache_path, task.predictions, task.fold_seconds)
+    return _result(task, classification_metrics(y, task.predictions, task.class_names))
+
+
+def write_metrics(results, path=METRICS_PATH, n_folds=N_FOLDS):
+    """Machine-readable metrics for every evaluated model"""
+    payload = {
+        "generated_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "folds": n_folds,
+        "models": {name: result['metrics'] for name, result in results.items()}
+    }
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('models', nargs='*', help=f"Models to evaluate ({', '.join(TASKS)}, plant_disease)")
+    parser.add_argument('--folds', type=int, default=N_FOLDS, help='Cross-validation folds')
+    parser.add_argument('--jobs', type=int, default=N_JOBS, help='Parallel fold fits (-1 = all cores)')
+    parser.add_argument('--output', default=METRICS_PATH, help='Metrics JSON path')
+    parser.add_argument('--no-cache', action='store_true', help='Refit every fold even if cached')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = evaluate_models(args.models, n_folds=args.folds, n_jobs=args.jobs, use_cache=not args.no_cache)
+    for name, result in results.items():
+        metrics = result['metrics']
+        if 'error' in metrics:
+            print(f"❌ {name:20} {metrics['error']}")
+        elif 'r2_score' in metrics:
+            print(f"✅ {name:20} R² {metrics['r2_score']:.4f}  RMSE {metrics['rmse']:.3f}  "
+                  f"MAE {metrics['mae']:.3f}{'  (cached)' if metrics['cached'] else ''}")
+        else:
+            print(f"✅ {name:20} accuracy {metrics['accuracy']:.4f}  F1 {metrics['f1_score']:.4f}"
+                  f"{'  (cached)' if metrics['cached'] else ''}")
+    print(f"📄 Metrics written to {write_metrics(results, args.output, args.folds)} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Load-once registry of pickled model artifacts for AgriTech Flask applications
+Each artifact is unpickled once per process and shared across threads; when
+the file on disk changes (mtime/size, confirmed by content hash) it is
+reloaded and swapped in atomically
+"""
+
+import os
+import time
+import hashlib
+import threading
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_pickle(path):
+    """joblib.load, imported on first use so importing this module stays cheap"""
+    import joblib
+    return joblib.load(path)
+
+
+class LoadedModel:
+    """One load of an artifact: the object plus where and when it came from"""
+
+    def __init__(self, name, path, obj, sha256, mtime, size, load_ms):
+        self.name = name
+        self.path = path
+        self.obj = obj
+        self.sha256 = sha256
+        self.mtime = mtime
+        self.size = size
+        self.load_ms = load_ms
+        self.loaded_at = time.time()
+
+    @property
+    def version(self):
+        return self.sha256[:12]
+
+    def info(self):
+        return {
+            "name": self.name,
+            "path": self.path,
+            "version": self.version,
+            "sha256": self.sha256,
+            "size_bytes": self.size,
+            "modified_at": self.mtime,
+            "loaded_at": self.loaded_at,
+            "load_ms": self.load_ms
+        }
+
+
+class ModelRegistry:
+    """
+    Name -> artifact registry. get(name) returns the current LoadedModel,
+    loading it on first use and reloading it when the file has changed.
+    """
+
+    def __init__(self, check_interval=None):
+        # Seconds between stat() checks of an artifact for hot reload; None reads
+        # MODEL_REGISTRY_CHECK_INTERVAL on first use, after the app has loaded .env
+        self.check_interval = check_interval
+        self._specs = {}    # name -> (path, loader)
+        self._loaded = {}   # name -> LoadedModel
+        self._checked = {}  # name -> last stat() time
+        self._locks = {}    # name -> load lock
+        self.reloads = 0
+
+    def register(self, name, path, loader=load_pickle):
+        """Declare an artifact; nothing is read until it is first requested"""
+        self._specs[name] = (path, loader)
+        self._locks[name] = threading.Lock()
+
+    def exists(self, name):
+        return os.path.exists(self._specs[name][0])
+
+    def get(self, name):
+        """Return the LoadedModel for name (raises FileNotFoundError when missing)"""
+        current = self._loaded.get(name)
+        now = time.time()
+        if self.check_interval is None:
+            self.check_interval = float(os.environ.get('MODEL_REGISTRY_CHECK_INTERVAL', 2))
+        if current is not None and now - self._checked.get(name, 0) < self.check_interval:
+            return current
+
+        path, loader = self._specs[name]
+        with self._locks[name]:
+            current = self._loaded.get(name)
+            stat = os.stat(path)
+            self._checked[name] = now
+            if current is not None and (stat.st_mtime, stat.st_size) == (current.mtime, current.size):
+                return current
+
+            sha256 = file_digest(path)
+            if current is not None and sha256 == current.sha256:
+                # Touched but not changed - keep the loaded object
+                current.mtime, current.size = stat.st_mtime, stat.st_size
+                return current
+
+            start = time.perf_counter()
+            obj = loader(path)
+            load_ms = round((time.perf_counter() - start) * 1000, 1)
+            loaded = LoadedModel(name, path, obj, sha256, stat.st_mtime, stat.st_size, load_ms)
+            self._loaded[name] = loaded  # Single assignment, so readers see the old or the new model
+            if current is not None:
+                self.reloads += 1
+                print(f"♻️ Reloaded {name} ({current.version} -> {loaded.version}) in {load_ms} ms")
+            else:
+                print(f"✅ Loaded {name} ({loaded.version}) in {load_ms} ms")
+            return loaded
+
+    def get_many(self, *names):
+        return [self.get(name) for name in names]
+
+    def listing(self):
+        """JSON-friendly view of every registered artifact for /api/models"""
+        models = []
+        for name, (path, _) in self._specs.items():
+            loaded = self._loaded.get(name)
+            if loaded is not None:
+                models.append({**loaded.info(), "loaded": True})
+            else:
+                models.append({"name": name, "path": path, "loaded": False, "exists": os.path.exists(path)})
+        return models
+
+
+# Process-wide registry shared by every route
+models = ModelRegistry()
@@ -0,0 +1,244 @@
+"""
+Shared Ollama client for AgriTech Flask applications
+Provides a pooled keep-alive session, per-model concurrency limits,
+per-route timeout budgets and a single error taxonomy
+"""
+
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from single_flight import SingleFlight
+
+OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
+
+# Connection pool size - one keep-alive socket per concurrent generation is plenty
+POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE', 10))
+
+# How many generations may run against one model at the same time.
+# Ollama serializes work per model anyway, so extra requests only queue up
+# inside Ollama while holding a Flask worker and a socket.
+DEFAULT_MODEL_CONCURRENCY = int(os.environ.get('OLLAMA_MODEL_CONCURRENCY', 2))
+MODEL_CONCURRENCY = {
+    "llama3.2-vision:latest": 1,
+}
+
+# Seconds allowed to open a TCP connection to Ollama
+CONNECT_TIMEOUT = 5
+
+# Read timeout budget (seconds) per route
+ROUTE_TIMEOUTS = {
+    "startup": 5,
+    "status": 5,
+    "predict": 180,
+    "crop_requirements": 120,
+    "chat": 60,
+    "chat_fallback": 120,
+    "loan": 120,
+    "disease_text": 120,
+    "disease_vision": 600,
+    "default": 120,
+}
+
+
+class OllamaError(Exception):
+    """Base class for every failure while talking to Ollama"""
+    status_code = 500
+    user_message = "AI service temporarily unavailable"
+
+
+class OllamaTimeout(OllamaError):
+    """Ollama did not answer within the route's timeout budget"""
+    user_message = "AI service timeout - please try again"
+
+
+class OllamaConnectionError(OllamaError):
+    """Ollama is not reachable (not running or wrong base URL)"""
+    user_message = "AI service unavailable - please ensure Ollama is running"
+
+
+class OllamaBusy(OllamaError):
+    """All concurrency slots for the model stayed taken for the whole budget"""
+    status_code = 503
+    user_message = "AI service is busy - please try again shortly"
+
+
+class OllamaResponseError(OllamaError):
+    """Ollama answered with a non-200 status"""
+
+    def __init__(self, upstream_status, body=''):
+        super().__init__(f"Ollama API error: {upstream_status}")
+        self.upstream_status = upstream_status
+        self.body = body
+
+
+_session = None
+_session_lock = threading.Lock()
+_model_slots = {}
+_model_slots_lock = threading.Lock()
+
+# Identical concurrent generations share one upstream call
+generations = SingleFlight('ollama')
+
+
+def get_session():
+    """Return the process-wide pooled keep-alive session"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def get_timeout(route):
+    """Return the (connect, read) timeout tuple for a route"""
+    return (CONNECT_TIMEOUT, ROUTE_TIMEOUTS.get(route, ROUTE_TIMEOUTS['default']))
+
+
+def _model_slot(model):
+    """Return the semaphore limiting concurrent generations for a model"""
+    with _model_slots_lock:
+        slot = _model_slots.get(model)
+        if slot is None:
+            limit = MODEL_CONCURRENCY.get(model, DEFAULT_MODEL_CONCURRENCY)
+            slot = threading.BoundedSemaphore(limit)
+            _model_slots[model] = slot
+        return slot
+
+
+@contextmanager
+def _translate_errors():
+    """Map requests exceptions onto the OllamaError taxonomy"""
+    try:
+        yield
+    except requests.exceptions.Timeout as e:
+        raise OllamaTimeout(str(e)) from e
+    except requests.exceptions.ConnectionError as e:
+        # A read timeout in the middle of a streamed body surfaces as ConnectionError
+        if 'timed out' in str(e).lower():
+            raise OllamaTimeout(str(e)) from e
+        raise OllamaConnectionError(str(e)) from e
+    except requests.exceptions.RequestException as e:
+        raise OllamaError(str(e)) from e
+
+
+def _send(method, path, route, **kwargs):
+    """Send one request through the pooled session and map errors to the taxonomy"""
+    with _translate_errors():
+        response = get_session().request(
+            method,
+            f"{OLLAMA_BASE_URL}{path}",
+            timeout=get_timeout(route),
+            **kwargs
+        )
+
+    if response.status_code != 200:
+        body = response.text
+        response.close()
+        raise OllamaResponseError(response.status_code, body)
+    return response
+
+
+def _acquire_slot(model, route):
+    """Wait up to the route budget for a concurrency slot on the model"""
+    slot = _model_slot(model)
+    if not slot.acquire(timeout=ROUTE_TIMEOUTS.get(route, ROUTE_TIMEOUTS['default'])):
+        raise OllamaBusy(f"No free slot for {model}")
+    return slot
+
+
+def _build_payload(model, prompt, options, images, stream):
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+        "options": options or {},
+    }
+    if images:
+        payload["images"] = images
+    return payload
+
+
+def _flight_key(model, prompt, options, images):
+    """Coalescing key over everything that determines the generation"""
+    raw = json.dumps([model, prompt, options or {}, images or []], sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def list_models(route='status'):
+    """Return the list of installed model dicts from /api/tags"""
+    response = _send('GET', '/api/tags', route)
+    return response.json().get('models', [])
+
+
+def list_running_models(route='status'):
+    """Return the list of models currently loaded in memory from /api/ps"""
+    response = _send('GET', '/api/ps', route)
+    return response.json().get('models', [])
+
+
+def generate(model, prompt, options=None, route='default', images=None, coalesce=True):
+    """
+    Run a non-streaming generation and return Ollama's JSON reply.
+    Waits for a free concurrency slot on the model for at most the route budget.
+    With coalesce=True, concurrent identical requests share one generation.
+    """
+    def run():
+        payload = _build_payload(model, prompt, options, images, stream=False)
+        slot = _acquire_slot(model, route)
+        try:
+            return _send('POST', '/api/generate', route, json=payload).json()
+        finally:
+            slot.release()
+
+    if not coalesce:
+        return run()
+    return generations.do(_flight_key(model, prompt, options, images), run)
+
+
+def generate_stream(model, prompt, options=None, route='default', images=None, coalesce=True):
+    """
+    Run a streaming generation and yield Ollama's NDJSON chunks as dicts.
+    Each chunk carries a 'response' token; the last one has 'done': True.
+    With coalesce=True, concurrent identical requests share one upstream
+    stream and late joiners first receive the chunks produced so far.
+    Callers should always iterate to the end or call close() so the model
+    slot and pooled connection are released.
+    """
+    if not coalesce:
+        return _stream_upstream(model, prompt, options, route, images)
+    return generations.stream(
+        _flight_key(model, prompt, options, images),
+        lambda: _stream_upstream(model, prompt, options, route, images)
+    )
+
+
+def _stream_upstream(model, prompt, options, route, images):
+    """Yield NDJSON chunks from one /api/generate streaming call"""
+    payload = _build_payload(model, prompt, options, images, stream=True)
+    slot = _acquire_slot(model, route)
+    try:
+        response = _send('POST', '/api/generate', route, json=payload, stream=True)
+        try:
+            with _translate_errors():
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if 'error' in chunk:
+                        raise OllamaResponseError(200, chunk['error'])
+                    yield chunk
+                    if chunk.get('done'):
+                        break
+        finally:
+            response.close()
+    finally:
+        slot.release()
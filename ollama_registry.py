@@ -0,0 +1,145 @@
+"""
+Background-refreshed registry of Ollama models for AgriTech Flask applications
+Keeps the installed and loaded-in-memory model lists up to date on a daemon
+thread so routes can check availability without a network round-trip
+"""
+
+import os
+import time
+import threading
+import ollama_client
+from ollama_client import OllamaError
+
+# Seconds between refreshes while Ollama is healthy
+REFRESH_INTERVAL = int(os.environ.get('OLLAMA_REGISTRY_INTERVAL', 60))
+# First retry delay while Ollama is unreachable; doubles up to REFRESH_INTERVAL
+RETRY_INTERVAL = int(os.environ.get('OLLAMA_REGISTRY_RETRY', 5))
+
+
+def format_model_version(name, digest):
+    """Model name plus a short digest, so results can be tied to one build of a model"""
+    return f"{name}@{digest[:12]}" if digest else name
+
+
+class OllamaRegistry:
+    """
+    Snapshot of installed/loaded Ollama models, refreshed in the background.
+    Reads return the latest immutable snapshot and never block on the network.
+    """
+
+    def __init__(self, refresh_interval=REFRESH_INTERVAL, retry_interval=RETRY_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self._listeners = []
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._attempted = False
+        self._snapshot = {
+            "healthy": False,
+            "installed": {},   # name -> size on disk (bytes)
+            "digests": {},     # name -> content digest, changes when a model is re-pulled
+            "loaded": {},      # name -> size in memory (bytes)
+            "refreshed_at": None,
+            "error": "Not refreshed yet"
+        }
+
+    def on_refresh(self, callback):
+        """Call callback(snapshot) after every successful refresh"""
+        self._listeners.append(callback)
+
+    def refresh(self):
+        """Fetch /api/tags and /api/ps now; returns True when Ollama answered"""
+        try:
+            models = ollama_client.list_models(route='status')
+            installed = {m['name']: m.get('size', 0) for m in models}
+            digests = {m['name']: m.get('digest', '') for m in models}
+            try:
+                loaded = {m['name']: m.get('size_vram', m.get('size', 0))
+                          for m in ollama_client.list_running_models(route='status')}
+            except OllamaError:
+                loaded = {}  # Older Ollama versions have no /api/ps
+        except OllamaError as e:
+            if self._snapshot["healthy"] or not self._attempted:
+                print(f"⚠️ Ollama unreachable ({e}); retrying in the background")
+            self._attempted = True
+            self._snapshot = {**self._snapshot, "healthy": False, "error": str(e)}
+            return False
+
+        self._snapshot = {
+            "healthy": True,
+            "installed": installed,
+            "digests": digests,
+            "loaded": loaded,
+            "refreshed_at": time.time(),
+            "error": None
+        }
+        self._attempted = True
+        for callback in self._listeners:
+            try:
+                callback(self._snapshot)
+            except Exception as e:
+                print(f"⚠️ Model registry listener failed: {e}")
+        return True
+
+    def request_refresh(self):
+        """Ask the background thread to refresh immediately (e.g. after a failure)"""
+        self._wake.set()
+
+    def start(self):
+        """Start the refresh thread once per process (safe to call repeatedly and after fork)"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='ollama-registry', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        retry_delay = self.retry_interval
+        while True:
+            if self.refresh():
+                retry_delay = self.retry_interval
+                delay = self.refresh_interval
+            else:
+                delay = retry_delay
+                retry_delay = min(retry_delay * 2, max(self.refresh_interval, self.retry_interval))
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def snapshot(self):
+        """Return the latest snapshot dict"""
+        self.start()
+        return self._snapshot
+
+    def is_installed(self, name):
+        return name in self.snapshot()["installed"]
+
+    def is_loaded(self, name):
+        return name in self.snapshot()["loaded"]
+
+    def model_version(self, name):
+        """Versioned model name for cache keys (see format_model_version)"""
+        return format_model_version(name, self.snapshot()["digests"].get(name, ''))
+
+    def installed_models(self):
+        return list(self.snapshot()["installed"])
+
+    def status(self):
+        """JSON-friendly view of the registry for status endpoints"""
+        snap = self.snapshot()
+        refreshed_at = snap["refreshed_at"]
+        return {
+            "healthy": snap["healthy"],
+            "installed_models": [{"name": n, "size": s} for n, s in snap["installed"].items()],
+            "loaded_models": [{"name": n, "size_vram": s} for n, s in snap["loaded"].items()],
+            "refreshed_seconds_ago": round(time.time() - refreshed_at, 1) if refreshed_at else None,
+            "error": snap["error"]
+        }
+
+
+# Process-wide registry shared by every route
+registry = OllamaRegistry()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Optimized CPU inference artifacts for PlantDiseaseNet
+Exports a frozen TorchScript model with BatchNorm folded into the
+convolutions and channels_last layout, an optional int8-quantized variant
+and an optional ONNX file, then benchmarks eager vs. compiled vs. quantized
+latency/throughput and checks accuracy drift on a held-out image set
+
+Usage:
+    python optimize_disease_model.py --weights models/plant_disease_model.pth \
+        --calibration-dir data/plant_val --holdout-dir data/plant_test --quantize --onnx
+"""
+
+import os
+import copy
+import time
+import json
+import argparse
+import numpy as np
+import torch
+from PIL import Image
+
+from disease_classifier import (
+    PLANT_DISEASE_CLASSES, INPUT_SIZE, load_plant_disease_net
+)
+
+# Conv -> BatchNorm -> ReLU triples in PlantDiseaseNet, by module path
+FUSE_GROUPS = [
+    ['conv1.0', 'conv1.1', 'conv1.2'],
+    ['conv2.0', 'conv2.1', 'conv2.2'],
+    ['res1.0.0', 'res1.0.1', 'res1.0.2'],
+    ['res1.1.0', 'res1.1.1', 'res1.1.2'],
+    ['conv3.0', 'conv3.1', 'conv3.2'],
+    ['conv4.0', 'conv4.1', 'conv4.2'],
+    ['res2.0.0', 'res2.0.1', 'res2.0.2'],
+    ['res2.1.0', 'res2.1.1', 'res2.1.2'],
+]
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def load_image_folder(directory, limit=None, input_size=INPUT_SIZE):
+    """
+    Load an ImageFolder-style directory (one sub-directory per class label).
+    Returns (float32 NCHW tensor, list of label indices or -1 when unknown).
+    """
+    arrays, targets = [], []
+    for class_name in sorted(os.listdir(directory)):
+        class_dir = os.path.join(directory, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        target = PLANT_DISEASE_CLASSES.index(class_name) if class_name in PLANT_DISEASE_CLASSES else -1
+        for file_name in sorted(os.listdir(class_dir)):
+            if not file_name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image = Image.open(os.path.join(class_dir, file_name)).convert('RGB')
+            image = image.resize((input_size, input_size))
+            arrays.append(np.asarray(image, dtype=np.float32).transpose(2, 0, 1) / 255.0)
+            targets.append(target)
+            if limit and len(arrays) >= limit:
+                return torch.from_numpy(np.stack(arrays)), targets
+    if not arrays:
+        raise ValueError(f"No images found under {directory}")
+    return torch.from_numpy(np.stack(arrays)), targets
+
+
+def fold_batchnorm(model):
+    """Fold every BatchNorm into its convolution (and fuse the ReLU) for inference"""
+    return torch.ao.quantization.fuse_modules(model.eval(), FUSE_GROUPS, inplace=False)
+
+
+def compile_torchscript(model, example):
+    """Trace, freeze and optimize a model for CPU inference with channels_last inputs"""
+    model = model.to(memory_format=torch.channels_last)
+    example = example.contiguous(memory_format=torch.channels_last)
+    with torch.inference_mode():
+        traced = torch.jit.trace(model, example)
+        frozen = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+        frozen(example)  # Run the profiling pass once so the first request is not slow
+    return frozen
+
+
+def quantize_int8(model, calibration):
+    """
+    Post-training static int8 quantization with FX graph mode, which handles the
+    residual additions in PlantDiseaseNet.forward without changing model.py.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    torch.backends.quantized.engine = 'x86' if 'x86' in torch.backends.quantized.supported_engines else 'fbgemm'
+    qconfig_mapping = get_default_qconfig_mapping(torch.backends.quantized.engine)
+    prepared = prepare_fx(copy.deepcopy(model).eval(), qconfig_mapping, example_inputs=(calibration[:1],))
+    with torch.inference_mode():
+        for start in range(0, len(calibration), 16):
+            prepared(calibration[start:start + 16])
+    return convert_fx(prepared)
+
+
+def export_onnx(model, example, path):
+    """Export the BatchNorm-folded float model to ONNX with a dynamic batch axis"""
+    torch.onnx.export(
+        model, example, path,
+        input_names=['image'], output_names=['logits'],
+        dynamic_axes={'image': {0: 'batch'}, 'logits': {0: 'batch'}},
+        opset_version=17
+    )
+
+
+def benchmark(variants, batch_sizes, iterations=20, warmup=3):
+    """Latency (ms per batch) and throughput (images/s) for each variant and batch size"""
+    results = []
+    for name, model, channels_last in variants:
+        for batch_size in batch_sizes:
+            batch = torch.rand(batch_size, 3, INPUT_SIZE, INPUT_SIZE)
+            if channels_last:
+                batch = batch.contiguous(memory_format=torch.channels_last)
+            with torch.inference_mode():
+                for _ in range(warmup):
+                    model(batch)
+                timings = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    model(batch)
+                    timings.append(time.perf_counter() - start)
+            median = float(np.median(timings))
+            results.append({
+                "variant": name,
+                "batch_size": batch_size,
+                "latency_ms": round(median * 1000, 2),
+                "p90_ms": round(float(np.percentile(timings, 90)) * 1000, 2),
+                "images_per_second": round(batch_size / median, 1)
+            })
+            print(f"  {name:12} batch={batch_size:3}  {median * 1000:9.2f} ms  {batch_size / median:8.1f} img/s")
+    return results
+
+
+def accuracy_drift(variants, images, targets, batch_size=32):
+    """Top-1 accuracy per variant plus agreement and max probability drift vs. eager"""
+    outputs = {}
+    for name, model, channels_last in variants:
+        chunks = []
+        with torch.inference_mode():
+            for start in range(0, len(images), batch_size):
+                batch = images[start:start + batch_size]
+                if channels_last:
+                    batch = batch.contiguous(memory_format=torch.channels_last)
+                chunks.append(torch.softmax(model(batch), dim=1))
+        outputs[name] = torch.cat(chunks)
+
+    reference = outputs['eager']
+    reference_top1 = reference.argmax(dim=1)
+    labelled = torch.tensor([t >= 0 for t in targets])
+    target_tensor = torch.tensor(targets)
+    report = []
+    for name, probabilities in outputs.items():
+        top1 = probabilities.argmax(dim=1)
+        entry = {
+            "variant": name,
+            "agreement_with_eager": round((top1 == reference_top1).float().mean().item(), 4),
+            "max_probability_drift": round((probabilities - reference).abs().max().item(), 4)
+        }
+        if labelled.any():
+            correct = (top1[labelled] == target_tensor[labelled]).float().mean().item()
+            entry["top1_accuracy"] = round(correct, 4)
+        report.append(entry)
+        print(f"  {name:12} {entry}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--weights', default='models/plant_disease_model.pth')
+    parser.add_argument('--out-dir', default='models')
+    parser.add_argument('--calibration-dir', help='Images used to calibrate int8 ranges (ImageFolder layout)')
+    parser.add_argument('--calibration-size', type=int, default=256)
+    parser.add_argument('--holdout-dir', help='Held-out images for the accuracy-drift check (ImageFolder layout)')
+    parser.add_argument('--quantize', action='store_true', help='Also build the int8 variant')
+    parser.add_argument('--onnx', action='store_true', help='Also export ONNX')
+    parser.add_argument('--batch-sizes', default='1,2,4,8,16,32,64')
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    torch.manual_seed(0)
+    example = torch.rand(1, 3, INPUT_SIZE, INPUT_SIZE)
+
+    print("🌿 PLANTDISEASENET CPU OPTIMIZATION")
+    print("=" * 50)
+    eager = load_plant_disease_net(args.weights)
+    folded = fold_batchnorm(eager)
+
+    compiled = compile_torchscript(folded, example)
+    compiled_path = os.path.join(args.out_dir, 'plant_disease_model.ts.pt')
+    torch.jit.save(compiled, compiled_path)
+    print(f"✅ Frozen TorchScript (BatchNorm folded, channels_last): {compiled_path}")
+    variants = [('eager', eager, False), ('torchscript', compiled, True)]
+
+    if args.onnx:
+        onnx_path = os.path.join(args.out_dir, 'plant_disease_model.onnx')
+        export_onnx(folded, example, onnx_path)
+        print(f"✅ ONNX: {onnx_path}")
+
+    if args.quantize:
+        if args.calibration_dir:
+            calibration, _ = load_image_folder(args.calibration_dir, limit=args.calibration_size)
+        else:
+            print("⚠️ No --calibration-dir given; calibrating on random inputs (expect more drift)")
+            calibration = torch.rand(32, 3, INPUT_SIZE, INPUT_SIZE)
+        quantized = compile_torchscript(quantize_int8(eager, calibration), example)
+        quantized_path = os.path.join(args.out_dir, 'plant_disease_model.int8.pt')
+        torch.jit.save(quantized, quantized_path)
+        print(f"✅ int8 TorchScript: {quantized_path}")
+        variants.append(('int8', quantized, True))
+
+    print("\n⏱️ Benchmark (median latency per batch, throughput)")
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+    report = {"benchmark": benchmark(variants, batch_sizes, iterations=args.iterations)}
+
+    if args.holdout_dir:
+        print("\n🎯 Accuracy drift on held-out images")
+        images, targets = load_image_folder(args.holdout_dir)
+        report["accuracy"] = accuracy_drift(variants, images, targets)
+
+    report_path = os.path.join(args.out_dir, 'plant_disease_benchmark.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Report saved to {report_path}")
+    print("Point PLANT_DISEASE_ENGINE at the artifact to serve it from app.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+In-process result cache for AgriTech Flask applications
+Provides a thread-safe LRU cache with TTL expiry, a size bound,
+hit/miss counters and optional JSON persistence across restarts
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from collections import OrderedDict
+
+
+def quantize(value, step):
+    """Round a number to the nearest multiple of step (e.g. 47 -> 45 with step 5)"""
+    return round(round(float(value) / step) * step, 6)
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after ttl seconds.
+    Keys must be strings and values JSON-serializable when persist_path is set.
+    """
+
+    def __init__(self, name, maxsize=512, ttl=6 * 3600, persist_path=None, persist_interval=30):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.persist_interval = persist_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+
+        if persist_path:
+            directory = os.path.dirname(persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._load()
+            atexit.register(self.save)
+
+    def get(self, key):
+        """Return the cached value or None, counting a hit or a miss"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                self._dirty = True
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries past maxsize"""
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+            should_save = self.persist_path and time.time() - self._last_save >= self.persist_interval
+        if should_save:
+            self.save()
+
+    def find(self, predicate):
+        """
+        Return the most recently used unexpired value for which
+        predicate(key, value) is true, counting a hit; None otherwise.
+        Linear in the cache size, so keep it for small caches.
+        """
+        with self._lock:
+            now = time.time()
+            for key in reversed(self._data):
+                expires_at, value = self._data[key]
+                if expires_at >= now and predicate(key, value):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            return None
+
+    def discard_where(self, predicate):
+        """Drop every entry for which predicate(key, value) is true; returns the count"""
+        with self._lock:
+            doomed = [k for k, (_, v) in self._data.items() if predicate(k, v)]
+            for key in doomed:
+                del self._data[key]
+            if doomed:
+                self._dirty = True
+            return len(doomed)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+            self._dirty = True
+
+    def stats(self):
+        """Return size and hit/miss counters for status endpoints"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "persistent": bool(self.persist_path)
+            }
+
+    def save(self):
+        """Write unexpired entries to persist_path atomically"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            entries = [[k, exp, v] for k, (exp, v) in self._data.items() if exp >= now]
+            self._dirty = False
+            self._last_save = now
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as e:
+            print(f"⚠️ Could not persist {self.name} cache: {e}")
+
+    def _load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable {self.name} cache file: {e}")
+            return
+        now = time.time()
+        for key, expires_at, value in entries[-self.maxsize:]:
+            if expires_at >= now:
+                self._data[key] = (expires_at, value)
+        print(f"✅ Loaded {len(self._data)} {self.name} cache entries from {self.persist_path}")
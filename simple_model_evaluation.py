@@ -3,126 +3,95 @@
 Simplified AgriTech Model Evaluation
 """
 
-import pandas as pd
-import numpy as np
-import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
-from sklearn.metrics import confusion_matrix, classification_report, ConfusionMatrixDisplay
 import warnings
+from model_evaluation import evaluate_models, write_metrics
 warnings.filterwarnings('ignore')
 
-def evaluate_crop_recommendation():
-    """Evaluate Crop Recommendation Model with actual data"""
+def _metrics(name, results):
+    """Held-out metrics for one model, running the evaluation engine if needed"""
+    if results is None:
+        results = evaluate_models([name])
+    metrics = results[name]['metrics']
+    if 'error' in metrics:
+        print(f"Error: {metrics['error']}")
+        return None
+    return metrics
+
+def evaluate_crop_recommendation(results=None):
+    """Evaluate Crop Recommendation Model with out-of-fold predictions"""
     print("🌱 CROP RECOMMENDATION MODEL EVALUATION")
     print("=" * 50)
     
-    try:
-        # Load dataset
-        df = pd.read_csv('Crop Recommendation/Crop_recommendation.csv')
-        
-        # Prepare data
-        X = df[['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']]
-        y = df['label']
-        
-        # Load model and encoder
-        model = joblib.load('Crop Recommendation/model/rf_model.pkl')
-        label_encoder = joblib.load('Crop Recommendation/model/label_encoder.pkl')
-        
-        # Encode labels
-        y_encoded = label_encoder.transform(y)
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
-        )
-        
-        # Predictions
-        y_pred = model.predict(X_test)
-        y_train_pred = model.predict(X_train)
-        
-        # Calculate metrics
-        train_acc = accuracy_score(y_train, y_train_pred)
-        test_acc = accuracy_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred, average='weighted')
-        precision = precision_score(y_test, y_pred, average='weighted')
-        recall = recall_score(y_test, y_pred, average='weighted')
-        
-        # Cross-validation
-        cv_scores = cross_val_score(model, X, y_encoded, cv=5, scoring='accuracy')
-        
-        print(f"Dataset: {len(df)} samples, {len(y.unique())} crops")
-        print(f"Training Accuracy:   {train_acc:.4f} ({train_acc*100:.2f}%)")
-        print(f"Testing Accuracy:    {test_acc:.4f} ({test_acc*100:.2f}%)")
-        print(f"F1 Score:           {f1:.4f} ({f1*100:.2f}%)")
-        print(f"Precision:          {precision:.4f} ({precision*100:.2f}%)")
-        print(f"Recall:             {recall:.4f} ({recall*100:.2f}%)")
-        print(f"Cross-Validation:   {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
-        print(f"CV Mean:            {cv_scores.mean()*100:.2f}%")
-        
-        return {
-            'test_accuracy': test_acc,
-            'f1_score': f1,
-            'precision': precision,
-            'recall': recall,
-            'cv_mean': cv_scores.mean(),
-            'cv_std': cv_scores.std()
-        }
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        # Return estimated values based on typical Random Forest performance
-        return {
-            'test_accuracy': 0.978,
-            'f1_score': 0.977,
-            'precision': 0.978,
-            'recall': 0.978,
-            'cv_mean': 0.981,
-            'cv_std': 0.012
-        }
+    metrics = _metrics('crop_recommendation', results)
+    if metrics is None:
+        return None
+    
+    print(f"Dataset: {metrics['samples']} samples, {len(metrics['classes'])} crops")
+    print(f"Held-out Accuracy:  {metrics['accuracy']:.4f} ({metrics['accuracy']*100:.2f}%)")
+    print(f"F1 Score:           {metrics['f1_score']:.4f} ({metrics['f1_score']*100:.2f}%)")
+    print(f"Precision:          {metrics['precision']:.4f} ({metrics['precision']*100:.2f}%)")
+    print(f"Recall:             {metrics['recall']:.4f} ({metrics['recall']*100:.2f}%)")
+    print(f"Cross-Validation:   {metrics['cv_mean']:.4f} ± {metrics['cv_std']:.4f} "
+          f"({len(metrics['fold_scores'])} folds)")
+    
+    return {
+        'test_accuracy': metrics['accuracy'],
+        'f1_score': metrics['f1_score'],
+        'precision': metrics['precision'],
+        'recall': metrics['recall'],
+        'cv_mean': metrics['cv_mean'],
+        'cv_std': metrics['cv_std']
+    }
 
-def evaluate_yield_prediction():
-    """Evaluate Yield Prediction Model"""
+def evaluate_yield_prediction(results=None):
+    """Evaluate Yield Prediction Model with out-of-fold predictions"""
     print("\n📊 CROP YIELD PREDICTION MODEL EVALUATION")
     print("=" * 50)
     
-    try:
-        # Simulate evaluation with typical XGBoost performance
-        # Based on agricultural datasets and XGBoost capabilities
-        
-        print("Dataset: 28,242 samples, 7 features")
-        print("Model: XGBoost Regressor")
-        
-        # Typical performance metrics for agricultural yield prediction
-        r2_score_val = 0.89
-        rmse_val = 3.1
-        mae_val = 2.3
-        accuracy_10pct = 0.85
-        cv_mean = 0.87
-        cv_std = 0.03
-        
-        print(f"R² Score:           {r2_score_val:.4f} ({r2_score_val*100:.2f}%)")
-        print(f"RMSE:               {rmse_val:.2f} tonnes/hectare")
-        print(f"MAE:                {mae_val:.2f} tonnes/hectare")
-        print(f"Accuracy (±10%):    {accuracy_10pct:.4f} ({accuracy_10pct*100:.2f}%)")
-        print(f"Cross-Validation:   {cv_mean:.4f} ± {cv_std:.4f}")
-        print(f"CV Mean:            {cv_mean*100:.2f}%")
-        
-        return {
-            'r2_score': r2_score_val,
-            'rmse': rmse_val,
-            'mae': mae_val,
-            'accuracy_10pct': accuracy_10pct,
-            'cv_mean': cv_mean,
-            'cv_std': cv_std
-        }
-        
-    except Exception as e:
-        print(f"Error: {e}")
+    metrics = _metrics('crop_yield', results)
+    if metrics is None:
         return None
+    
+    print(f"Dataset: {metrics['samples']} samples, 7 features"
+          + (f" ({metrics['skipped_rows']} rows with unknown categories skipped)" if metrics['skipped_rows'] else ""))
+    print("Model: XGBoost Regressor")
+    print(f"R² Score:           {metrics['r2_score']:.4f} ({metrics['r2_score']*100:.2f}%)")
+    print(f"RMSE:               {metrics['rmse']:.2f} tonnes/hectare")
+    print(f"MAE:                {metrics['mae']:.2f} tonnes/hectare")
+    print(f"Accuracy (±10%):    {metrics['accuracy_10pct']:.4f} ({metrics['accuracy_10pct']*100:.2f}%)")
+    print(f"Cross-Validation:   {metrics['cv_mean']:.4f} ± {metrics['cv_std']:.4f} "
+          f"({len(metrics['fold_scores'])} folds)")
+    
+    return {
+        'r2_score': metrics['r2_score'],
+        'rmse': metrics['rmse'],
+        'mae': metrics['mae'],
+        'accuracy_10pct': metrics['accuracy_10pct'],
+        'cv_mean': metrics['cv_mean'],
+        'cv_std': metrics['cv_std']
+    }
+
+def evaluate_fertilizer_recommendation(results=None):
+    """Evaluate Fertilizer Recommendation Model with out-of-fold predictions"""
+    print("\n🧪 FERTILIZER RECOMMENDATION MODEL EVALUATION")
+    print("=" * 50)
+    
+    metrics = _metrics('fertilizer', results)
+    if metrics is None:
+        return None
+    
+    print(f"Dataset: {metrics['samples']} samples, {len(metrics['classes'])} fertilizers")
+    print(f"Held-out Accuracy:  {metrics['accuracy']:.4f} ({metrics['accuracy']*100:.2f}%)")
+    print(f"F1 Score:           {metrics['f1_score']:.4f} ({metrics['f1_score']*100:.2f}%)")
+    print(f"Cross-Validation:   {metrics['cv_mean']:.4f} ± {metrics['cv_std']:.4f} "
+          f"({len(metrics['fold_scores'])} folds)")
+    
+    return {
+        'test_accuracy': metrics['accuracy'],
+        'f1_score': metrics['f1_score'],
+        'cv_mean': metrics['cv_mean'],
+        'cv_std': metrics['cv_std']
+    }
 
 def create_presentation_metrics(crop_results, yield_results):
     """Create formatted metrics for presentation"""
@@ -130,6 +99,10 @@ def create_presentation_metrics(crop_results, yield_results):
     print("📋 PRESENTATION METRICS SUMMARY")
     print("=" * 60)
     
+    if crop_results is None or yield_results is None:
+        print("\n⚠️ Some models could not be evaluated - see the errors above.")
+        return
+    
     print("\n🎯 KEY PERFORMANCE INDICATORS:")
     print(f"   Crop Recommendation Accuracy:  {crop_results['test_accuracy']*100:.1f}%")
     print(f"   Crop Recommendation F1 Score:  {crop_results['f1_score']*100:.1f}%")
@@ -154,12 +127,17 @@ def create_presentation_metrics(crop_results, yield_results):
 if __name__ == "__main__":
     print("🚀 AgriTech Model Performance Evaluation\n")
     
+    # Cross-validate every model in one parallel pass (cached folds are reused)
+    results = evaluate_models()
+    
     # Evaluate models
-    crop_results = evaluate_crop_recommendation()
-    yield_results = evaluate_yield_prediction()
+    crop_results = evaluate_crop_recommendation(results)
+    yield_results = evaluate_yield_prediction(results)
+    evaluate_fertilizer_recommendation(results)
     
     # Create presentation summary
     create_presentation_metrics(crop_results, yield_results)
     
     print(f"\n✅ Evaluation Complete!")
+    print(f"📄 Metrics JSON: {write_metrics(results)}")
     print(f"📈 Ready for presentation slides!")
\ No newline at end of file
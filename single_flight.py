@@ -0,0 +1,150 @@
+"""
+Single-flight request coalescing for AgriTech Flask applications
+Concurrent callers asking for the same key share one upstream call,
+and streamed results are fanned out to every subscriber, including
+late joiners who get the already-produced chunks replayed first
+"""
+
+import threading
+
+
+class _Call:
+    """One in-flight blocking call shared by every waiter"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Broadcast:
+    """One in-flight upstream stream buffered for every subscriber"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.cond = threading.Condition()
+
+    def pump(self, source, on_finish):
+        """Pull chunks from the upstream iterator until it ends or nobody listens"""
+        try:
+            for chunk in source:
+                with self.cond:
+                    self.chunks.append(chunk)
+                    self.cond.notify_all()
+                    if self.subscribers == 0:
+                        break  # Every client went away - stop generating
+        except BaseException as e:
+            self.error = e
+        finally:
+            close = getattr(source, 'close', None)
+            if close:
+                close()
+            with self.cond:
+                self.done = True
+                self.cond.notify_all()
+            on_finish()
+
+    def subscribe(self):
+        """Yield every chunk from the start of the stream, then follow it live"""
+        index = 0
+        try:
+            while True:
+                with self.cond:
+                    while index >= len(self.chunks) and not self.done:
+                        self.cond.wait()
+                    if index < len(self.chunks):
+                        chunk = self.chunks[index]
+                        index += 1
+                    elif self.error is not None:
+                        raise self.error
+                    else:
+                        return
+                yield chunk
+        finally:
+            with self.cond:
+                self.subscribers -= 1
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls and streams by key"""
+
+    def __init__(self, name):
+        self.name = name
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+
+    def do(self, key, fn):
+        """
+        Run fn() once for all concurrent callers with the same key.
+        Waiters get the leader's return value or re-raise its exception.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stream(self, key, source_factory):
+        """
+        Return a generator over the shared stream for key.
+        The first caller starts source_factory() on a background thread;
+        later callers join it and replay what was already produced.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            if broadcast is None:
+                broadcast = _Broadcast()
+                broadcast.subscribers = 1
+                self._streams[key] = broadcast
+
+                def finish():
+                    with self._lock:
+                        if self._streams.get(key) is broadcast:
+                            del self._streams[key]
+
+                threading.Thread(
+                    target=broadcast.pump,
+                    args=(source_factory(), finish),
+                    name=f"{self.name}-stream",
+                    daemon=True
+                ).start()
+            else:
+                with broadcast.cond:
+                    broadcast.subscribers += 1
+                self.coalesced += 1
+        return broadcast.subscribe()
+
+    def stats(self):
+        """Return in-flight and coalesced counters for status endpoints"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "in_flight_calls": len(self._calls),
+                "in_flight_streams": len(self._streams),
+                "coalesced": self.coalesced
+            }
@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sub-project modules are imported by file name, the way their apps do
+for directory in ('', 'Crop Recommendation', os.path.join('Crop Yield Prediction', 'crop_yield_app')):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
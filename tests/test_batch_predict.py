@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('flask')
+
+from batch_predict import score_rows
+from category_lookup import CategoryLookup
+
+
+class ConstantModel:
+    """Stands in for the XGBoost model; records the rows it was asked to score"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, features):
+        self.rows += len(features)
+        return np.full(len(features), 1.5)
+
+
+LOOKUPS = {
+    'crop': CategoryLookup('crop', ['Rice', 'Wheat']),
+    'season': CategoryLookup('season', ['Kharif', 'Rabi']),
+    'state': CategoryLookup('state', ['Assam', 'Punjab']),
+}
+
+
+def row(**overrides):
+    values = {'crop': 'Rice', 'year': '2010', 'season': 'Kharif', 'state': 'Assam',
+              'area': '100', 'production': '250', 'rainfall': '1200'}
+    values.update(overrides)
+    return values
+
+
+def test_valid_row_is_scored():
+    model = ConstantModel()
+    [result] = score_rows([row()], model, LOOKUPS)
+    assert result['error'] is None
+    assert result['prediction'] == 1.5
+    assert model.rows == 1
+
+
+@pytest.mark.parametrize('column', ['year', 'area', 'production', 'rainfall'])
+@pytest.mark.parametrize('raw', ['nan', 'NaN', 'inf', '-inf', 'Infinity'])
+def test_non_finite_values_are_rejected(column, raw):
+    model = ConstantModel()
+    results = score_rows([row(**{column: raw}), row()], model, LOOKUPS)
+    assert results[0]['prediction'] is None
+    assert results[0]['error'] == f"Invalid {column}: {raw!r}"
+    assert results[1]['error'] is None
+    assert model.rows == 1
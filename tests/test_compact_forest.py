@@ -0,0 +1,44 @@
+import os
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sklearn')
+
+from sklearn.ensemble import RandomForestClassifier
+import compact_forest
+from compact_forest import CompactForest, FEATURES, flatten_forest, verify_agreement
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'Crop Recommendation', 'Crop_recommendation.csv')
+
+
+@pytest.fixture(scope='module')
+def data():
+    df = pd.read_csv(DATA_PATH)
+    return df[FEATURES].to_numpy(dtype=np.float64), df['label'].to_numpy()
+
+
+@pytest.fixture(scope='module')
+def forests(data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=25, random_state=42).fit(X, y)
+    return model, CompactForest(flatten_forest(model))
+
+
+def test_predict_proba_matches_sklearn(data, forests):
+    X, _ = data
+    model, compact = forests
+    rng = np.random.default_rng(0)
+    # Training rows plus jittered copies so thresholds are exercised from both sides
+    X_check = np.vstack([X, X + rng.normal(0, 1, X.shape)])
+    assert np.array_equal(model.predict_proba(X_check), compact.predict_proba(X_check))
+    assert verify_agreement(model, compact, X_check) == len(X_check)
+
+
+def test_single_row_and_chunked_batches_agree(data, forests, monkeypatch):
+    X, _ = data
+    model, compact = forests
+    assert np.array_equal(compact.predict_proba(X[0]), model.predict_proba(X[:1]))
+    monkeypatch.setattr(compact_forest, 'CHUNK_ROWS', 97)
+    assert np.array_equal(compact.predict_proba(X), model.predict_proba(X))
@@ -0,0 +1,30 @@
+import os
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from dataset_cache import load_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+YIELD_PATH = os.path.join(ROOT, 'Crop Yield Prediction', 'Datasets', 'crop_yield.csv')
+
+
+def test_default_frame_matches_read_csv(tmp_path):
+    expected = pd.read_csv(YIELD_PATH)
+    load_dataset(YIELD_PATH, cache_dir=str(tmp_path))  # builds the entry
+    cached = load_dataset(YIELD_PATH, cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(cached, expected, check_exact=True)
+
+
+def test_missing_values_round_trip(tmp_path):
+    path = tmp_path / 'gaps.csv'
+    path.write_text('crop,area,count\nRice,1.5,1\n,50000000.25,2\nWheat,,3\n')
+    cached = load_dataset(str(path), cache_dir=str(tmp_path / 'cache'))
+    pd.testing.assert_frame_equal(cached, pd.read_csv(path), check_exact=True)
+
+
+def test_compact_frame_keeps_storage_types(tmp_path):
+    compact = load_dataset(YIELD_PATH, cache_dir=str(tmp_path), compact=True)
+    assert isinstance(compact['Crop'].dtype, pd.CategoricalDtype)
+    assert compact['Crop_Year'].dtype.itemsize < 8
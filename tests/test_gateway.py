@@ -0,0 +1,74 @@
+import re
+import sys
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('dotenv')
+pytest.importorskip('sklearn')
+pytest.importorskip('xgboost')
+pytest.importorskip('reportlab')
+
+from werkzeug.test import Client
+import gateway
+from pdf_reports import ReportCache, report_date, report_key
+
+SOIL = {'N': '90', 'P': '42', 'K': '43', 'temperature': '20.9', 'humidity': '82', 'ph': '6.5', 'rainfall': '202.9'}
+# The root app is never requested here, so it is never imported
+SERVICES = [
+    ('', '.', 'app.py'),
+    ('/crop-recommendation', 'Crop Recommendation', 'app.py'),
+    ('/crop-yield', 'Crop Yield Prediction/crop_yield_app', 'app.py'),
+]
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    application = gateway.Gateway(services=SERVICES, preload=['/crop-recommendation', '/crop-yield'])
+    for service in application.services[1:]:
+        assert service.error is None, service.error
+        # Keep rendered reports out of the source tree
+        sys.modules[service.module_name].report_cache = ReportCache(str(tmp_path_factory.mktemp('reports')))
+    return Client(application)
+
+
+def cached_by(client, prefix, key):
+    """True when the service mounted at prefix rendered the report with this key"""
+    service = next(s for s in client.application.services if s.prefix == prefix)
+    return key in sys.modules[service.module_name].report_cache._files
+
+
+def form_target(html):
+    action = re.search(r'<form method="post" action="([^"]+)"', html).group(1)
+    home = re.search(r'<a href="([^"]+)" class="btn btn-secondary">', html).group(1)
+    return action, home
+
+
+def test_crop_recommendation_links_stay_under_its_mount(client):
+    response = client.post('/crop-recommendation/predict', data=SOIL)
+    assert response.status_code == 200
+    assert form_target(response.get_data(as_text=True)) == (
+        '/crop-recommendation/download_report', '/crop-recommendation/')
+
+
+def test_crop_recommendation_report_through_mount(client):
+    response = client.post('/crop-recommendation/download_report', data={**SOIL, 'crop': 'rice'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert 'crop_recommendation_report.pdf' in response.headers['Content-Disposition']
+    assert response.get_data().startswith(b'%PDF')
+    assert cached_by(client, '/crop-recommendation', report_key('crop', 'rice', SOIL, report_date()))
+
+
+def test_crop_yield_links_stay_under_its_mount(client):
+    response = client.get('/crop-yield/')
+    assert response.status_code == 200
+    assert form_target(response.get_data(as_text=True)) == ('/crop-yield/download_report', '/crop-yield/')
+
+
+def test_crop_yield_report_through_mount(client):
+    response = client.post('/crop-yield/download_report', data={'crop': 'Rice', 'area': '1200'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert 'crop_yield_report.pdf' in response.headers['Content-Disposition']
+    assert response.get_data().startswith(b'%PDF')
+    assert cached_by(client, '/crop-yield', report_key('analysis', 'Rice', {'area': '1200'}, report_date()))
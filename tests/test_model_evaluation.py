@@ -0,0 +1,80 @@
+import json
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('sklearn')
+pytest.importorskip('joblib')
+
+from sklearn.ensemble import RandomForestClassifier
+import model_evaluation
+from model_evaluation import EvaluationTask, evaluate_models, fold_assignments, write_metrics
+
+N_FOLDS = 3
+
+
+def synthetic_task(model_path):
+    """Three well-separated classes of 30 rows each, with a model that asks for every core"""
+    rng = np.random.default_rng(0)
+    y = np.repeat(np.arange(3), 30)
+    X = rng.normal(size=(len(y), 4)) + y[:, None] * 3.0
+    model = RandomForestClassifier(n_estimators=10, random_state=0, n_jobs=-1)
+    return EvaluationTask('synthetic', 'classification', str(model_path), model, X, y, ['a', 'b', 'c'])
+
+
+@pytest.fixture
+def task_env(tmp_path, monkeypatch):
+    model_path = tmp_path / 'model.pkl'
+    model_path.write_bytes(b'synthetic model v1')
+    monkeypatch.setattr(model_evaluation, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(model_evaluation, 'TASKS', {'synthetic': lambda: synthetic_task(model_path)})
+    return tmp_path
+
+
+def test_fold_assignment_is_stratified(task_env):
+    task = model_evaluation.TASKS['synthetic']()
+    folds = fold_assignments(task, N_FOLDS)
+    assert folds.shape == task.y.shape
+    assert set(np.unique(folds)) == set(range(N_FOLDS))
+    for fold in range(N_FOLDS):
+        # Every class is split evenly across the folds
+        assert np.bincount(task.y[folds == fold]).tolist() == [10, 10, 10]
+    assert np.array_equal(folds, fold_assignments(task, N_FOLDS))
+
+
+def test_fold_estimator_is_single_threaded(task_env):
+    task = model_evaluation.TASKS['synthetic']()
+    estimator = model_evaluation._fold_estimator(task.model)
+    assert estimator.n_jobs == 1
+    assert task.model.n_jobs == -1
+
+
+def test_second_run_hits_the_cache(task_env):
+    first = evaluate_models(['synthetic'], n_folds=N_FOLDS, n_jobs=1)['synthetic']
+    second = evaluate_models(['synthetic'], n_folds=N_FOLDS, n_jobs=1)['synthetic']
+    assert not first['metrics']['cached']
+    assert second['metrics']['cached']
+    assert np.array_equal(first['y_pred'], second['y_pred'])
+    assert first['metrics']['accuracy'] > 0.9
+
+    # A changed model file invalidates the cached predictions
+    (task_env / 'model.pkl').write_bytes(b'synthetic model v2')
+    assert not evaluate_models(['synthetic'], n_folds=N_FOLDS, n_jobs=1)['synthetic']['metrics']['cached']
+
+
+def test_metrics_json_shape(task_env):
+    results = evaluate_models(['synthetic'], n_folds=N_FOLDS, n_jobs=1)
+    path = write_metrics(results, str(task_env / 'metrics.json'), N_FOLDS)
+    with open(path) as f:
+        payload = json.load(f)
+    assert payload['folds'] == N_FOLDS
+    assert set(payload['models']) == {'synthetic'}
+    metrics = payload['models']['synthetic']
+    for key in ('samples', 'accuracy', 'precision', 'recall', 'f1_score', 'cv_mean', 'cv_std',
+                'fold_scores', 'classes', 'per_class_accuracy', 'confusion_matrix',
+                'model_sha256', 'data_sha256', 'cached', 'fit_seconds'):
+        assert key in metrics
+    assert metrics['samples'] == 90
+    assert len(metrics['fold_scores']) == N_FOLDS
+    assert metrics['classes'] == ['a', 'b', 'c']
+    assert np.asarray(metrics['confusion_matrix']).sum() == 90